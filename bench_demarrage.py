@@ -0,0 +1,81 @@
+"""
+Benchmark du démarrage de l'application
+Mesure:
+1. init_db() sur une base à jour (chemin de tous les démarrages courants)
+   comparé à la réexécution complète du DDL (ancien comportement)
+2. Le démarrage complet d'un processus: import de main + init_db,
+   puis lancement de main.py jusqu'au menu (option Quitter)
+
+Usage: python bench_demarrage.py [nombre_de_repetitions]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import database
+
+RACINE = os.path.dirname(os.path.abspath(__file__))
+
+
+def chronometrer(fonction, repetitions):
+    """Retourne la médiane (ms) de plusieurs exécutions"""
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append((time.perf_counter() - debut) * 1000)
+    return statistics.median(durees)
+
+
+def ddl_complet():
+    """Ancien démarrage: tout le DDL et un commit à chaque lancement"""
+    conn = database.get_connection()
+    try:
+        cur = conn.cursor()
+        for migration in database.MIGRATIONS:
+            migration(cur)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def processus(commande, entree=None):
+    """Lance un interpréteur Python dans le dossier courant (base temporaire)"""
+    env = dict(os.environ, PYTHONPATH=RACINE)
+    subprocess.run(commande, input=entree, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, text=True)
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    with tempfile.TemporaryDirectory() as dossier:
+        os.chdir(dossier)
+        database.DB_PATH = os.path.join(dossier, "conges.db")
+
+        premiere = chronometrer(database.init_db, 1)
+        a_jour = chronometrer(database.init_db, repetitions)
+        ancien = chronometrer(ddl_complet, repetitions)
+
+        import_main = chronometrer(
+            lambda: processus([sys.executable, "-c", "import main; main.init_db()"]), repetitions)
+        menu = chronometrer(
+            lambda: processus([sys.executable, os.path.join(RACINE, "main.py")], entree="3\n"), repetitions)
+        interpreteur = chronometrer(lambda: processus([sys.executable, "-c", "pass"]), repetitions)
+
+        os.chdir(RACINE)
+
+    print(f"Répétitions: {repetitions} (médianes)")
+    print(f"init_db - première création du schéma : {premiere:8.2f} ms")
+    print(f"init_db - base à jour (user_version)  : {a_jour:8.2f} ms")
+    print(f"DDL complet à chaque démarrage        : {ancien:8.2f} ms")
+    print(f"Interpréteur Python seul              : {interpreteur:8.2f} ms")
+    print(f"Processus: import main + init_db      : {import_main:8.2f} ms")
+    print(f"Processus: main.py jusqu'à 'Quitter'  : {menu:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,576 @@
+"""
+Mode commande (non interactif) pour les traitements planifiés
+Chaque sous-commande lit ses entrées en arguments ou en JSONL sur l'entrée
+standard, traite le tout sur une seule connexion avec une transaction par
+lot, et écrit un résultat JSON par ligne sur la sortie standard.
+
+Exemples:
+    python main.py importer-employes < employes.jsonl
+    python main.py soumettre < demandes.jsonl
+    python main.py valider 12 13 14
+    python main.py refuser --utilisateur chef.it 15
+    python main.py lister --statut "En attente"
+    python main.py exporter --format csv > demandes.csv
+    python main.py importer-historique historique.csv --taille-bloc 10000
+    python main.py archiver --horizon-jours 365
+    python main.py recalculer-durees
+    python main.py instantane analyses/instantane
+    python main.py prevoir --soldes
+    python main.py calendrier --service IT > absences-it.ics
+    python main.py modifications --depuis 1200
+    python main.py reorganiser < mouvements.jsonl
+    python main.py compter --par service --statut "En attente"
+    python main.py top-absences --limite 5 --depuis 2025-01-01
+    python main.py maintenance --sauvegarde sauvegardes/conges.db --vacuum --optimiser
+    python main.py --locataire filiale_nord lister
+    python main.py maintenance --tous-locataires --sauvegarde sauvegardes --vacuum
+"""
+import argparse
+import csv
+import json
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import database
+from database import init_db, connexion_partagee, lot, operation
+
+TAILLE_LOT_DEFAUT = 500
+
+# Codes de sortie
+SORTIE_OK = 0
+SORTIE_ECHECS = 1
+
+
+def executer(arguments):
+    """Point d'entrée du mode commande, retourne le code de sortie du processus"""
+    parser = _construire_parser()
+    args = parser.parse_args(arguments)
+
+    if args.base:
+        database.DB_PATH = args.base
+
+    with database.locataire(args.locataire):
+        init_db()
+
+        sortie = sys.stdout
+        # Les services affichent des messages pour le menu interactif:
+        # on les renvoie sur stderr pour garder stdout lisible par une machine
+        with redirect_stdout(sys.stderr):
+            return args.fonction(args, sortie)
+
+
+def _construire_parser():
+    parser = argparse.ArgumentParser(prog="main.py", description="Gestion des congés - mode commande")
+    parser.add_argument("--base", help="chemin de la base SQLite (défaut: conges.db)")
+    parser.add_argument("--locataire", help="société: utilise la base locataires/<LOCATAIRE>.db")
+    sous_parsers = parser.add_subparsers(dest="commande", required=True)
+
+    p = sous_parsers.add_parser("importer-employes",
+                                help="importe des employés (JSONL: matricule, nom, prenom, service, solde)")
+    p.add_argument("--fichier", help="fichier JSONL (défaut: entrée standard)")
+    p.add_argument("--taille-lot", type=int, default=TAILLE_LOT_DEFAUT)
+    p.set_defaults(fonction=_commande_importer_employes)
+
+    p = sous_parsers.add_parser("importer-historique",
+                                help="importe l'historique des demandes (CSV ou JSONL: matricule ou "
+                                     "employe_id, date_debut, date_fin, type_conge, statut, "
+                                     "commentaire, motif), reprise automatique après interruption")
+    p.add_argument("fichier", help="fichier .csv (avec en-tête) ou JSONL")
+    p.add_argument("--taille-bloc", type=int, default=None, help="lignes par bloc (défaut: 10000)")
+    p.add_argument("--workers", type=int, default=None, help="processus de validation (défaut: nb de CPU)")
+    p.set_defaults(fonction=_commande_importer_historique)
+
+    p = sous_parsers.add_parser("soumettre",
+                                help="soumet des demandes (JSONL: employe_id ou matricule, date_debut, "
+                                     "date_fin, type_conge, commentaire, motif, cle_idempotence)")
+    p.add_argument("--fichier", help="fichier JSONL (défaut: entrée standard)")
+    p.add_argument("--taille-lot", type=int, default=TAILLE_LOT_DEFAUT)
+    p.set_defaults(fonction=_commande_soumettre)
+
+    for nom, aide, fonction in (("valider", "valide des demandes", _commande_valider),
+                                ("refuser", "refuse des demandes", _commande_refuser)):
+        p = sous_parsers.add_parser(nom, help=f"{aide} (IDs en arguments ou JSONL {{\"id\": ...}})")
+        p.add_argument("ids", nargs="*", type=int)
+        p.add_argument("--fichier", help="fichier JSONL (défaut: entrée standard si aucun ID)")
+        p.add_argument("--taille-lot", type=int, default=TAILLE_LOT_DEFAUT)
+        p.add_argument("--utilisateur", help="login du compte RH qui traite: limité aux demandes de ses "
+                                             "subordonnés s'il en a")
+        p.set_defaults(fonction=fonction)
+
+    p = sous_parsers.add_parser("lister", help="liste les demandes en JSONL")
+    p.add_argument("--statut", help="filtre sur le statut (ex: 'En attente')")
+    p.add_argument("--employe", type=int, help="filtre sur l'ID employé")
+    p.add_argument("--historique", action="store_true",
+                   help="avec --employe: inclut les demandes archivées")
+    p.add_argument("--responsable", type=int,
+                   help="demandes des subordonnés de l'employé ID, à toute profondeur")
+    p.set_defaults(fonction=_commande_lister)
+
+    p = sous_parsers.add_parser("compter",
+                                help="nombre de demandes par statut, type de congé ou service (JSONL)")
+    p.add_argument("--par", choices=["statut", "type_conge", "service"], default="statut")
+    p.add_argument("--statut", help="filtre sur le statut (sans effet avec --par statut)")
+    p.set_defaults(fonction=_commande_compter)
+
+    p = sous_parsers.add_parser("top-absences",
+                                help="employés ayant le plus de jours d'absence validés (JSONL)")
+    p.add_argument("--limite", type=int, default=10)
+    p.add_argument("--depuis", help="demandes commençant à partir de cette date (YYYY-MM-DD)")
+    p.add_argument("--jusqu-a", help="demandes commençant au plus tard à cette date (YYYY-MM-DD)")
+    p.set_defaults(fonction=_commande_top_absences)
+
+    p = sous_parsers.add_parser("reorganiser",
+                                help="rattache des employés (et leurs sous-arbres) à un manager "
+                                     "(JSONL: employe_id, manager_id ou null)")
+    p.add_argument("--fichier", help="fichier JSONL (défaut: entrée standard)")
+    p.add_argument("--taille-lot", type=int, default=TAILLE_LOT_DEFAUT)
+    p.set_defaults(fonction=_commande_reorganiser)
+
+    p = sous_parsers.add_parser("exporter", help="exporte les demandes (CSV ou JSONL)")
+    p.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    p.add_argument("--statut", help="filtre sur le statut")
+    p.set_defaults(fonction=_commande_exporter)
+
+    p = sous_parsers.add_parser("archiver",
+                                help="archive les demandes traitées terminées avant l'horizon de conservation")
+    p.add_argument("--horizon-jours", type=int, default=None, help="défaut: 365")
+    p.add_argument("--taille-lot", type=int, default=TAILLE_LOT_DEFAUT)
+    p.set_defaults(fonction=_commande_archiver)
+
+    p = sous_parsers.add_parser("recalculer-durees",
+                                help="remplit nb_jours et jours_deductibles des demandes qui n'en ont pas")
+    p.add_argument("--toutes", action="store_true",
+                   help="recalcule toutes les demandes (après un changement de règle de calcul)")
+    p.add_argument("--taille-lot", type=int, default=None, help="défaut: 1000")
+    p.set_defaults(fonction=_commande_recalculer_durees)
+
+    p = sous_parsers.add_parser("instantane",
+                                help="exporte l'historique en colonnes NumPy pour les analyses (voir services/instantane.py)")
+    p.add_argument("repertoire", help="répertoire de l'instantané (remplacé)")
+    p.set_defaults(fonction=_commande_instantane)
+
+    p = sous_parsers.add_parser("prevoir",
+                                help="charge d'absences attendue par service et par mois sur 12 mois "
+                                     "(voir services/previsions.py)")
+    p.add_argument("--soldes", action="store_true", help="ajoute le solde projeté de chaque employé par mois")
+    p.set_defaults(fonction=_commande_prevoir)
+
+    p = sous_parsers.add_parser("calendrier", help="flux iCalendar (.ics) des absences validées")
+    filtre = p.add_mutually_exclusive_group()
+    filtre.add_argument("--employe", type=int, help="absences d'un employé (ID)")
+    filtre.add_argument("--service", help="absences d'un service")
+    p.add_argument("--nom", default="Absences", help="nom du calendrier")
+    p.add_argument("--etag", help="ETag déjà reçu: rien n'est écrit si le flux n'a pas changé")
+    p.set_defaults(fonction=_commande_calendrier)
+
+    p = sous_parsers.add_parser("modifications",
+                                help="employés et demandes modifiés depuis un curseur (synchronisation)")
+    p.add_argument("--depuis", type=int, default=0, help="curseur de l'appel précédent (défaut: 0, tout)")
+    p.add_argument("--limite", type=int, default=TAILLE_LOT_DEFAUT)
+    p.set_defaults(fonction=_commande_modifications)
+
+    p = sous_parsers.add_parser("maintenance", help="sauvegarde à chaud, vacuum incrémental, statistiques")
+    p.add_argument("--sauvegarde", metavar="FICHIER", help="copie la base en ligne vers FICHIER")
+    p.add_argument("--activer-vacuum-incremental", action="store_true",
+                   help="passe une base existante en auto_vacuum incrémental (VACUUM complet, "
+                        "bloque les écritures: hors des heures d'activité)")
+    p.add_argument("--vacuum", action="store_true", help="rend au système les pages libres")
+    p.add_argument("--optimiser", action="store_true", help="PRAGMA optimize")
+    p.add_argument("--analyser", action="store_true", help="ANALYZE complet")
+    p.add_argument("--tous-locataires", action="store_true",
+                   help="traite toutes les bases de locataires en parallèle "
+                        "(--sauvegarde désigne alors un répertoire: <locataire>.db)")
+    p.set_defaults(fonction=_commande_maintenance)
+
+    return parser
+
+
+# ----------------------------------------------------------------------
+# Lecture des entrées et traitement par lots
+# ----------------------------------------------------------------------
+class _LigneIllisible:
+    """Entrée qui n'a pas pu être lue: _traiter en fait un résultat en échec, sans arrêter le lot"""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def _lire_jsonl(chemin):
+    """
+    Itère sur les objets JSON d'un fichier (ou de stdin), une ligne par objet
+    Une ligne qui n'est pas un objet JSON donne une _LigneIllisible
+    """
+    flux = open(chemin, encoding="utf-8") if chemin else sys.stdin
+    try:
+        for ligne in flux:
+            ligne = ligne.strip()
+            if not ligne:
+                continue
+            try:
+                objet = json.loads(ligne)
+            except json.JSONDecodeError as e:
+                yield _LigneIllisible(f"JSON invalide: {e}")
+                continue
+            yield objet if isinstance(objet, dict) else _LigneIllisible("Objet JSON attendu")
+    finally:
+        if chemin:
+            flux.close()
+
+
+def _par_lots(elements, taille):
+    lot_courant = []
+    for element in elements:
+        lot_courant.append(element)
+        if len(lot_courant) >= taille:
+            yield lot_courant
+            lot_courant = []
+    if lot_courant:
+        yield lot_courant
+
+
+def _traiter(elements, traitement, taille_lot, sortie):
+    """
+    Applique traitement(element) -> dict à chaque élément
+    Une connexion pour tout le traitement, une transaction par lot,
+    un point de sauvegarde par élément (un échec n'annule que l'élément)
+    """
+    from services.resultats import RESULTAT_OK, RESULTAT_ERREUR, RESULTAT_INVALIDE
+
+    resume = {"total": 0, "ok": 0, "echecs": 0}
+    numero = 0
+
+    with connexion_partagee() as conn:
+        for elements_du_lot in _par_lots(elements, taille_lot):
+            resultats = []
+            with lot(conn):
+                for element in elements_du_lot:
+                    numero += 1
+                    if isinstance(element, _LigneIllisible):
+                        resultats.append({"resultat": RESULTAT_INVALIDE, "message": element.message,
+                                          "ligne": numero})
+                        continue
+                    try:
+                        with operation(conn):
+                            resultat = traitement(element)
+                            if resultat["resultat"] != RESULTAT_OK:
+                                raise _Echec(resultat)
+                    except _Echec as echec:
+                        resultat = echec.resultat
+                    except Exception as e:
+                        resultat = {"resultat": RESULTAT_ERREUR, "message": str(e)}
+                    resultat["ligne"] = numero
+                    resultats.append(resultat)
+
+            # Écrit après le commit du lot: tout ce qui est annoncé OK est enregistré
+            for resultat in resultats:
+                _ecrire(sortie, resultat)
+                resume["total"] += 1
+                resume["ok" if resultat["resultat"] == RESULTAT_OK else "echecs"] += 1
+            sortie.flush()
+
+    print(json.dumps({"resume": resume}, ensure_ascii=False))
+    return SORTIE_OK if resume["echecs"] == 0 else SORTIE_ECHECS
+
+
+class _Echec(Exception):
+    """Résultat en échec: annule le point de sauvegarde de l'élément"""
+
+    def __init__(self, resultat):
+        super().__init__(resultat.get("message"))
+        self.resultat = resultat
+
+
+def _ecrire(sortie, objet):
+    sortie.write(json.dumps(objet, ensure_ascii=False) + "\n")
+
+
+# ----------------------------------------------------------------------
+# Sous-commandes
+# ----------------------------------------------------------------------
+def _commande_importer_employes(args, sortie):
+    from services.dao import EmployeDAO
+    from services.gestion_conges import GestionConges
+    from services.resultats import RESULTAT_OK
+
+    def importer(employe):
+        solde = employe.get("solde", GestionConges.SOLDE_INITIAL_ANNUEL)
+        employe_id = EmployeDAO.creer(employe["matricule"], employe["nom"], employe["prenom"],
+                                      employe.get("service"), solde)
+        return {"resultat": RESULTAT_OK, "id": employe_id, "matricule": employe["matricule"]}
+
+    return _traiter(_lire_jsonl(args.fichier), importer, args.taille_lot, sortie)
+
+
+def _commande_importer_historique(args, sortie):
+    from services.import_historique import importer_historique, TAILLE_BLOC_DEFAUT
+
+    def progression(rapport):
+        # Rejets sur stdout (un par ligne), avancement sur stderr
+        for rejet in rapport["rejets"]:
+            _ecrire(sortie, rejet)
+        sortie.flush()
+        print(json.dumps({key: valeur for key, valeur in rapport.items() if key != "rejets"},
+                         ensure_ascii=False))
+
+    resume = importer_historique(args.fichier, args.taille_bloc or TAILLE_BLOC_DEFAUT,
+                                 args.workers, progression)
+    print(json.dumps({"resume": resume}, ensure_ascii=False))
+    return SORTIE_OK if resume["rejetees"] == 0 else SORTIE_ECHECS
+
+
+def _commande_soumettre(args, sortie):
+    from services.dao import EmployeDAO
+    from services.gestion_conges import GestionConges
+    from services.resultats import RESULTAT_INTROUVABLE
+
+    gc = GestionConges()
+    ids_par_matricule = {}
+
+    def soumettre(demande):
+        employe_id = demande.get("employe_id")
+        if employe_id is None:
+            matricule = demande["matricule"]
+            if matricule not in ids_par_matricule:
+                employe = EmployeDAO.trouver_par_matricule(matricule)
+                ids_par_matricule[matricule] = employe.id if employe else None
+            employe_id = ids_par_matricule[matricule]
+            if employe_id is None:
+                return {"resultat": RESULTAT_INTROUVABLE, "message": f"Matricule inconnu: {matricule}"}
+
+        kwargs = {"motif": demande["motif"]} if demande.get("motif") else {}
+        resultat, message, demande_id = gc.tenter_ajout_demande(
+            employe_id, demande["date_debut"], demande["date_fin"], demande["type_conge"],
+            demande.get("commentaire", ""), demande.get("cle_idempotence"), **kwargs
+        )
+        return {"resultat": resultat, "message": message, "id": demande_id}
+
+    return _traiter(_lire_jsonl(args.fichier), soumettre, args.taille_lot, sortie)
+
+
+def _ids_demandes(args):
+    if args.ids:
+        return iter(args.ids)
+    return (_id_demande(element) for element in _lire_jsonl(args.fichier))
+
+
+def _id_demande(element):
+    if isinstance(element, _LigneIllisible):
+        return element
+    if "id" not in element:
+        return _LigneIllisible("Champ id manquant")
+    return element["id"]
+
+
+def _utilisateur_agissant(args):
+    """Compte désigné par --utilisateur, None sans l'option (message affiché si le login est inconnu)"""
+    from services.dao import UtilisateurDAO
+
+    if not args.utilisateur:
+        return None
+    utilisateur = UtilisateurDAO.trouver_par_login(args.utilisateur)
+    if utilisateur is None:
+        print(f"Utilisateur inconnu: {args.utilisateur}")
+    return utilisateur
+
+
+def _commande_valider(args, sortie):
+    from services.gestion_conges import GestionConges
+
+    gc = GestionConges()
+    utilisateur = _utilisateur_agissant(args)
+    if args.utilisateur and utilisateur is None:
+        return SORTIE_ECHECS
+
+    def valider(demande_id):
+        resultat, message = gc.tenter_validation(demande_id, utilisateur)
+        return {"resultat": resultat, "message": message, "id": demande_id}
+
+    return _traiter(_ids_demandes(args), valider, args.taille_lot, sortie)
+
+
+def _commande_refuser(args, sortie):
+    from services.gestion_conges import GestionConges
+
+    gc = GestionConges()
+    utilisateur = _utilisateur_agissant(args)
+    if args.utilisateur and utilisateur is None:
+        return SORTIE_ECHECS
+
+    def refuser(demande_id):
+        resultat, message = gc.tenter_refus(demande_id, utilisateur)
+        return {"resultat": resultat, "message": message, "id": demande_id}
+
+    return _traiter(_ids_demandes(args), refuser, args.taille_lot, sortie)
+
+
+def _commande_compter(args, sortie):
+    from services.gestion_conges import GestionConges
+
+    gc = GestionConges()
+    if args.par == "statut":
+        # Table des compteurs: une ligne lue par statut, quel que soit le volume
+        comptes = gc.compter_demandes_par_statut()
+    else:
+        comptes = gc.compter_demandes(args.par, args.statut)
+    for valeur, nombre in comptes.items():
+        _ecrire(sortie, {args.par: valeur, "nombre": nombre})
+    return SORTIE_OK
+
+
+def _commande_top_absences(args, sortie):
+    from services.gestion_conges import GestionConges
+
+    for ligne in GestionConges().top_absences(args.limite, args.depuis, args.jusqu_a):
+        _ecrire(sortie, ligne)
+    return SORTIE_OK
+
+
+def _commande_reorganiser(args, sortie):
+    from services.gestion_conges import GestionConges
+
+    gc = GestionConges()
+
+    def rattacher(mouvement):
+        resultat, message = gc.tenter_rattachement(mouvement["employe_id"], mouvement.get("manager_id"))
+        return {"resultat": resultat, "message": message, "employe_id": mouvement["employe_id"]}
+
+    return _traiter(_lire_jsonl(args.fichier), rattacher, args.taille_lot, sortie)
+
+
+def _lignes_demandes(args):
+    from services.dao import DemandeDAO
+
+    if getattr(args, "responsable", None) is not None:
+        return DemandeDAO.lister_sous_arbre(args.responsable, args.statut)
+    if getattr(args, "employe", None) is not None:
+        rows = DemandeDAO.lister_par_employe(args.employe, getattr(args, "historique", False))
+        if args.statut:
+            rows = [row for row in rows if row['statut'] == args.statut]
+        return rows
+    if args.statut:
+        return DemandeDAO.lister_par_statut(args.statut)
+    return DemandeDAO.lister_toutes()
+
+
+def _commande_lister(args, sortie):
+    for row in _lignes_demandes(args):
+        _ecrire(sortie, dict(row))
+    return SORTIE_OK
+
+
+def _commande_exporter(args, sortie):
+    rows = _lignes_demandes(args)
+
+    if args.format == "jsonl":
+        for row in rows:
+            _ecrire(sortie, dict(row))
+        return SORTIE_OK
+
+    if rows:
+        writer = csv.writer(sortie)
+        writer.writerow(rows[0].keys())
+        for row in rows:
+            writer.writerow(tuple(row))
+    return SORTIE_OK
+
+
+def _commande_archiver(args, sortie):
+    from services.archivage import archiver_demandes, HORIZON_JOURS_DEFAUT
+
+    horizon = args.horizon_jours if args.horizon_jours is not None else HORIZON_JOURS_DEFAUT
+    _ecrire(sortie, archiver_demandes(horizon, args.taille_lot))
+    return SORTIE_OK
+
+
+def _commande_calendrier(args, sortie):
+    from services.calendrier import CalendrierAbsences
+
+    etag, modification, lignes = CalendrierAbsences(nom=args.nom).exporter(
+        employe_id=args.employe, service=args.service, etag=args.etag)
+    # stdout reste le fichier .ics: l'ETag part sur stderr
+    print(f"ETag: {etag}")
+    print(f"Last-Modified: {modification.isoformat()}")
+    if lignes is None:
+        print("Flux inchangé")
+        return SORTIE_OK
+    sortie.writelines(lignes)
+    return SORTIE_OK
+
+
+def _commande_modifications(args, sortie):
+    from services.synchronisation import modifications_depuis
+
+    page = modifications_depuis(args.depuis, args.limite)
+    for modification in page["modifications"]:
+        _ecrire(sortie, modification)
+    # Dernière ligne: curseur à repasser avec --depuis
+    _ecrire(sortie, {"curseur": page["curseur"], "suite": page["suite"]})
+    return SORTIE_OK
+
+
+def _commande_maintenance(args, sortie):
+    from services import maintenance
+
+    taches = []
+    if args.sauvegarde:
+        if args.tous_locataires:
+            taches.append(lambda locataire_id: maintenance.sauvegarder(
+                Path(args.sauvegarde) / f"{locataire_id}.db"))
+        else:
+            taches.append(lambda locataire_id: maintenance.sauvegarder(args.sauvegarde))
+    if args.activer_vacuum_incremental:
+        taches.append(lambda locataire_id: maintenance.activer_vacuum_incremental())
+    if args.vacuum:
+        taches.append(lambda locataire_id: maintenance.vacuum_incremental())
+    if args.optimiser or args.analyser:
+        taches.append(lambda locataire_id: maintenance.optimiser(complet=args.analyser))
+    if not taches:
+        print("Aucune tâche demandée (--sauvegarde, --activer-vacuum-incremental, --vacuum, "
+              "--optimiser, --analyser)")
+        return SORTIE_ECHECS
+
+    if not args.tous_locataires:
+        for tache in taches:
+            _ecrire(sortie, tache(args.locataire))
+        return SORTIE_OK
+
+    # Toutes les tâches d'un locataire à la suite, les locataires en parallèle
+    rapports = maintenance.executer_pour_locataires(lambda locataire_id: [tache(locataire_id) for tache in taches])
+    code = SORTIE_OK
+    for locataire_id, resultat in rapports.items():
+        if isinstance(resultat, dict):
+            _ecrire(sortie, {"locataire": locataire_id, **resultat})
+            code = SORTIE_ECHECS
+            continue
+        for rapport in resultat:
+            _ecrire(sortie, {"locataire": locataire_id, **rapport})
+    return code
+
+
+def _commande_recalculer_durees(args, sortie):
+    from services.durees import recalculer_durees, TAILLE_LOT_DEFAUT
+
+    resume = recalculer_durees(args.taille_lot or TAILLE_LOT_DEFAUT, args.toutes)
+    _ecrire(sortie, resume)
+    return SORTIE_OK if resume["ignorees"] == 0 else SORTIE_ECHECS
+
+
+def _commande_instantane(args, sortie):
+    from services.instantane import exporter_instantane
+
+    meta = exporter_instantane(args.repertoire)
+    _ecrire(sortie, {key: valeur for key, valeur in meta.items() if key != "dictionnaires"})
+    return SORTIE_OK
+
+
+def _commande_prevoir(args, sortie):
+    from services.previsions import Previsionniste
+
+    prevision = Previsionniste().prevoir()
+    for ligne in prevision.charge_mensuelle():
+        _ecrire(sortie, ligne)
+    if args.soldes:
+        for employe_id in prevision.employe_ids.tolist():
+            _ecrire(sortie, {"employe_id": employe_id, "soldes": prevision.soldes_projetes(employe_id)})
+    return SORTIE_OK
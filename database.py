@@ -1,15 +1,489 @@
+import atexit
+import contextvars
+import functools
+import hashlib
+import inspect
+import queue
+import re
 import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+DB_PATH = "conges.db"
+
+# Nombre maximal de connexions en lecture seule ouvertes par base
+TAILLE_POOL_LECTURE = 8
+
+# Mode multi-société: une base par locataire, REPERTOIRE_LOCATAIRES/<id>.db
+REPERTOIRE_LOCATAIRES = "locataires"
+
+# Bases gardées ouvertes au plus (pools fermés du moins récemment utilisé)
+MAX_BASES_OUVERTES = 16
+
+_contexte = threading.local()
+_locataire = contextvars.ContextVar("locataire", default=None)
+_pools = OrderedDict()
+_verrou_pools = threading.Lock()
+_bases_a_jour = set()
+_rappels_fermeture = []
+
+_FORMAT_LOCATAIRE = re.compile(r"^[A-Za-z0-9_-]+$")
+
 
 def get_connection():
-    conn = sqlite3.connect("conges.db")
+    """
+    Connexion d'écriture: une seule connexion par base, prêtée à un thread à
+    la fois (les écritures sont sérialisées dans le processus au lieu de se
+    disputer le verrou SQLite). close() la rend au pool.
+    """
+    # Mode lot: toutes les opérations du thread partagent une connexion
+    partagee = getattr(_contexte, "connexion", None)
+    if partagee is not None:
+        return partagee
+
+    return _emprunter(0)
+
+
+def get_read_connection():
+    """
+    Connexion en lecture seule (mode=ro) issue d'un pool séparé
+    En mode WAL, chaque lecture travaille sur un instantané cohérent et ne
+    bloque jamais l'écrivain: listes, rapports et exports passent par ici.
+    """
+    partagee = getattr(_contexte, "connexion", None)
+    if partagee is not None:
+        return partagee
+
+    return _emprunter(1)
+
+
+def fermer_connexions():
+    """Ferme toutes les connexions des pools (fin de programme, changement de base)"""
+    with _verrou_pools:
+        pools = list(_pools.values())
+        _pools.clear()
+    for ecriture, lecture in pools:
+        # L'écrivain en dernier: c'est lui qui peut vider et supprimer le fichier WAL
+        lecture.fermer()
+        ecriture.fermer()
+    _signaler_fermeture([ecriture.chemin for ecriture, _ in pools])
+
+
+atexit.register(fermer_connexions)
+
+
+def a_la_fermeture(rappel):
+    """
+    Enregistre rappel(chemin), appelé quand les pools d'une base sont fermés
+    (base inactive évincée, fin de programme): les services qui gardent une
+    connexion dédiée ou un thread par base s'arrêtent avec elle
+    """
+    _rappels_fermeture.append(rappel)
+
+
+def _signaler_fermeture(chemins):
+    for chemin in chemins:
+        for rappel in list(_rappels_fermeture):
+            try:
+                rappel(chemin)
+            except Exception as e:
+                print(f"⚠️  Fermeture de {chemin}: {e}")
+
+
+def ouvrir_connexion_dediee():
+    """
+    Connexion en lecture seule hors pool, gardée par son propriétaire
+    (PRAGMA data_version n'a de sens que sur une même connexion)
+    """
+    return _ouvrir(chemin_base(), lecture_seule=True)
+
+
+# ----------------------------------------------------------------------
+# Locataires (une base par société)
+# ----------------------------------------------------------------------
+def chemin_base(locataire_id=None):
+    """Fichier de la base du locataire donné, ou du locataire courant (DB_PATH sans locataire)"""
+    locataire_id = locataire_id or _locataire.get()
+    if locataire_id is None:
+        return DB_PATH
+    if not _FORMAT_LOCATAIRE.match(locataire_id):
+        raise ValueError(f"Identifiant de locataire invalide: {locataire_id!r}")
+    return str(Path(REPERTOIRE_LOCATAIRES) / f"{locataire_id}.db")
+
+
+def locataire_courant():
+    return _locataire.get()
+
+
+@contextmanager
+def locataire(locataire_id):
+    """
+    Oriente toutes les connexions du contexte (DAO, services) vers la base
+    du locataire; le schéma est créé ou mis à jour au premier accès.
+    Le locataire suit le contexte d'exécution (contextvars): un thread lancé
+    dans le bloc ne l'hérite pas, il doit ouvrir son propre bloc.
+    """
+    if locataire_id is None:
+        yield
+        return
+
+    chemin = chemin_base(locataire_id)
+    jeton = _locataire.set(locataire_id)
+    try:
+        if chemin not in _bases_a_jour:
+            Path(chemin).parent.mkdir(parents=True, exist_ok=True)
+            init_db()
+            _bases_a_jour.add(chemin)
+        yield
+    finally:
+        _locataire.reset(jeton)
+
+
+def lister_locataires():
+    """Identifiants des locataires ayant une base dans REPERTOIRE_LOCATAIRES"""
+    repertoire = Path(REPERTOIRE_LOCATAIRES)
+    if not repertoire.is_dir():
+        return []
+    return sorted(f.stem for f in repertoire.glob("*.db") if _FORMAT_LOCATAIRE.match(f.stem))
+
+
+def portee_locataire(classe):
+    """
+    Décorateur de classe de service: chaque méthode publique s'exécute dans
+    le locataire de l'instance (attribut locataire, None = contexte courant)
+    """
+    for nom, methode in list(vars(classe).items()):
+        if nom.startswith("_") or not callable(methode):
+            continue
+        setattr(classe, nom, _dans_locataire(methode))
+    return classe
+
+
+def _dans_locataire(methode):
+    if inspect.isgeneratorfunction(methode):
+        # Un générateur s'exécute pendant l'itération, dans le contexte de
+        # l'appelant: le locataire n'est actif que le temps de chaque étape,
+        # et rendu avant chaque élément transmis à l'appelant
+        @functools.wraps(methode)
+        def enveloppe_generateur(self, *args, **kwargs):
+            if self.locataire is None:
+                yield from methode(self, *args, **kwargs)
+                return
+            generateur = methode(self, *args, **kwargs)
+            try:
+                while True:
+                    with locataire(self.locataire):
+                        try:
+                            element = next(generateur)
+                        except StopIteration:
+                            return
+                    yield element
+            finally:
+                with locataire(self.locataire):
+                    generateur.close()
+        return enveloppe_generateur
+
+    @functools.wraps(methode)
+    def enveloppe(self, *args, **kwargs):
+        if self.locataire is None or self.locataire == _locataire.get():
+            return methode(self, *args, **kwargs)
+        with locataire(self.locataire):
+            return methode(self, *args, **kwargs)
+    return enveloppe
+
+
+def _emprunter(indice):
+    """
+    Connexion du pool d'écriture (0) ou de lecture (1) de la base courante
+    Le pool est réservé jusqu'au close() de la connexion: l'éviction des
+    bases inactives ne peut pas le fermer entre-temps
+    """
+    pool = _reserver_pool(indice)
+    try:
+        return pool.emprunter()
+    except Exception:
+        _liberer_pool(pool)
+        raise
+
+
+def _reserver_pool(indice):
+    chemin = chemin_base()
+    with _verrou_pools:
+        pools = _pools.get(chemin)
+        if pools is None:
+            pools = (_PoolEcriture(chemin), _PoolLecture(chemin, TAILLE_POOL_LECTURE))
+            _pools[chemin] = pools
+        else:
+            _pools.move_to_end(chemin)
+        pool = pools[indice]
+        pool.references += 1
+        evinces = _evincer_bases_inactives()
+
+    for ecriture, lecture in evinces:
+        lecture.fermer()
+        ecriture.fermer()
+    _signaler_fermeture([ecriture.chemin for ecriture, _ in evinces])
+    return pool
+
+
+def _liberer_pool(pool):
+    with _verrou_pools:
+        pool.references -= 1
+
+
+def _evincer_bases_inactives():
+    """
+    Au-delà de MAX_BASES_OUVERTES, retire les pools les moins récemment
+    utilisés dont aucune connexion n'est prêtée ni en cours d'emprunt
+    (appelé sous _verrou_pools; l'appelant ferme les pools retournés)
+    """
+    evinces = []
+    for chemin in list(_pools):
+        if len(_pools) <= MAX_BASES_OUVERTES:
+            break
+        ecriture, lecture = _pools[chemin]
+        if ecriture.references == 0 and lecture.references == 0:
+            evinces.append(_pools.pop(chemin))
+    return evinces
+
+
+def _ouvrir(chemin, lecture_seule=False):
+    if lecture_seule:
+        conn = sqlite3.connect(Path(chemin).absolute().as_uri() + "?mode=ro", uri=True,
+                               check_same_thread=False)
+    else:
+        conn = sqlite3.connect(chemin, check_same_thread=False)
     conn.row_factory = sqlite3.Row
     return conn
 
 
+class _ConnexionEmpruntee:
+    """
+    Connexion prêtée par un pool
+    close() ferme les curseurs ouverts (fin de l'instantané de lecture),
+    annule une transaction non validée puis rend la connexion au pool.
+    """
+
+    def __init__(self, conn, pool):
+        self._conn = conn
+        self._pool = pool
+        self._curseurs = []
+
+    def cursor(self):
+        cur = self._conn.cursor()
+        self._curseurs.append(cur)
+        return cur
+
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+    def close(self):
+        if self._pool is None:
+            return
+        for cur in self._curseurs:
+            cur.close()
+        self._curseurs = []
+        pool, self._pool = self._pool, None
+        try:
+            pool.rendre(self._conn)
+        finally:
+            _liberer_pool(pool)
+
+    def __getattr__(self, nom):
+        return getattr(self._conn, nom)
+
+
+class _PoolEcriture:
+    """Une connexion d'écriture unique, réentrante pour le thread qui la détient"""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        # Emprunts en cours ou à venir (compté sous _verrou_pools)
+        self.references = 0
+        self._verrou = threading.RLock()
+        self._conn = None
+        self._profondeur = 0
+
+    def emprunter(self):
+        self._verrou.acquire()
+        try:
+            if self._conn is None:
+                self._conn = _ouvrir(self.chemin)
+        except Exception:
+            self._verrou.release()
+            raise
+        self._profondeur += 1
+        return _ConnexionEmpruntee(self._conn, self)
+
+    def rendre(self, conn):
+        self._profondeur -= 1
+        if self._profondeur == 0 and conn.in_transaction:
+            conn.rollback()
+        self._verrou.release()
+
+    def fermer(self):
+        with self._verrou:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class _PoolLecture:
+    """Pool borné de connexions en lecture seule"""
+
+    def __init__(self, chemin, taille):
+        self.chemin = chemin
+        self.references = 0
+        self._libres = queue.LifoQueue()
+        self._places = threading.BoundedSemaphore(taille)
+        self._ouvertes = []
+
+    def emprunter(self):
+        self._places.acquire()
+        try:
+            try:
+                conn = self._libres.get_nowait()
+            except queue.Empty:
+                conn = _ouvrir(self.chemin, lecture_seule=True)
+                self._ouvertes.append(conn)
+        except Exception:
+            self._places.release()
+            raise
+        return _ConnexionEmpruntee(conn, self)
+
+    def rendre(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._libres.put(conn)
+        self._places.release()
+
+    def fermer(self):
+        for conn in self._ouvertes:
+            conn.close()
+        self._ouvertes = []
+        self._libres = queue.LifoQueue()
+
+
+class _ConnexionPartagee:
+    """
+    Connexion prêtée aux DAO pendant un traitement par lot
+    commit() et close() sont sans effet: la transaction appartient au lot.
+    rollback() n'annule que l'opération en cours (point de sauvegarde).
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def rollback(self):
+        self._conn.execute("ROLLBACK TO operation")
+
+    def __getattr__(self, nom):
+        return getattr(self._conn, nom)
+
+
+@contextmanager
+def connexion_partagee():
+    """
+    Ouvre une connexion unique utilisée par tous les DAO du thread courant
+    Utiliser avec lot() et operation() pour découper les transactions.
+    """
+    conn = sqlite3.connect(chemin_base())
+    conn.row_factory = sqlite3.Row
+    _contexte.connexion = _ConnexionPartagee(conn)
+    try:
+        yield conn
+    finally:
+        _contexte.connexion = None
+        conn.close()
+
+
+@contextmanager
+def ecrivain_partage():
+    """
+    Comme connexion_partagee, mais avec la connexion d'écriture du pool de la
+    base courante: les autres threads du processus attendent la fin du
+    traitement au lieu de se disputer le verrou SQLite.
+    Utiliser avec lot() et operation() pour découper les transactions.
+    """
+    conn = _emprunter(0)
+    _contexte.connexion = _ConnexionPartagee(conn)
+    try:
+        yield conn
+    finally:
+        _contexte.connexion = None
+        conn.close()
+
+
+@contextmanager
+def lot(conn):
+    """Une transaction par lot: commit à la fin, rollback en cas d'exception"""
+    conn.execute("BEGIN")
+    try:
+        yield
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+@contextmanager
+def operation(conn):
+    """
+    Point de sauvegarde autour d'une opération d'un lot
+    En cas d'échec, seule cette opération est annulée (le lot continue)
+    """
+    conn.execute("SAVEPOINT operation")
+    try:
+        yield
+    except Exception:
+        conn.execute("ROLLBACK TO operation")
+        conn.execute("RELEASE operation")
+        raise
+    conn.execute("RELEASE operation")
+
+
 def init_db():
+    """
+    Crée ou met à jour le schéma de la base
+    Le schéma est versionné avec PRAGMA user_version: quand la base est à jour
+    (cas de tous les démarrages sauf le premier), le coût se limite à une
+    seule lecture de cet entier, sans aucun DDL ni commit.
+    """
     conn = get_connection()
-    cur = conn.cursor()
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        if version == 0:
+            # Base neuve: les pages libérées (suppressions, archivage) seront
+            # récupérables par PRAGMA incremental_vacuum. Sans effet si des
+            # tables existent déjà (voir maintenance.activer_vacuum_incremental)
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+        cur = conn.cursor()
+        for migration in MIGRATIONS[version:]:
+            migration(cur)
+        cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    finally:
+        conn.close()
+
 
+# ----------------------------------------------------------------------
+# Migrations (une fonction par version du schéma, dans l'ordre)
+# Chaque migration reste idempotente: les bases créées avant le
+# versionnement (user_version = 0) rejouent toutes les étapes sans erreur.
+# ----------------------------------------------------------------------
+def _migration_tables_initiales(cur):
     cur.execute("""
     CREATE TABLE IF NOT EXISTS employes (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -43,8 +517,628 @@ def init_db():
     )
     """)
 
-    conn.commit()
-    conn.close()
+
+def _migration_version_demandes(cur):
+    # Verrouillage optimiste des demandes
+    _ajouter_colonne_si_absente(cur, "demandes_conge", "version", "INTEGER NOT NULL DEFAULT 0")
+
+
+def _migration_motif_demandes(cur):
+    # Motif des congés exceptionnels
+    _ajouter_colonne_si_absente(cur, "demandes_conge", "motif", "TEXT")
+
+
+def _migration_recherche_employes(cur):
+    # Index plein texte des employés (recherche par nom, prénom, service, matricule)
+    cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'employes_fts'")
+    index_existant = cur.fetchone() is not None
+
+    cur.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS employes_fts USING fts5(
+        matricule, nom, prenom, service,
+        content='employes', content_rowid='id',
+        tokenize="unicode61 remove_diacritics 2"
+    )
+    """)
+
+    # Synchronisation de l'index par triggers (le solde n'est pas indexé)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS employes_fts_ai AFTER INSERT ON employes BEGIN
+        INSERT INTO employes_fts(rowid, matricule, nom, prenom, service)
+        VALUES (new.id, new.matricule, new.nom, new.prenom, new.service);
+    END
+    """)
+
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS employes_fts_ad AFTER DELETE ON employes BEGIN
+        INSERT INTO employes_fts(employes_fts, rowid, matricule, nom, prenom, service)
+        VALUES ('delete', old.id, old.matricule, old.nom, old.prenom, old.service);
+    END
+    """)
+
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS employes_fts_au AFTER UPDATE OF matricule, nom, prenom, service ON employes BEGIN
+        INSERT INTO employes_fts(employes_fts, rowid, matricule, nom, prenom, service)
+        VALUES ('delete', old.id, old.matricule, old.nom, old.prenom, old.service);
+        INSERT INTO employes_fts(rowid, matricule, nom, prenom, service)
+        VALUES (new.id, new.matricule, new.nom, new.prenom, new.service);
+    END
+    """)
+
+    if not index_existant:
+        # Base existante: indexer les employés déjà présents
+        cur.execute("INSERT INTO employes_fts(employes_fts) VALUES ('rebuild')")
+
+
+def _migration_index_statut_demandes(cur):
+    # Parcours paginé des demandes par statut (ORDER BY date_debut, id)
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_demandes_statut_date
+    ON demandes_conge (statut, date_debut, id)
+    """)
+
+
+def _migration_limites_service(cur):
+    # Nombre maximal d'absents simultanés par service
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS limites_absences_service (
+        service TEXT PRIMARY KEY,
+        max_absents INTEGER NOT NULL
+    )
+    """)
+
+    # Recherche des absences qui chevauchent une période (date_fin >= début)
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_demandes_statut_fin
+    ON demandes_conge (statut, date_fin)
+    """)
+
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_employes_service ON employes (service)")
+
+
+def _migration_journal_wal(cur):
+    # Lectures concurrentes sur instantané pendant les écritures
+    # (le mode de journal ne peut pas changer au milieu d'une transaction)
+    cur.connection.commit()
+    cur.execute("PRAGMA journal_mode = WAL")
+
+
+def _migration_compteur_modifications(cur):
+    # Compteur global de modifications (demandes et employés), maintenu par
+    # triggers; chaque demande garde le numéro de sa dernière modification
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS compteur_modifications (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        valeur INTEGER NOT NULL
+    )
+    """)
+    cur.execute("INSERT OR IGNORE INTO compteur_modifications (id, valeur) VALUES (1, 0)")
+
+    _ajouter_colonne_si_absente(cur, "demandes_conge", "seq_modif", "INTEGER NOT NULL DEFAULT 0")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_demandes_seq_modif ON demandes_conge (seq_modif)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_demandes_employe ON demandes_conge (employe_id)")
+
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS demandes_seq_ai AFTER INSERT ON demandes_conge BEGIN
+        UPDATE compteur_modifications SET valeur = valeur + 1 WHERE id = 1;
+        UPDATE demandes_conge SET seq_modif = (SELECT valeur FROM compteur_modifications WHERE id = 1)
+        WHERE id = new.id;
+    END
+    """)
+
+    # seq_modif n'est pas dans la liste: le trigger ne se redéclenche pas lui-même
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS demandes_seq_au
+    AFTER UPDATE OF employe_id, date_debut, date_fin, type_conge, statut, commentaire, version, motif
+    ON demandes_conge BEGIN
+        UPDATE compteur_modifications SET valeur = valeur + 1 WHERE id = 1;
+        UPDATE demandes_conge SET seq_modif = (SELECT valeur FROM compteur_modifications WHERE id = 1)
+        WHERE id = new.id;
+    END
+    """)
+
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS demandes_seq_ad AFTER DELETE ON demandes_conge BEGIN
+        UPDATE compteur_modifications SET valeur = valeur + 1 WHERE id = 1;
+    END
+    """)
+
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS employes_seq_ai AFTER INSERT ON employes BEGIN
+        UPDATE compteur_modifications SET valeur = valeur + 1 WHERE id = 1;
+    END
+    """)
+
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS employes_seq_ad AFTER DELETE ON employes BEGIN
+        UPDATE compteur_modifications SET valeur = valeur + 1 WHERE id = 1;
+    END
+    """)
+
+    # Les demandes en attente affichent nom, solde...: elles sont marquées modifiées
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS employes_seq_au AFTER UPDATE ON employes BEGIN
+        UPDATE compteur_modifications SET valeur = valeur + 1 WHERE id = 1;
+        UPDATE demandes_conge SET seq_modif = (SELECT valeur FROM compteur_modifications WHERE id = 1)
+        WHERE employe_id = new.id AND statut = 'En attente';
+    END
+    """)
+
+
+def _migration_archive_demandes(cur):
+    # Demandes traitées anciennes, sorties de la table courante
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS demandes_conge_archive (
+        id INTEGER PRIMARY KEY,
+        employe_id INTEGER NOT NULL,
+        date_debut TEXT NOT NULL,
+        date_fin TEXT NOT NULL,
+        type_conge TEXT NOT NULL,
+        statut TEXT NOT NULL,
+        commentaire TEXT,
+        version INTEGER NOT NULL DEFAULT 0,
+        motif TEXT,
+        date_archivage TEXT NOT NULL,
+        FOREIGN KEY (employe_id) REFERENCES employes(id)
+    )
+    """)
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_archive_employe
+    ON demandes_conge_archive (employe_id, date_debut)
+    """)
+
+
+def _migration_vacuum_incremental(cur):
+    # Version gardée pour la numérotation de user_version. Le mode
+    # auto_vacuum = INCREMENTAL est posé par init_db sur une base neuve; une
+    # base existante le reçoit par la commande de maintenance
+    # --activer-vacuum-incremental (VACUUM complet: jamais au démarrage)
+    pass
+
+
+def _migration_reprises_import(cur):
+    # Point de reprise des imports historiques: lignes du fichier source déjà
+    # enregistrées (indépendant de la taille des blocs d'une exécution à l'autre)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS reprises_import (
+        source TEXT PRIMARY KEY,
+        lignes_traitees INTEGER NOT NULL,
+        importees INTEGER NOT NULL DEFAULT 0,
+        rejetees INTEGER NOT NULL DEFAULT 0,
+        date_maj TEXT NOT NULL
+    )
+    """)
+
+
+def _migration_lien_utilisateurs_employes(cur):
+    # Compte utilisateur -> fiche employé (profil chargé avec le compte à la connexion)
+    _ajouter_colonne_si_absente(cur, "utilisateurs", "employe_id", "INTEGER REFERENCES employes(id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_utilisateurs_employe ON utilisateurs (employe_id)")
+
+    # Comptes employés existants: login = matricule, ou login = prenom.nom sans
+    # homonyme. Jamais les comptes RH: le lien fixe leur périmètre de validation
+    cur.execute("""
+    UPDATE utilisateurs
+    SET employe_id = COALESCE(
+        (SELECT e.id FROM employes e WHERE e.matricule = utilisateurs.login),
+        (SELECT MIN(e.id) FROM employes e
+         WHERE lower(e.prenom || '.' || e.nom) = lower(utilisateurs.login)
+         GROUP BY lower(e.prenom || '.' || e.nom) HAVING COUNT(*) = 1))
+    WHERE employe_id IS NULL AND role <> 'RH'
+    """)
+
+
+def _migration_idempotence_demandes(cur):
+    # Soumissions rejouées: clé d'idempotence fournie par le client, et
+    # empreinte du contenu (employé, dates, type) des demandes non refusées
+    _ajouter_colonne_si_absente(cur, "demandes_conge", "cle_idempotence", "TEXT")
+    _ajouter_colonne_si_absente(cur, "demandes_conge", "empreinte", "TEXT")
+    cur.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_demandes_cle_idempotence
+    ON demandes_conge (cle_idempotence) WHERE cle_idempotence IS NOT NULL
+    """)
+    cur.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_demandes_empreinte
+    ON demandes_conge (empreinte) WHERE statut != 'Refusée'
+    """)
+
+    # Demandes existantes: un doublon déjà présent garde une empreinte vide
+    cur.connection.create_function(
+        "empreinte_demande", 4,
+        lambda *champs: hashlib.sha256("|".join(map(str, champs)).encode()).hexdigest(),
+        deterministic=True
+    )
+    cur.execute("""
+    UPDATE OR IGNORE demandes_conge
+    SET empreinte = empreinte_demande(employe_id, date_debut, date_fin, lower(type_conge))
+    WHERE empreinte IS NULL
+    """)
+
+
+def _migration_calendrier_absences(cur):
+    # Le flux iCalendar affiche nom et service: un changement d'identité marque
+    # aussi les demandes validées comme modifiées (régénération incrémentale)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS employes_identite_seq_au
+    AFTER UPDATE OF nom, prenom, service ON employes
+    WHEN old.nom IS NOT new.nom OR old.prenom IS NOT new.prenom OR old.service IS NOT new.service
+    BEGIN
+        UPDATE compteur_modifications SET valeur = valeur + 1 WHERE id = 1;
+        UPDATE demandes_conge SET seq_modif = (SELECT valeur FROM compteur_modifications WHERE id = 1)
+        WHERE employe_id = new.id AND statut = 'Validée';
+    END
+    """)
+
+
+def _migration_journal_modifications(cur):
+    # Flux de modifications pour la synchronisation des clients: une ligne par
+    # employé ou demande, renumérotée (seq croissant) à chaque écriture, gardée
+    # après une suppression (operation 'D', 'A' pour un archivage depuis
+    # _migration_journal_archivage). Un client relit seq > son curseur.
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS journal_modifications (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_nom TEXT NOT NULL,
+        ligne_id INTEGER NOT NULL,
+        operation TEXT NOT NULL CHECK (operation IN ('I', 'U', 'D'))
+    )
+    """)
+    cur.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_journal_ligne
+    ON journal_modifications (table_nom, ligne_id)
+    """)
+
+    # seq_modif n'est pas suivi: le renuméroter ne change pas la demande
+    colonnes_suivies = {
+        "demandes_conge": "OF employe_id, date_debut, date_fin, type_conge, statut, commentaire, "
+                          "version, motif, cle_idempotence",
+        "employes": "",
+    }
+    for table, colonnes in colonnes_suivies.items():
+        for evenement, suffixe, operation, ligne in (("INSERT", "ai", "I", "new"),
+                                                     (f"UPDATE {colonnes}", "au", "U", "new"),
+                                                     ("DELETE", "ad", "D", "old")):
+            # DELETE puis INSERT (et non INSERT OR REPLACE): la clause OR de
+            # l'instruction déclenchante remplacerait celle du trigger
+            cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_journal_{suffixe} AFTER {evenement} ON {table} BEGIN
+                DELETE FROM journal_modifications WHERE table_nom = '{table}' AND ligne_id = {ligne}.id;
+                INSERT INTO journal_modifications (table_nom, ligne_id, operation)
+                VALUES ('{table}', {ligne}.id, '{operation}');
+            END
+            """)
+
+    # Lignes existantes: un client qui part du curseur 0 reçoit tout
+    cur.execute("""
+    INSERT INTO journal_modifications (table_nom, ligne_id, operation)
+    SELECT 'employes', id, 'I' FROM employes
+    WHERE id NOT IN (SELECT ligne_id FROM journal_modifications WHERE table_nom = 'employes')
+    """)
+    cur.execute("""
+    INSERT INTO journal_modifications (table_nom, ligne_id, operation)
+    SELECT 'demandes_conge', id, 'I' FROM demandes_conge
+    WHERE id NOT IN (SELECT ligne_id FROM journal_modifications WHERE table_nom = 'demandes_conge')
+    """)
+
+
+def _migration_hierarchie_employes(cur):
+    # Hiérarchie des managers: manager_id sur l'employé, et table de fermeture
+    # (une ligne par couple ancêtre/descendant, profondeur 0 pour soi-même):
+    # « tous mes subordonnés, à toute profondeur » est une jointure indexée
+    _ajouter_colonne_si_absente(cur, "employes", "manager_id", "INTEGER REFERENCES employes(id)")
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS hierarchie_employes (
+        ancetre_id INTEGER NOT NULL,
+        descendant_id INTEGER NOT NULL,
+        profondeur INTEGER NOT NULL,
+        PRIMARY KEY (ancetre_id, descendant_id)
+    ) WITHOUT ROWID
+    """)
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_hierarchie_descendant
+    ON hierarchie_employes (descendant_id, ancetre_id)
+    """)
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_demandes_employe_statut
+    ON demandes_conge (employe_id, statut)
+    """)
+
+    # Un nouvel employé hérite des ancêtres de son manager; les déplacements
+    # de sous-arbres passent par EmployeDAO.deplacer
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS employes_hierarchie_ai AFTER INSERT ON employes BEGIN
+        INSERT INTO hierarchie_employes (ancetre_id, descendant_id, profondeur)
+        VALUES (new.id, new.id, 0);
+        INSERT INTO hierarchie_employes (ancetre_id, descendant_id, profondeur)
+        SELECT ancetre_id, new.id, profondeur + 1 FROM hierarchie_employes
+        WHERE descendant_id = new.manager_id;
+    END
+    """)
+
+    # Suppression d'un manager: ses subordonnés remontent sous son propre manager
+    # (les liens vers les ancêtres supérieurs restent, un niveau plus court)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS employes_hierarchie_ad AFTER DELETE ON employes BEGIN
+        UPDATE hierarchie_employes SET profondeur = profondeur - 1
+        WHERE descendant_id IN (SELECT descendant_id FROM hierarchie_employes
+                                WHERE ancetre_id = old.id AND profondeur > 0)
+          AND ancetre_id IN (SELECT ancetre_id FROM hierarchie_employes
+                             WHERE descendant_id = old.id AND profondeur > 0);
+        UPDATE employes SET manager_id = old.manager_id WHERE manager_id = old.id;
+        DELETE FROM hierarchie_employes WHERE ancetre_id = old.id OR descendant_id = old.id;
+    END
+    """)
+
+    # Employés existants: sans manager, chacun est sa propre racine
+    cur.execute("""
+    INSERT OR IGNORE INTO hierarchie_employes (ancetre_id, descendant_id, profondeur)
+    SELECT id, id, 0 FROM employes
+    """)
+
+
+def _migration_durees_demandes(cur):
+    # Durées calculées une fois par les classes de congé (DemandeDAO.creer,
+    # import, services.durees pour les lignes existantes): les rapports font
+    # SUM() en SQL. jours_deductibles: jours retirés du solde à la validation.
+    for table in ("demandes_conge", "demandes_conge_archive"):
+        _ajouter_colonne_si_absente(cur, table, "nb_jours", "INTEGER")
+        _ajouter_colonne_si_absente(cur, table, "jours_deductibles", "INTEGER")
+
+    # Cumuls par statut et période (ex: jours pris cette année) sans lire la table
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_demandes_durees
+    ON demandes_conge (statut, date_debut, employe_id, nb_jours, jours_deductibles)
+    """)
+
+    # Dates ou type modifiés: durées à recalculer (remplacé par un recalcul
+    # dans la transaction, _migration_durees_recalculees)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS demandes_durees_au
+    AFTER UPDATE OF date_debut, date_fin, type_conge ON demandes_conge BEGIN
+        UPDATE demandes_conge SET nb_jours = NULL, jours_deductibles = NULL WHERE id = new.id;
+    END
+    """)
+
+
+def _migration_compteurs_statut(cur):
+    # Nombre de demandes par statut tenu par triggers: un tableau de bord
+    # lit une ligne au lieu de compter la table
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS compteurs_statut (
+        statut TEXT PRIMARY KEY,
+        nombre INTEGER NOT NULL
+    )
+    """)
+
+    # Ligne créée au premier usage d'un statut: INSERT ... WHERE NOT EXISTS ne
+    # lève jamais de conflit (une clause OR de l'instruction déclenchante ne
+    # peut donc pas changer son effet)
+    creer_ligne = """
+        INSERT INTO compteurs_statut (statut, nombre)
+        SELECT {statut}, 0 WHERE NOT EXISTS (SELECT 1 FROM compteurs_statut WHERE statut = {statut});
+    """
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS demandes_compteurs_ai AFTER INSERT ON demandes_conge BEGIN
+        {creer_ligne.format(statut="new.statut")}
+        UPDATE compteurs_statut SET nombre = nombre + 1 WHERE statut = new.statut;
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS demandes_compteurs_ad AFTER DELETE ON demandes_conge BEGIN
+        UPDATE compteurs_statut SET nombre = nombre - 1 WHERE statut = old.statut;
+    END
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS demandes_compteurs_au AFTER UPDATE OF statut ON demandes_conge
+    WHEN old.statut IS NOT new.statut BEGIN
+        UPDATE compteurs_statut SET nombre = nombre - 1 WHERE statut = old.statut;
+        {creer_ligne.format(statut="new.statut")}
+        UPDATE compteurs_statut SET nombre = nombre + 1 WHERE statut = new.statut;
+    END
+    """)
+
+    cur.execute("DELETE FROM compteurs_statut")
+    cur.execute("""
+    INSERT INTO compteurs_statut (statut, nombre)
+    SELECT statut, COUNT(*) FROM demandes_conge GROUP BY statut
+    """)
+
+
+def _sql_durees(ligne):
+    """
+    Expressions SQL (nb_jours, jours_deductibles) d'une ligne de demande
+    (ligne: 'new', nom de table...), générées depuis les classes de congé qui
+    gardent le calcul de Conge: NULL pour un autre type (services.durees)
+    """
+    from models.types_conge import CongeFactory, Conge
+
+    nb_jours = f"CAST(julianday({ligne}.date_fin) - julianday({ligne}.date_debut) AS INTEGER) + 1"
+    cas_nb, cas_deductibles = [], []
+    for nom, classe in CongeFactory.TYPES.items():
+        if (classe.calculer_jours is not Conge.calculer_jours
+                or classe.calculer_jours_deductibles is not Conge.calculer_jours_deductibles):
+            continue
+        deduit = classe(None, None, "", "", None).deduit_du_solde()
+        cas_nb.append(f"WHEN '{nom}' THEN {nb_jours}")
+        cas_deductibles.append(f"WHEN '{nom}' THEN {nb_jours if deduit else 0}")
+    return (f"CASE lower({ligne}.type_conge) {' '.join(cas_nb)} END",
+            f"CASE lower({ligne}.type_conge) {' '.join(cas_deductibles)} END")
+
+
+def _migration_durees_recalculees(cur):
+    # Le flux de modifications suit aussi les durées: un recalcul est
+    # transmis aux copies synchronisées
+    cur.execute("DROP TRIGGER IF EXISTS demandes_conge_journal_au")
+    cur.execute("""
+    CREATE TRIGGER demandes_conge_journal_au
+    AFTER UPDATE OF employe_id, date_debut, date_fin, type_conge, statut, commentaire,
+                    version, motif, cle_idempotence, nb_jours, jours_deductibles ON demandes_conge BEGIN
+        DELETE FROM journal_modifications WHERE table_nom = 'demandes_conge' AND ligne_id = new.id;
+        INSERT INTO journal_modifications (table_nom, ligne_id, operation)
+        VALUES ('demandes_conge', new.id, 'U');
+    END
+    """)
+
+    # Dates ou type modifiés: durées recalculées dans la même transaction
+    # (au lieu d'être vidées jusqu'au prochain recalculer_durees)
+    nb_jours, jours_deductibles = _sql_durees("new")
+    cur.execute("DROP TRIGGER IF EXISTS demandes_durees_au")
+    cur.execute(f"""
+    CREATE TRIGGER demandes_durees_au
+    AFTER UPDATE OF date_debut, date_fin, type_conge ON demandes_conge BEGIN
+        UPDATE demandes_conge SET nb_jours = {nb_jours}, jours_deductibles = {jours_deductibles}
+        WHERE id = new.id;
+    END
+    """)
+
+    # Lignes encore sans durées (bases existantes): même calcul
+    for table in ("demandes_conge", "demandes_conge_archive"):
+        nb_jours, jours_deductibles = _sql_durees(table)
+        cur.execute(f"""
+        UPDATE {table} SET nb_jours = {nb_jours}, jours_deductibles = {jours_deductibles}
+        WHERE nb_jours IS NULL
+        """)
+
+
+def _migration_dates_iso(cur):
+    # Dates saisies sans zéros (ex: 2026-6-1, acceptées par strptime) réécrites
+    # en AAAA-MM-JJ: les recherches par période comparent les dates comme du
+    # texte. Sur la table courante, les triggers recalculent les durées et
+    # journalisent la correction pour les copies synchronisées.
+    from utils.validators import lire_date
+
+    iso = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+    for table in ("demandes_conge", "demandes_conge_archive"):
+        cur.execute(f"""
+        SELECT id, employe_id, date_debut, date_fin, type_conge FROM {table}
+        WHERE date_debut NOT GLOB '{iso}' OR date_fin NOT GLOB '{iso}'
+        """)
+        corrections = []
+        for row in cur.fetchall():
+            try:
+                corrections.append((row['id'], row['employe_id'], lire_date(row['date_debut']).isoformat(),
+                                    lire_date(row['date_fin']).isoformat(), row['type_conge']))
+            except (ValueError, TypeError):
+                # Date illisible: laissée telle quelle
+                continue
+
+        cur.executemany(f"UPDATE {table} SET date_debut = ?, date_fin = ? WHERE id = ?",
+                        [(debut, fin, demande_id) for demande_id, _, debut, fin, _ in corrections])
+        if table == "demandes_conge":
+            # Empreinte recalculée sur les dates réécrites (même calcul que
+            # services.dao.empreinte_demande); un doublon déjà présent garde
+            # l'ancienne
+            cur.executemany("UPDATE OR IGNORE demandes_conge SET empreinte = ? WHERE id = ?", [
+                (hashlib.sha256(f"{employe_id}|{debut}|{fin}|{type_conge.strip().lower()}".encode()).hexdigest(),
+                 demande_id)
+                for demande_id, employe_id, debut, fin, type_conge in corrections
+            ])
+
+
+def _migration_durees_completees(cur):
+    # Lignes restées sans durées (julianday ne lit pas les dates sans zéros,
+    # réécrites depuis): même calcul que DemandeDAO.creer. Les rapports font
+    # SUM() sur ces colonnes: une durée manquante arrête la mise à jour.
+    from services.dao import durees_demande
+
+    for table in ("demandes_conge", "demandes_conge_archive"):
+        requete = f"""
+        SELECT id, type_conge, date_debut, date_fin FROM {table}
+        WHERE nb_jours IS NULL OR jours_deductibles IS NULL
+        """
+        durees = []
+        for row in cur.execute(requete).fetchall():
+            try:
+                durees.append((*durees_demande(row['type_conge'], row['date_debut'], row['date_fin']), row['id']))
+            except (ValueError, TypeError):
+                continue
+        cur.executemany(f"UPDATE {table} SET nb_jours = ?, jours_deductibles = ? WHERE id = ?", durees)
+
+        manquantes = [row['id'] for row in cur.execute(requete).fetchall()]
+        if manquantes:
+            raise ValueError(f"Durées incalculables dans {table} (type ou dates à corriger): "
+                             f"demandes {manquantes}")
+
+
+def _migration_journal_archivage(cur):
+    # Une demande archivée (DemandeDAO.archiver_lot la copie dans l'archive
+    # avant de la supprimer) est journalisée 'A', pas 'D': les copies
+    # synchronisées la sortent de la table courante sans la perdre. Les ID
+    # (AUTOINCREMENT) ne sont jamais réutilisés: une ligne de l'archive de
+    # même ID ne peut venir que de l'archivage.
+    # Nouvelle contrainte CHECK: table reconstruite avec ses seq (le plus grand
+    # est le dernier attribué, une entrée n'est supprimée que remplacée)
+    cur.execute("DROP TABLE IF EXISTS journal_modifications_nouveau")
+    cur.execute("""
+    CREATE TABLE journal_modifications_nouveau (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_nom TEXT NOT NULL,
+        ligne_id INTEGER NOT NULL,
+        operation TEXT NOT NULL CHECK (operation IN ('I', 'U', 'D', 'A'))
+    )
+    """)
+    cur.execute("""
+    INSERT INTO journal_modifications_nouveau (seq, table_nom, ligne_id, operation)
+    SELECT seq, table_nom, ligne_id, operation FROM journal_modifications
+    """)
+    cur.execute("DROP TABLE journal_modifications")
+    # Les triggers des tables suivies nomment journal_modifications: sans le
+    # mode historique, le renommage revérifie ces triggers et échoue
+    cur.execute("PRAGMA legacy_alter_table = ON")
+    try:
+        cur.execute("ALTER TABLE journal_modifications_nouveau RENAME TO journal_modifications")
+    finally:
+        cur.execute("PRAGMA legacy_alter_table = OFF")
+    cur.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_journal_ligne
+    ON journal_modifications (table_nom, ligne_id)
+    """)
+
+    cur.execute("DROP TRIGGER IF EXISTS demandes_conge_journal_ad")
+    cur.execute("""
+    CREATE TRIGGER demandes_conge_journal_ad AFTER DELETE ON demandes_conge BEGIN
+        DELETE FROM journal_modifications WHERE table_nom = 'demandes_conge' AND ligne_id = old.id;
+        INSERT INTO journal_modifications (table_nom, ligne_id, operation)
+        VALUES ('demandes_conge', old.id,
+                CASE WHEN EXISTS (SELECT 1 FROM demandes_conge_archive WHERE id = old.id) THEN 'A' ELSE 'D' END);
+    END
+    """)
+
+
+MIGRATIONS = [
+    _migration_tables_initiales,
+    _migration_version_demandes,
+    _migration_motif_demandes,
+    _migration_recherche_employes,
+    _migration_index_statut_demandes,
+    _migration_limites_service,
+    _migration_journal_wal,
+    _migration_compteur_modifications,
+    _migration_archive_demandes,
+    _migration_vacuum_incremental,
+    _migration_reprises_import,
+    _migration_lien_utilisateurs_employes,
+    _migration_idempotence_demandes,
+    _migration_calendrier_absences,
+    _migration_journal_modifications,
+    _migration_hierarchie_employes,
+    _migration_durees_demandes,
+    _migration_compteurs_statut,
+    _migration_durees_recalculees,
+    _migration_dates_iso,
+    _migration_durees_completees,
+    _migration_journal_archivage,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def _ajouter_colonne_si_absente(cur, table, colonne, definition):
+    """Ajoute une colonne à une table existante si elle n'existe pas encore"""
+    cur.execute(f"PRAGMA table_info({table})")
+    colonnes = [row['name'] for row in cur.fetchall()]
+    if colonne not in colonnes:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {colonne} {definition}")
 
 
 def reset_db():
@@ -58,8 +1152,17 @@ def reset_db():
     try:
         print("⚠️  Suppression de toutes les tables...")
         cur.execute("DROP TABLE IF EXISTS demandes_conge")
+        cur.execute("DROP TABLE IF EXISTS demandes_conge_archive")
+        cur.execute("DROP TABLE IF EXISTS employes_fts")
         cur.execute("DROP TABLE IF EXISTS employes")
         cur.execute("DROP TABLE IF EXISTS utilisateurs")
+        cur.execute("DROP TABLE IF EXISTS limites_absences_service")
+        cur.execute("DROP TABLE IF EXISTS compteur_modifications")
+        cur.execute("DROP TABLE IF EXISTS reprises_import")
+        cur.execute("DROP TABLE IF EXISTS journal_modifications")
+        cur.execute("DROP TABLE IF EXISTS hierarchie_employes")
+        cur.execute("DROP TABLE IF EXISTS compteurs_statut")
+        cur.execute("PRAGMA user_version = 0")
         conn.commit()
         print("✅ Tables supprimées")
     except Exception as e:
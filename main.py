@@ -1,8 +1,6 @@
+import sys
+
 from database import init_db
-from services.gestion_conges import GestionConges
-from services.authentification import ServiceAuthentification
-from utils.display import afficher_demande_detaillee, afficher_liste_employes, afficher_menu_types_conge
-from models.types_conge import CongeExceptionnel
 
 
 def menu_principal():
@@ -28,12 +26,32 @@ def menu_rh():
     print("3. Voir demandes EN ATTENTE")
     print("4. Valider une demande")
     print("5. Refuser une demande")
-    print("6. Se déconnecter")
+    print("6. Rechercher un employé")
+    print("7. Se déconnecter")
     return input("Choisir une option >> ")
 
 
+def employe_connecte(gc, utilisateur):
+    """
+    Fiche employé de l'utilisateur connecté, chargée avec le compte à la connexion
+    Le matricule n'est demandé que pour un compte qui n'est lié à aucun employé
+    """
+    if utilisateur.employe is not None:
+        return utilisateur.employe
+    return gc.get_employe_by_matricule(input("Votre matricule: "))
+
+
 def main():
     init_db()
+
+    # Services importés ici plutôt qu'en tête du module: le mode commande
+    # (commandes.py) et bench_demarrage importent main sans charger le menu
+    from services.gestion_conges import GestionConges
+    from services.authentification import ServiceAuthentification
+    from utils.display import (
+        afficher_demande_detaillee, afficher_liste_employes, afficher_menu_types_conge, afficher_par_pages
+    )
+
     gc = GestionConges()
     auth = ServiceAuthentification()
     utilisateur_connecte = None
@@ -73,9 +91,9 @@ def main():
 
                     print("ℹ️ Employé existant détecté")
 
-                    # Create only the user account
+                    # Create only the user account, linked to the employee
 
-                    if auth.creer_utilisateur(login, mdp, "Employe"):
+                    if auth.creer_utilisateur(login, mdp, "Employe", emp.id):
                         print("✅ Compte utilisateur créé et lié à l’employé existant")
 
 
@@ -83,8 +101,11 @@ def main():
 
                     print("ℹ️ Nouvel employé — création employé + compte")
 
-                    if auth.creer_utilisateur(login, mdp, "Employe"):
-                        gc.add_employe(matricule, nom, prenom, service)
+                    user_id = auth.creer_utilisateur(login, mdp, "Employe")
+                    if user_id:
+                        employe_id = gc.add_employe(matricule, nom, prenom, service)
+                        if employe_id:
+                            auth.lier_employe(user_id, employe_id)
 
                         print("✅ Employé et compte créés avec succès")
 
@@ -121,21 +142,24 @@ def main():
                     print("\n" + "=" * 60)
                     print("DEMANDES EN ATTENTE")
                     print("=" * 60)
-                    demandes = gc.lister_demandes_en_attente()
-
-                    if demandes:
-                        for conge in demandes:
-                            afficher_demande_detaillee(conge, conge.solde_conges)
-                    else:
+                    compact = input("Affichage compact? (o/N): ").lower() == "o"
+                    # RH manager: uniquement les demandes de ses subordonnés
+                    perimetre = gc.perimetre_validation(utilisateur_connecte)
+                    nb_affichees = afficher_par_pages(gc.iterer_demandes_en_attente(responsable_id=perimetre),
+                                                      taille_page=50 if compact else 10,
+                                                      compact=compact)
+
+                    if not nb_affichees:
                         print("✅ Aucune demande en attente")
 
                 elif choix == "4":
                     # Validate request
-                    demandes = gc.lister_demandes_en_attente()
+                    perimetre = gc.perimetre_validation(utilisateur_connecte)
 
-                    if not demandes:
+                    if not gc.a_des_demandes_en_attente(perimetre):
                         print("✅ Aucune demande en attente")
                     else:
+                        demandes = gc.lister_demandes_en_attente(perimetre)
                         for conge in demandes:
                             jours = conge.calculer_jours()
                             deduit = "💰" if conge.deduit_du_solde() else "ℹ️ "
@@ -143,23 +167,43 @@ def main():
                                 f"ID {conge.id}: {conge.nom} | {conge.get_emoji()} {conge.get_type()} | {jours}j | {deduit}")
 
                         did = int(input("\nID de la demande à valider : "))
-                        gc.valider_demande(did)
+                        gc.valider_demande(did, utilisateur_connecte)
 
                 elif choix == "5":
                     # Refuse request
-                    demandes = gc.lister_demandes_en_attente()
+                    perimetre = gc.perimetre_validation(utilisateur_connecte)
 
-                    if not demandes:
+                    if not gc.a_des_demandes_en_attente(perimetre):
                         print("✅ Aucune demande en attente")
                     else:
+                        demandes = gc.lister_demandes_en_attente(perimetre)
                         for conge in demandes:
                             print(
                                 f"ID {conge.id}: {conge.nom} | {conge.get_type()} | {conge.date_debut} → {conge.date_fin}")
 
                         did = int(input("\nID de la demande à refuser : "))
-                        gc.refuser_demande(did)
+                        gc.refuser_demande(did, utilisateur_connecte)
 
                 elif choix == "6":
+                    # Search employees (partial name, first name, service or matricule)
+                    terme = input("Recherche (nom, prénom, service, matricule): ")
+                    page, taille_page = 1, 20
+
+                    while True:
+                        employes, total = gc.rechercher_employes(terme, page, taille_page)
+
+                        if not employes:
+                            print("Aucun employé trouvé")
+                            break
+
+                        afficher_liste_employes(employes)
+                        print(f"Page {page} - {total} résultat(s)")
+
+                        if page * taille_page >= total or input("Page suivante? (o/N): ").lower() != "o":
+                            break
+                        page += 1
+
+                elif choix == "7":
                     utilisateur_connecte = None
                     print("Déconnexion réussie")
 
@@ -169,8 +213,7 @@ def main():
 
                 if choix == "1":
                     # Add leave request
-                    mat = input("Votre matricule: ")
-                    emp = gc.get_employe_by_matricule(mat)
+                    emp = employe_connecte(gc, utilisateur_connecte)
 
                     if emp:
                         print(f"✅ Employé: {emp.nom} {emp.prenom}")
@@ -212,8 +255,7 @@ def main():
 
                 elif choix == "2":
                     # View my requests
-                    mat = input("Votre matricule: ")
-                    emp = gc.get_employe_by_matricule(mat)
+                    emp = employe_connecte(gc, utilisateur_connecte)
 
                     if emp:
                         print(f"\n{'=' * 60}")
@@ -221,11 +263,13 @@ def main():
                         print(f"{'=' * 60}")
 
                         # Get all requests for this employee
-                        demandes = gc.lister_demandes_par_employe(emp.id)
+                        historique = input("Inclure les demandes archivées ? (o/N): ").strip().lower() == "o"
+                        demandes = gc.lister_demandes_par_employe(emp.id, avec_historique=historique)
 
                         if demandes:
                             for conge in demandes:
-                                afficher_demande_detaillee(conge, emp.solde_conges)
+                                # Solde lu avec les demandes (la fiche de session peut dater)
+                                afficher_demande_detaillee(conge, conge.solde_conges)
                         else:
                             print("Vous n'avez aucune demande enregistrée")
                     else:
@@ -237,4 +281,8 @@ def main():
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Mode commande non interactif (voir commandes.py)
+        from commandes import executer
+        sys.exit(executer(sys.argv[1:]))
     main()
\ No newline at end of file
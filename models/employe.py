@@ -1,5 +1,5 @@
 class Employe:
-    def __init__(self, id, matricule, nom, prenom, service, solde_conges):
+    def __init__(self, id, matricule, nom, prenom, service, solde_conges, manager_id=None):
         self.__id = id  # Private
         self.__matricule = matricule  # Private
         self.__nom = nom  # Private
@@ -9,6 +9,7 @@ class Employe:
 
 
         self.__solde_conges = solde_conges  # Private
+        self.__manager_id = manager_id  # Private
 
     # Getters (accessors)
     @property
@@ -35,6 +36,11 @@ class Employe:
     def solde_conges(self):
         return self.__solde_conges
 
+    @property
+    def manager_id(self):
+        """ID de l'employé manager (None: sommet de la hiérarchie)"""
+        return self.__manager_id
+
     # Setter with validation (protects data integrity)
     @solde_conges.setter
     def solde_conges(self, valeur):
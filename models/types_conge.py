@@ -31,8 +31,13 @@ class Conge(ABC):
         """Indique si ce type de congé déduit du solde de l'employé"""
         pass
 
+    # Durée enregistrée en base (colonne nb_jours), reprise sans recalcul
+    nb_jours = None
+
     def calculer_jours(self):
         """Calcule le nombre de jours entre date_debut et date_fin"""
+        if self.nb_jours is not None:
+            return self.nb_jours
         debut = datetime.strptime(self.date_debut, '%Y-%m-%d')
         fin = datetime.strptime(self.date_fin, '%Y-%m-%d')
         return (fin - debut).days + 1
@@ -85,6 +90,8 @@ class CongeMaladie(Conge):
     Congé maladie - ne déduit PAS du solde, mais nécessite justificatif
     """
 
+    SEUIL_JUSTIFICATIF = 3  # jours au-delà desquels un certificat est requis
+
     def get_type(self):
         return "Maladie"
 
@@ -99,7 +106,7 @@ class CongeMaladie(Conge):
 
     def necessite_justificatif(self):
         """Congé maladie > 3 jours nécessite un certificat médical"""
-        return self.calculer_jours() > 3
+        return self.calculer_jours() > self.SEUIL_JUSTIFICATIF
 
 
 class CongeExceptionnel(Conge):
@@ -200,6 +207,14 @@ class CongeFactory:
     Factory Pattern: crée la bonne instance de congé selon le type
     """
 
+    TYPES = {
+        "annuel": CongeAnnuel,
+        "maladie": CongeMaladie,
+        "exceptionnel": CongeExceptionnel,
+        "sans solde": CongeSansSolde,
+        "parental": CongeParental
+    }
+
     @staticmethod
     def creer_conge(type_conge, id, employe_id, date_debut, date_fin, statut, commentaire="", **kwargs):
         """
@@ -209,15 +224,7 @@ class CongeFactory:
             type_conge: "Annuel", "Maladie", "Exceptionnel", etc.
             **kwargs: paramètres supplémentaires (ex: motif pour CongeExceptionnel)
         """
-        type_map = {
-            "annuel": CongeAnnuel,
-            "maladie": CongeMaladie,
-            "exceptionnel": CongeExceptionnel,
-            "sans solde": CongeSansSolde,
-            "parental": CongeParental
-        }
-
-        classe_conge = type_map.get(type_conge.lower())
+        classe_conge = CongeFactory.TYPES.get(type_conge.lower())
 
         if not classe_conge:
             raise ValueError(f"Type de congé inconnu: {type_conge}")
@@ -1,9 +1,14 @@
+from utils.mots_de_passe import verifier, doit_rehacher
+
+
 class Utilisateur:
-    def __init__(self, id, login, mot_de_passe, role):
+    def __init__(self, id, login, mot_de_passe, role, employe_id=None, employe=None):
         self.__id = id
         self.__login = login
-        self.__mot_de_passe = mot_de_passe  # Should be hashed in production!
+        self.__mot_de_passe = mot_de_passe  # Empreinte (utils.mots_de_passe), ou clair pour les anciens comptes
         self.__role = role
+        self.__employe_id = employe_id
+        self.__employe = employe  # Fiche Employe chargée à la connexion (None si non lié)
 
     @property
     def id(self):
@@ -17,6 +22,19 @@ class Utilisateur:
     def role(self):
         return self.__role
 
+    @property
+    def employe_id(self):
+        return self.__employe_id
+
+    @property
+    def employe(self):
+        return self.__employe
+
+    @property
+    def empreinte_mot_de_passe(self):
+        """Valeur stockée en base (empreinte), jamais le mot de passe saisi"""
+        return self.__mot_de_passe
+
     def est_rh(self):
         """Vérifie si l'utilisateur a le rôle RH"""
         return self.__role == "RH"
@@ -30,5 +48,9 @@ class Utilisateur:
         return self.est_rh()
 
     def verifier_mot_de_passe(self, mot_de_passe):
-        """Vérifie le mot de passe (exemple d'encapsulation)"""
-        return self.__mot_de_passe == mot_de_passe
\ No newline at end of file
+        """Vérifie le mot de passe par rapport à l'empreinte stockée (exemple d'encapsulation)"""
+        return verifier(mot_de_passe, self.__mot_de_passe)
+
+    def mot_de_passe_a_rehacher(self):
+        """Le mot de passe est stocké en clair ou avec une empreinte à renforcer"""
+        return doit_rehacher(self.__mot_de_passe)
\ No newline at end of file
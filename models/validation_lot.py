@@ -0,0 +1,265 @@
+"""
+Moteur de validation par lot (vectorisé avec NumPy)
+Applique les règles métier de models/types_conge.py à des colonnes entières
+(types, dates, soldes, motifs) au lieu d'un objet Conge à la fois.
+Pour des dates valides, les verdicts et messages sont identiques à ceux de
+Conge.valider_demande; une date illisible donne un verdict négatif au lieu
+d'une exception.
+"""
+from datetime import datetime
+
+import numpy as np
+
+from models.types_conge import (
+    Conge, CongeFactory, CongeMaladie, CongeExceptionnel, CongeParental
+)
+
+MESSAGE_DATE_INVALIDE = "Format de date invalide (utilisez YYYY-MM-DD)"
+
+
+class ResultatLot:
+    """
+    Résultat d'une validation par lot (une entrée par ligne)
+    - valides: tableau de booléens
+    - messages: tableau d'objets str (mêmes messages que valider_demande)
+    - jours / jours_deductibles: durées calculées
+    - deduit: la ligne déduit du solde (deduit_du_solde)
+    - justificatif: un justificatif est requis (congé maladie)
+    """
+
+    def __init__(self, valides, messages, jours, jours_deductibles, deduit, justificatif):
+        self.valides = valides
+        self.messages = messages
+        self.jours = jours
+        self.jours_deductibles = jours_deductibles
+        self.deduit = deduit
+        self.justificatif = justificatif
+
+    def __len__(self):
+        return len(self.valides)
+
+    def __getitem__(self, i):
+        """Retourne (bool, message) comme Conge.valider_demande"""
+        return bool(self.valides[i]), self.messages[i]
+
+
+def valider_lot(types, dates_debut, dates_fin, soldes, motifs=None):
+    """
+    Valide un lot de demandes décrites en colonnes
+
+    Args:
+        types: types de congé ("Annuel", "Maladie", ...)
+        dates_debut, dates_fin: dates au format YYYY-MM-DD
+        soldes: solde de l'employé pour chaque ligne
+        motifs: motifs (congés exceptionnels), None ou '' sinon
+    """
+    n = len(types)
+    types_saisis = np.asarray(types, dtype=object)
+    types_norm = _en_minuscules(types)
+    soldes = np.asarray(soldes)
+    if motifs is None:
+        motifs = np.full(n, "", dtype=str)
+    else:
+        motifs = _en_minuscules([m or "" for m in motifs])
+
+    debut, debut_ok = parser_dates(dates_debut)
+    fin, fin_ok = parser_dates(dates_fin)
+    dates_ok = debut_ok & fin_ok
+
+    jours = np.zeros(n, dtype=np.int64)
+    jours[dates_ok] = (fin[dates_ok] - debut[dates_ok]).astype(np.int64) + 1
+
+    valides = np.zeros(n, dtype=bool)
+    messages = np.empty(n, dtype=object)
+    jours_deductibles = jours.copy()
+    deduit = np.zeros(n, dtype=bool)
+
+    messages[~dates_ok] = MESSAGE_DATE_INVALIDE
+
+    connus = np.zeros(n, dtype=bool)
+    for cle, classe in CongeFactory.TYPES.items():
+        masque = types_norm == cle
+        if not masque.any():
+            continue
+        connus |= masque
+        deduit[masque] = _prototype(classe).deduit_du_solde()
+
+        masque &= dates_ok
+        if not masque.any():
+            continue
+
+        regle = _REGLES.get(classe)
+        if regle is None and _est_vectorisable(classe):
+            regle = _regle_solde
+        if regle is None:
+            _regle_par_objet(classe, masque, types_saisis, dates_debut, dates_fin, soldes, motifs,
+                             valides, messages, jours_deductibles)
+        else:
+            regle(classe, masque, jours, soldes, motifs, valides, messages)
+
+    for i in np.flatnonzero(~connus):
+        valides[i] = False
+        messages[i] = f"Type de congé inconnu: {types_saisis[i]}"
+    jours_deductibles[~connus] = 0
+
+    justificatif = (types_norm == "maladie") & (jours > CongeMaladie.SEUIL_JUSTIFICATIF)
+
+    return ResultatLot(valides, messages, jours, jours_deductibles, deduit, justificatif)
+
+
+def valider_rows(rows):
+    """
+    Valide des lignes issues de DemandeDAO (jointure avec employes)
+    Retourne (ids, ResultatLot)
+    """
+    ids = np.fromiter((row['id'] for row in rows), dtype=np.int64, count=len(rows))
+    resultat = valider_lot(
+        [row['type_conge'] for row in rows],
+        [row['date_debut'] for row in rows],
+        [row['date_fin'] for row in rows],
+        [row['solde_conges'] for row in rows],
+        [row['motif'] for row in rows],
+    )
+    return ids, resultat
+
+
+# ----------------------------------------------------------------------
+# Règles vectorisées par type (miroir des surcharges de valider_demande)
+# ----------------------------------------------------------------------
+def _regle_solde(classe, masque, jours, soldes, motifs, valides, messages):
+    """Règle de Conge.valider_demande (vérification du solde si nécessaire)"""
+    if not _prototype(classe).necessite_validation_solde():
+        valides[masque] = True
+        messages[masque] = "Validation OK (pas de vérification de solde requise)"
+        return
+
+    insuffisant = masque & (jours > soldes)
+    ok = masque & ~insuffisant
+    valides[ok] = True
+    messages[ok] = "Validation OK"
+    for i in np.flatnonzero(insuffisant):
+        messages[i] = f"Solde insuffisant: {jours[i]} jours demandés, {soldes[i]} disponibles"
+
+
+def _regle_exceptionnel(classe, masque, jours, soldes, motifs, valides, messages):
+    """Règle de CongeExceptionnel.valider_demande (motif + durée maximale)"""
+    durees = classe.DUREES_AUTORISEES
+    motifs_valides = list(durees.keys())
+
+    inconnu = masque & ~np.isin(motifs, motifs_valides)
+    for i in np.flatnonzero(inconnu):
+        messages[i] = f"Motif '{motifs[i]}' non reconnu. Motifs valides: {', '.join(motifs_valides)}"
+
+    connu = masque & ~inconnu
+    jours_max = np.zeros(len(jours), dtype=np.int64)
+    for motif, duree in durees.items():
+        jours_max[connu & (motifs == motif)] = duree
+
+    trop_long = connu & (jours > jours_max)
+    for i in np.flatnonzero(trop_long):
+        messages[i] = f"Durée maximale pour '{motifs[i]}': {jours_max[i]} jours (demandé: {jours[i]})"
+
+    ok = connu & ~trop_long
+    valides[ok] = True
+    messages[ok] = "Validation OK"
+
+
+def _regle_parental(classe, masque, jours, soldes, motifs, valides, messages):
+    """Règle de CongeParental.valider_demande (durée maximale annuelle)"""
+    trop_long = masque & (jours > classe.DUREE_MAXIMALE_ANNEE)
+    messages[trop_long] = f"Durée maximale de congé parental: {classe.DUREE_MAXIMALE_ANNEE} jours par an"
+
+    ok = masque & ~trop_long
+    valides[ok] = True
+    messages[ok] = "Validation OK"
+
+
+_REGLES = {
+    CongeExceptionnel: _regle_exceptionnel,
+    CongeParental: _regle_parental,
+}
+
+
+def _regle_par_objet(classe, masque, types, dates_debut, dates_fin, soldes, motifs,
+                     valides, messages, jours_deductibles):
+    """
+    Repli objet par objet pour un type dont les règles n'ont pas
+    (encore) d'équivalent vectorisé
+    """
+    for i in np.flatnonzero(masque):
+        conge = CongeFactory.creer_conge(types[i], None, None, dates_debut[i], dates_fin[i],
+                                         "En attente", motif=motifs[i])
+        valides[i], messages[i] = conge.valider_demande(soldes[i])
+        jours_deductibles[i] = conge.calculer_jours_deductibles()
+
+
+def _est_vectorisable(classe):
+    """Vrai si la classe garde la règle et le calcul de durée de Conge"""
+    return (classe.valider_demande is Conge.valider_demande
+            and classe.calculer_jours_deductibles is Conge.calculer_jours_deductibles)
+
+
+_PROTOTYPES = {}
+
+
+def _prototype(classe):
+    """Instance de référence pour interroger les méthodes sans état du type"""
+    if classe not in _PROTOTYPES:
+        _PROTOTYPES[classe] = classe(None, None, "", "", None)
+    return _PROTOTYPES[classe]
+
+
+def _en_minuscules(valeurs):
+    """
+    Met une colonne catégorielle en minuscules
+    (peu de valeurs distinctes: on ne convertit que les valeurs uniques)
+    """
+    uniques, inverse = np.unique(np.asarray(valeurs, dtype=str), return_inverse=True)
+    return np.char.lower(uniques)[inverse]
+
+
+def parser_dates(valeurs):
+    """
+    Convertit une colonne de dates YYYY-MM-DD en datetime64[D]
+    Retourne (dates, masque des dates valides)
+    Le cas standard est décodé chiffre par chiffre sans boucle Python;
+    seules les valeurs atypiques passent par strptime.
+    """
+    texte = np.asarray(valeurs, dtype=str)
+    n = len(texte)
+    dates = np.full(n, np.datetime64("NaT"), dtype="datetime64[D]")
+    if n == 0:
+        return dates, np.zeros(0, dtype=bool)
+
+    # Chaque caractère en code point: matrice (n, 10)
+    caracteres = texte.astype("U10").view(np.uint32).reshape(n, 10).astype(np.int64)
+    chiffres = caracteres - ord("0")
+    positions = [0, 1, 2, 3, 5, 6, 8, 9]
+    ok = ((np.char.str_len(texte) == 10)
+          & (caracteres[:, 4] == ord("-")) & (caracteres[:, 7] == ord("-"))
+          & ((chiffres[:, positions] >= 0) & (chiffres[:, positions] <= 9)).all(axis=1))
+
+    annee = chiffres[:, 0] * 1000 + chiffres[:, 1] * 100 + chiffres[:, 2] * 10 + chiffres[:, 3]
+    mois = chiffres[:, 5] * 10 + chiffres[:, 6]
+    jour = chiffres[:, 8] * 10 + chiffres[:, 9]
+    ok &= (annee >= 1) & (mois >= 1) & (mois <= 12) & (jour >= 1)
+
+    debut_mois = ((annee[ok] - 1970).astype("datetime64[Y]").astype("datetime64[M]")
+                  + (mois[ok] - 1).astype("timedelta64[M]"))
+    jours_dans_mois = ((debut_mois + np.timedelta64(1, "M")).astype("datetime64[D]")
+                       - debut_mois.astype("datetime64[D]")).astype(np.int64)
+    dans_le_mois = jour[ok] <= jours_dans_mois
+    indices = np.flatnonzero(ok)
+    dates[indices[dans_le_mois]] = (debut_mois[dans_le_mois].astype("datetime64[D]")
+                                    + (jour[ok][dans_le_mois] - 1).astype("timedelta64[D]"))
+    ok[indices[~dans_le_mois]] = False
+
+    # Valeurs non standard (ex: 2026-1-5): même analyse que Conge.calculer_jours
+    for i in np.flatnonzero(~ok):
+        try:
+            dates[i] = np.datetime64(datetime.strptime(texte[i], '%Y-%m-%d').date(), "D")
+            ok[i] = True
+        except ValueError:
+            pass
+
+    return dates, ok
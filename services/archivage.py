@@ -0,0 +1,36 @@
+"""
+Service d'archivage des demandes traitées
+Responsabilité: sortir de demandes_conge les demandes validées ou refusées
+terminées depuis plus longtemps que l'horizon de conservation, pour garder
+petite la table parcourue par la file d'attente et les listes courantes
+"""
+from datetime import date, timedelta
+
+from services.dao import DemandeDAO
+
+# Une demande terminée depuis plus d'un an part en archive
+HORIZON_JOURS_DEFAUT = 365
+
+# Demandes déplacées par transaction: le verrou d'écriture est rendu entre
+# deux lots, les validations en cours ne restent pas bloquées
+TAILLE_LOT_DEFAUT = 500
+
+
+def archiver_demandes(horizon_jours=HORIZON_JOURS_DEFAUT, taille_lot=TAILLE_LOT_DEFAUT, aujourd_hui=None):
+    """
+    Archive par lots les demandes traitées terminées avant aujourd'hui - horizon_jours
+    Retourne un résumé {"date_limite": ..., "archivees": n, "lots": n}
+    """
+    aujourd_hui = aujourd_hui or date.today()
+    date_limite = (aujourd_hui - timedelta(days=horizon_jours)).isoformat()
+
+    archivees = 0
+    lots = 0
+    while True:
+        nombre = DemandeDAO.archiver_lot(date_limite, taille_lot)
+        if nombre == 0:
+            break
+        archivees += nombre
+        lots += 1
+
+    return {"date_limite": date_limite, "archivees": archivees, "lots": lots}
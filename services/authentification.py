@@ -2,9 +2,13 @@
 Service d'authentification
 Responsabilité: Logique métier liée à l'authentification et la gestion des utilisateurs
 """
+from database import portee_locataire
 from services.dao import UtilisateurDAO
+from services.sessions import CacheSessions
+from utils.mots_de_passe import hacher, executer_derivation
 
 
+@portee_locataire
 class ServiceAuthentification:
     """
     Service applicatif pour l'authentification
@@ -12,15 +16,25 @@ class ServiceAuthentification:
     - Orchestrer les opérations d'authentification
     - Valider les règles métier (ex: rôles valides)
     - Coordonner l'accès aux données via UtilisateurDAO
+    Les mots de passe sont stockés sous forme d'empreinte (utils.mots_de_passe);
+    hachage et vérification passent par un pool de threads borné.
+    locataire: société dont la base est utilisée (None = base du contexte courant);
+    les sessions d'une instance ne valent que pour son locataire.
     """
 
     ROLES_VALIDES = ['Employe', 'RH']
 
-    def creer_utilisateur(self, login, mot_de_passe, role="Employe"):
+    def __init__(self, sessions=None, locataire=None):
+        self.sessions = sessions or CacheSessions()
+        self.locataire = locataire
+
+    def creer_utilisateur(self, login, mot_de_passe, role="Employe", employe_id=None):
         """
         Crée un nouvel utilisateur dans le système
         role par défaut: 'Employe'
         role peut être: 'RH' ou 'Employe'
+        employe_id: fiche employé liée au compte (profil chargé à la connexion)
+        Retourne l'ID du compte, ou False
         """
         # Validation métier
         if role not in self.ROLES_VALIDES:
@@ -33,9 +47,9 @@ class ServiceAuthentification:
 
         # ✅ Délégation au DAO (plus de SQL direct!)
         try:
-            user_id = UtilisateurDAO.creer(login, mot_de_passe, role)
+            user_id = UtilisateurDAO.creer(login, executer_derivation(hacher, mot_de_passe), role, employe_id)
             print(f"✅ Compte créé avec succès (Rôle: {role}, ID: {user_id})")
-            return True
+            return user_id
         except Exception as e:
             if "UNIQUE constraint" in str(e):
                 print("❌ Erreur: Ce login existe déjà")
@@ -53,8 +67,7 @@ class ServiceAuthentification:
             return None
 
         try:
-            # ✅ Utilise le DAO
-            utilisateur = UtilisateurDAO.authentifier(login, mot_de_passe)
+            utilisateur = self._verifier_identifiants(login, mot_de_passe)
 
             if utilisateur:
                 print(f"✅ Authentification réussie - Bienvenue {utilisateur.login} ({utilisateur.role})")
@@ -67,6 +80,64 @@ class ServiceAuthentification:
             print(f"❌ Erreur d'authentification: {e}")
             return None
 
+    def ouvrir_session(self, login, mot_de_passe):
+        """
+        Authentifie l'utilisateur et retourne un jeton de session (None si échec)
+        Tant qu'il est valide, utilisateur_de_session(jeton) évite de refaire
+        la vérification du mot de passe
+        """
+        utilisateur = self.authentifier(login, mot_de_passe)
+        if not utilisateur:
+            return None
+        return self.sessions.ouvrir(utilisateur)
+
+    def utilisateur_de_session(self, jeton):
+        """Retourne l'utilisateur d'une session encore valide, sinon None"""
+        return self.sessions.utilisateur(jeton)
+
+    def fermer_session(self, jeton):
+        self.sessions.fermer(jeton)
+
+    def _verifier_identifiants(self, login, mot_de_passe):
+        """
+        Vérifie login/mot de passe et retourne l'Utilisateur, ou None
+        Un mot de passe encore stocké en clair (ou avec une empreinte plus
+        faible) est remplacé par une empreinte actuelle après vérification
+        """
+        utilisateur = UtilisateurDAO.trouver_par_login(login)
+        if not utilisateur or not executer_derivation(utilisateur.verifier_mot_de_passe, mot_de_passe):
+            return None
+
+        if utilisateur.mot_de_passe_a_rehacher():
+            UtilisateurDAO.remplacer_mot_de_passe_si_inchange(
+                utilisateur.id, utilisateur.empreinte_mot_de_passe, executer_derivation(hacher, mot_de_passe)
+            )
+        if utilisateur.employe_id is None and not utilisateur.est_rh():
+            utilisateur = self._rattacher_selon_login(utilisateur)
+        return utilisateur
+
+    @staticmethod
+    def _rattacher_selon_login(utilisateur):
+        """
+        Compte employé pas encore lié: rattaché (lien enregistré) à la fiche dont
+        le matricule, ou le prenom.nom sans homonyme, correspond au login
+        Jamais un compte RH: le lien fixe son périmètre de validation
+        """
+        employe_id = UtilisateurDAO.trouver_employe_du_login(utilisateur.login)
+        if employe_id is None or not UtilisateurDAO.lier_employe_si_libre(utilisateur.id, employe_id):
+            return utilisateur
+        return UtilisateurDAO.trouver_par_login(utilisateur.login)
+
+    def lier_employe(self, user_id, employe_id):
+        """Rattache un compte à une fiche employé (les sessions ouvertes sont fermées)"""
+        try:
+            succes = UtilisateurDAO.lier_employe(user_id, employe_id)
+            self.sessions.fermer_sessions_utilisateur(user_id)
+            return succes
+        except Exception as e:
+            print(f"❌ Erreur lors du rattachement: {e}")
+            return False
+
     def lister_utilisateurs(self):
         """Liste tous les utilisateurs (pour administration)"""
         try:
@@ -82,6 +153,7 @@ class ServiceAuthentification:
         try:
             # ✅ Utilise le DAO
             succes = UtilisateurDAO.supprimer(user_id)
+            self.sessions.fermer_sessions_utilisateur(user_id)
             if succes:
                 print(f"✅ Utilisateur supprimé (ID: {user_id})")
             else:
@@ -101,6 +173,7 @@ class ServiceAuthentification:
         try:
             # ✅ Utilise le DAO
             succes = UtilisateurDAO.modifier_role(user_id, nouveau_role)
+            self.sessions.fermer_sessions_utilisateur(user_id)
             if succes:
                 print(f"✅ Rôle modifié en '{nouveau_role}' (ID: {user_id})")
             else:
@@ -136,12 +209,13 @@ class ServiceAuthentification:
                 print("❌ Utilisateur introuvable")
                 return False
 
-            if utilisateur.mot_de_passe != ancien_mdp:
+            if not executer_derivation(utilisateur.verifier_mot_de_passe, ancien_mdp):
                 print("❌ Ancien mot de passe incorrect")
                 return False
 
             # ✅ Utilise le DAO
-            succes = UtilisateurDAO.modifier_mot_de_passe(user_id, nouveau_mdp)
+            succes = UtilisateurDAO.modifier_mot_de_passe(user_id, executer_derivation(hacher, nouveau_mdp))
+            self.sessions.fermer_sessions_utilisateur(user_id)
 
             if succes:
                 print("✅ Mot de passe modifié avec succès")
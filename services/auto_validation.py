@@ -0,0 +1,254 @@
+"""
+Service de validation automatique
+Responsabilité: valider en arrière-plan les demandes qui ne nécessitent pas
+de décision humaine, selon des règles configurables par type de congé
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from database import locataire, locataire_courant, ecrivain_partage, lot, operation
+from models.types_conge import CongeFactory, CongeExceptionnel
+from services.dao import DemandeDAO
+from services.gestion_conges import GestionConges
+from services.resultats import RESULTAT_OK, RESULTAT_CONFLIT, RESULTAT_DEJA_TRAITEE, RESULTAT_ERREUR
+
+
+def regle_maladie_courte(conge):
+    """Congé maladie court: aucun justificatif médical requis (<= 3 jours)"""
+    return not conge.necessite_justificatif()
+
+
+# Motifs de congé exceptionnel validés automatiquement (par défaut: tous ceux
+# de DUREES_AUTORISEES). Un motif retiré reste à la décision des RH.
+MOTIFS_EXCEPTIONNELS_AUTOMATIQUES = frozenset(CongeExceptionnel.DUREES_AUTORISEES)
+
+
+def regle_exceptionnel_autorise(conge):
+    """Congé exceptionnel: motif retenu et durée dans la limite de DUREES_AUTORISEES"""
+    return (conge.motif in MOTIFS_EXCEPTIONNELS_AUTOMATIQUES
+            and conge.calculer_jours() <= conge.get_duree_maximale())
+
+
+# Règles appliquées EN PLUS de conge.valider_demande(), par type (get_type())
+# Un type absent du dictionnaire n'est jamais validé automatiquement
+REGLES_PAR_DEFAUT = {
+    "Maladie": regle_maladie_courte,
+    "Exceptionnel": regle_exceptionnel_autorise,
+}
+
+
+class _ValidationEcartee(Exception):
+    """Annule le point de sauvegarde d'une validation refusée"""
+
+    def __init__(self, resultat):
+        super().__init__(resultat)
+        self.resultat = resultat
+
+
+class ValidateurAutomatique:
+    """
+    Pool de workers qui valide automatiquement les nouvelles demandes éligibles
+    - Un thread de scrutation lit les nouvelles demandes en attente par lots
+    - Les lots sont traités par un pool de threads borné
+    - La validation passe par GestionConges.tenter_validation (verrouillage
+      optimiste): un RH qui traite la même demande en parallèle est sans risque
+    - Les demandes éligibles d'un lot sont validées dans une seule transaction
+      d'écriture, un point de sauvegarde par demande
+    - Lecture et validation se font dans la base du locataire de gestion
+      (à défaut, celui du contexte de création), threads compris
+    """
+
+    def __init__(self, regles=None, nb_workers=4, taille_lot=50, intervalle=2.0, gestion=None):
+        self.regles = dict(REGLES_PAR_DEFAUT if regles is None else regles)
+        self.nb_workers = nb_workers
+        self.taille_lot = taille_lot
+        self.intervalle = intervalle
+        self.gestion = gestion or GestionConges()
+        # Les threads de scrutation et de traitement n'héritent pas du contexte
+        self._locataire = self.gestion.locataire or locataire_courant()
+
+        self._dernier_id = 0
+        self._arret = threading.Event()
+        self._lots_en_vol = threading.BoundedSemaphore(nb_workers * 2)
+        self._executor = None
+        self._thread = None
+
+        self._verrou = threading.Lock()
+        self._debut = None
+        self._compteurs = {
+            "lots": 0,
+            "examinees": 0,
+            "validees": 0,
+            "ignorees": 0,
+            "conflits": 0,
+            "erreurs": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Cycle de vie
+    # ------------------------------------------------------------------
+    def demarrer(self):
+        """Démarre la scrutation et le pool de workers en arrière-plan"""
+        if self._thread is not None:
+            return
+        self._arret.clear()
+        self._debut = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=self.nb_workers,
+                                            thread_name_prefix="auto-validation")
+        self._thread = threading.Thread(target=self._boucle, name="auto-validation-scrutation",
+                                        daemon=True)
+        self._thread.start()
+
+    def arreter(self, timeout=None):
+        """
+        Arrêt propre: plus aucun nouveau lot n'est lu, les lots en cours
+        sont terminés avant le retour
+        """
+        self._arret.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def executer_une_passe(self):
+        """
+        Traite de façon synchrone toutes les demandes en attente non encore
+        examinées (utile en tâche planifiée) et retourne les métriques
+        """
+        if self._debut is None:
+            self._debut = time.perf_counter()
+        with locataire(self._locataire):
+            while True:
+                rows = self._lire_lot()
+                if not rows:
+                    break
+                self._traiter_lot(rows)
+        return self.metriques()
+
+    # ------------------------------------------------------------------
+    # Métriques
+    # ------------------------------------------------------------------
+    def metriques(self):
+        """Retourne les compteurs et le débit (demandes examinées par seconde)"""
+        with self._verrou:
+            metriques = dict(self._compteurs)
+        duree = time.perf_counter() - self._debut if self._debut else 0.0
+        metriques["duree_s"] = round(duree, 3)
+        metriques["debit_par_s"] = round(metriques["examinees"] / duree, 1) if duree > 0 else 0.0
+        return metriques
+
+    def _incrementer(self, **valeurs):
+        with self._verrou:
+            for cle, valeur in valeurs.items():
+                self._compteurs[cle] += valeur
+
+    # ------------------------------------------------------------------
+    # Traitement
+    # ------------------------------------------------------------------
+    def _boucle(self):
+        with locataire(self._locataire):
+            self._scruter()
+
+    def _scruter(self):
+        while not self._arret.is_set():
+            try:
+                rows = self._lire_lot()
+            except Exception as e:
+                print(f"⚠️  Auto-validation: erreur de lecture: {e}")
+                self._arret.wait(self.intervalle)
+                continue
+
+            if not rows:
+                self._arret.wait(self.intervalle)
+                continue
+
+            # Borne le nombre de lots en file: la scrutation attend les workers
+            self._lots_en_vol.acquire()
+            try:
+                futur = self._executor.submit(self._traiter_lot_locataire, rows)
+            except RuntimeError:
+                self._lots_en_vol.release()
+                break
+            futur.add_done_callback(lambda _: self._lots_en_vol.release())
+
+    def _lire_lot(self):
+        rows = DemandeDAO.lister_en_attente_apres(self._dernier_id, self.taille_lot)
+        if rows:
+            self._dernier_id = rows[-1]['id']
+        return rows
+
+    def _traiter_lot_locataire(self, rows):
+        with locataire(self._locataire):
+            self._traiter_lot(rows)
+
+    def _traiter_lot(self, rows):
+        eligibles = []
+        ignorees = erreurs = 0
+        for row in rows:
+            try:
+                if self.est_eligible(row):
+                    eligibles.append(row['id'])
+                else:
+                    ignorees += 1
+            except Exception:
+                erreurs += 1
+
+        validees = conflits = 0
+        if eligibles:
+            resultats = self._valider_en_une_transaction(eligibles)
+            validees = resultats.count(RESULTAT_OK)
+            conflits = sum(resultat in (RESULTAT_CONFLIT, RESULTAT_DEJA_TRAITEE) for resultat in resultats)
+            erreurs += resultats.count(RESULTAT_ERREUR)
+            ignorees += len(resultats) - validees - conflits - resultats.count(RESULTAT_ERREUR)
+
+        self._incrementer(lots=1, examinees=len(rows), validees=validees,
+                          ignorees=ignorees, conflits=conflits, erreurs=erreurs)
+
+    def _valider_en_une_transaction(self, demande_ids):
+        """
+        Valide les demandes sur la connexion d'écriture, en une transaction
+        Une validation refusée est annulée seule (point de sauvegarde).
+        Retourne le code résultat de chaque demande (RESULTAT_ERREUR pour
+        toutes si la transaction échoue)
+        """
+        resultats = []
+        try:
+            with ecrivain_partage() as conn, lot(conn):
+                for demande_id in demande_ids:
+                    try:
+                        with operation(conn):
+                            resultat, _ = self.gestion.tenter_validation(demande_id)
+                            if resultat != RESULTAT_OK:
+                                raise _ValidationEcartee(resultat)
+                    except _ValidationEcartee as ecartee:
+                        resultat = ecartee.resultat
+                    resultats.append(resultat)
+        except Exception:
+            return [RESULTAT_ERREUR] * len(demande_ids)
+        return resultats
+
+    def est_eligible(self, row):
+        """
+        Une demande est éligible si son type a une règle automatique,
+        si elle passe la validation métier du type et la règle elle-même
+        """
+        conge = CongeFactory.creer_conge(
+            row['type_conge'],
+            row['id'],
+            row['employe_id'],
+            row['date_debut'],
+            row['date_fin'],
+            row['statut'],
+            row['commentaire'],
+            motif=row['motif'] or ''
+        )
+
+        regle = self.regles.get(conge.get_type())
+        if regle is None:
+            return False
+
+        valide, _ = conge.valider_demande(row['solde_conges'])
+        return valide and regle(conge)
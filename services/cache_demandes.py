@@ -0,0 +1,150 @@
+"""
+Vue en cache de la file des demandes en attente
+Responsabilité: éviter de relire et reconstruire toute la file quand rien n'a
+changé, et n'appliquer que les demandes modifiées sinon
+"""
+import threading
+import weakref
+
+from database import ouvrir_connexion_dediee, chemin_base, a_la_fermeture
+from services.dao import DemandeDAO
+
+# Vues ouvertes: leur état d'une base est libéré quand cette base est fermée
+_vues = weakref.WeakSet()
+
+
+class EtatVue:
+    """Contenu d'une vue en cache: connexion dédiée, versions lues, éléments par ID"""
+
+    def __init__(self):
+        self.conn = None
+        self.data_version = None
+        self.seq = None
+        self.elements = {}
+        self.ordre = []
+
+
+class VueIncrementale:
+    """
+    Base des vues en mémoire des demandes d'un statut (file d'attente, calendrier)
+    - PRAGMA data_version (sur une connexion dédiée) indique en une lecture
+      si une autre connexion a validé une écriture depuis le dernier accès
+    - le compteur de modifications (triggers) distingue les écritures qui
+      concernent les demandes/employés des autres (ex: utilisateurs)
+    - seules les demandes dont seq_modif a augmenté sont relues et converties;
+      une suppression (nombre de demandes incohérent) force une reconstruction
+    Un état par base (chemin_base()): une même vue sert chaque locataire
+    depuis son propre contexte, sans mélanger les données.
+    Les sous-classes fournissent _lire_tout(cur), _construire(rows) et _cle_tri(id, element).
+    """
+
+    STATUT = None
+    ETAT = EtatVue
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._etats = {}
+        _vues.add(self)
+
+    def invalider(self):
+        """Force une reconstruction complète au prochain accès"""
+        with self._verrou:
+            for etat in self._etats.values():
+                etat.data_version = None
+                etat.seq = None
+
+    def fermer(self, chemin=None):
+        """Ferme les connexions dédiées et vide la vue (d'une seule base si chemin est donné)"""
+        with self._verrou:
+            chemins = list(self._etats) if chemin is None else [chemin]
+            for etat in (self._etats.pop(c, None) for c in chemins):
+                if etat is not None and etat.conn is not None:
+                    etat.conn.close()
+
+    def _lire_tout(self, cur):
+        """Rows de toutes les demandes du statut (reconstruction)"""
+        raise NotImplementedError
+
+    def _construire(self, rows):
+        """(id, élément) pour chaque row du statut"""
+        raise NotImplementedError
+
+    def _cle_tri(self, demande_id, element):
+        raise NotImplementedError
+
+    def _rafraichir(self):
+        """Met la vue de la base courante à jour si elle a changé et retourne son état (appelé sous _verrou)"""
+        chemin = chemin_base()
+        etat = self._etats.get(chemin)
+        if etat is None:
+            etat = self._etats[chemin] = self.ETAT()
+        if etat.conn is None:
+            etat.conn = ouvrir_connexion_dediee()
+
+        data_version = etat.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == etat.data_version:
+            return etat
+
+        cur = etat.conn.cursor()
+        # Une transaction de lecture: compteur et lignes lus sur le même instantané
+        cur.execute("BEGIN")
+        try:
+            seq = DemandeDAO.lire_compteur_modifications(cur)
+            if seq != etat.seq:
+                if etat.seq is None:
+                    self._reconstruire(etat, cur)
+                else:
+                    self._appliquer(etat, DemandeDAO.lister_modifiees_depuis(etat.seq, cur))
+                    # Une suppression (ou un archivage) ne laisse pas de ligne modifiée
+                    if len(etat.elements) != DemandeDAO.compter_par_statut(self.STATUT, cur):
+                        self._reconstruire(etat, cur)
+                etat.seq = seq
+                etat.ordre = sorted(etat.elements,
+                                    key=lambda demande_id: self._cle_tri(demande_id, etat.elements[demande_id]))
+            etat.data_version = data_version
+        finally:
+            cur.execute("COMMIT")
+            cur.close()
+        return etat
+
+    def _reconstruire(self, etat, cur):
+        etat.elements = dict(self._construire(self._lire_tout(cur)))
+
+    def _appliquer(self, etat, rows):
+        for row in rows:
+            etat.elements.pop(row['id'], None)
+        etat.elements.update(self._construire([row for row in rows if row['statut'] == self.STATUT]))
+
+
+def _fermer_vues(chemin):
+    for vue in list(_vues):
+        vue.fermer(chemin)
+
+
+a_la_fermeture(_fermer_vues)
+
+
+class FileAttenteEnCache(VueIncrementale):
+    """File des demandes 'En attente' gardée en mémoire (objets Conge, triés par date de début)"""
+
+    STATUT = 'En attente'
+
+    def __init__(self, convertir):
+        """convertir: fonction rows -> objets Conge (ex: GestionConges._convertir_rows_en_conges)"""
+        super().__init__()
+        self._convertir = convertir
+
+    def demandes(self):
+        """Retourne la file (triée par date de début) en la rafraîchissant si nécessaire"""
+        with self._verrou:
+            etat = self._rafraichir()
+            return [etat.elements[demande_id] for demande_id in etat.ordre]
+
+    def _lire_tout(self, cur):
+        return DemandeDAO.lister_par_statut(self.STATUT, cur)
+
+    def _construire(self, rows):
+        return ((conge.id, conge) for conge in self._convertir(rows))
+
+    def _cle_tri(self, demande_id, conge):
+        return conge.date_debut, demande_id
@@ -0,0 +1,163 @@
+"""
+Flux iCalendar des absences validées
+Responsabilité: publier les demandes validées au format .ics (RFC 5545),
+pour un employé, un service ou toute l'entreprise, sans reconstruire tout
+le flux à chaque lecture
+
+- la première génération lit les demandes validées par lots paginés sur
+  l'index (statut, date_debut, id) et met en cache le texte de chaque VEVENT
+- les suivantes ne relisent que les demandes dont seq_modif a augmenté
+  (compteur de modifications, index idx_demandes_seq_modif)
+- l'ETag d'un flux vient des numéros de modification de ses événements:
+  un client qui présente l'ETag courant reçoit « non modifié » sans corps
+"""
+from datetime import datetime, timedelta, timezone
+
+from services.cache_demandes import EtatVue, VueIncrementale
+from services.dao import DemandeDAO
+from utils.validators import lire_date
+
+STATUT = "Validée"
+TAILLE_LOT = 500
+PRODID = "-//Gestion des congés//Absences validées//FR"
+DOMAINE_UID = "gestion-conges"
+
+# Longueur maximale d'une ligne, en octets, avant pliage (RFC 5545, 3.1)
+LONGUEUR_LIGNE = 75
+
+
+class _EtatCalendrier(EtatVue):
+    def __init__(self):
+        super().__init__()
+        # (employe_id, service) -> (seq global, etag, date de modification)
+        self.etags = {}
+
+
+class CalendrierAbsences(VueIncrementale):
+    """
+    Cache des VEVENT des demandes validées, partagé par tous les flux
+    Rafraîchi comme FileAttenteEnCache (VueIncrementale): PRAGMA data_version
+    sur une connexion dédiée, puis compteur de modifications
+    Éléments: id -> (seq_modif, employe_id, service, date_debut, texte du VEVENT)
+
+    Exemple:
+        calendrier = CalendrierAbsences()
+        etag, modification, lignes = calendrier.exporter(service="IT", etag=etag_client)
+        if lignes is not None:  # sinon: 304 Not Modified
+            fichier.writelines(lignes)
+    """
+
+    STATUT = STATUT
+    ETAT = _EtatCalendrier
+
+    def __init__(self, nom="Absences", taille_lot=TAILLE_LOT):
+        super().__init__()
+        self.nom = nom
+        self.taille_lot = taille_lot
+
+    def exporter(self, employe_id=None, service=None, etag=None, modifie_depuis=None):
+        """
+        Flux d'un employé, d'un service, ou de l'entreprise (aucun filtre)
+        etag / modifie_depuis: valeurs If-None-Match / If-Modified-Since du client
+        (une date sans fuseau est lue en UTC, comme les dates HTTP)
+        Retourne (etag, date de dernière modification, lignes): lignes est un
+        générateur des lignes du fichier (CRLF comprises), ou None si le
+        client a déjà la version courante
+        """
+        if modifie_depuis is not None and modifie_depuis.tzinfo is None:
+            modifie_depuis = modifie_depuis.replace(tzinfo=timezone.utc)
+
+        with self._verrou:
+            etat = self._rafraichir()
+            etag_courant, modification = self._etag(etat, employe_id, service)
+            evenements = [texte for (_, e_id, e_service, _, texte) in
+                          (etat.elements[demande_id] for demande_id in etat.ordre)
+                          if (employe_id is None or e_id == employe_id)
+                          and (service is None or e_service == service)]
+
+        if etag == etag_courant or (etag is None and modifie_depuis is not None
+                                    and modification <= modifie_depuis):
+            return etag_courant, modification, None
+        return etag_courant, modification, self._lignes(evenements)
+
+    def _lignes(self, evenements):
+        yield from _plier_lignes(("BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}",
+                                  "CALSCALE:GREGORIAN", "METHOD:PUBLISH",
+                                  f"X-WR-CALNAME:{_echapper(self.nom)}"))
+        yield from evenements
+        yield "END:VCALENDAR\r\n"
+
+    @staticmethod
+    def _etag(etat, employe_id, service):
+        """ETag du flux: plus grand seq_modif et nombre de ses événements (recalculé si le compteur a bougé)"""
+        cle = (employe_id, service)
+        connu = etat.etags.get(cle)
+        if connu is not None and connu[0] == etat.seq:
+            return connu[1], connu[2]
+
+        seqs = [seq for (seq, e_id, e_service, _, _) in etat.elements.values()
+                if (employe_id is None or e_id == employe_id) and (service is None or e_service == service)]
+        etag = f'"{max(seqs, default=0)}-{len(seqs)}"'
+        if connu is not None and connu[1] == etag:
+            modification = connu[2]
+        else:
+            modification = datetime.now(timezone.utc).replace(microsecond=0)
+        etat.etags[cle] = (etat.seq, etag, modification)
+        return etag, modification
+
+    def _lire_tout(self, cur):
+        # Lots lus par clé (statut, date_debut, id) sur l'instantané de la transaction
+        return DemandeDAO.iterer_par_statut(STATUT, self.taille_lot, cur)
+
+    def _construire(self, rows):
+        horodatage = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        return ((row['id'], (row['seq_modif'], row['employe_id'], row['service'],
+                             row['date_debut'], _vevent(row, horodatage)))
+                for row in rows)
+
+    def _cle_tri(self, demande_id, evenement):
+        return evenement[3], demande_id
+
+
+def _vevent(row, horodatage):
+    """Texte d'un VEVENT (journée entière: DTEND est le lendemain du dernier jour d'absence)"""
+    debut = lire_date(row['date_debut'])
+    fin = lire_date(row['date_fin']) + timedelta(days=1)
+    resume = f"{row['prenom']} {row['nom']} - {row['type_conge']}"
+    lignes = [
+        "BEGIN:VEVENT",
+        f"UID:demande-{row['id']}@{DOMAINE_UID}",
+        f"DTSTAMP:{horodatage}",
+        f"DTSTART;VALUE=DATE:{debut:%Y%m%d}",
+        f"DTEND;VALUE=DATE:{fin:%Y%m%d}",
+        f"SUMMARY:{_echapper(resume)}",
+        f"CATEGORIES:{_echapper(row['type_conge'])}",
+        "TRANSP:OPAQUE",
+        "END:VEVENT",
+    ]
+    if row['service']:
+        lignes.insert(-2, f"DESCRIPTION:{_echapper('Service: ' + row['service'])}")
+    return "".join(_plier_lignes(lignes))
+
+
+def _echapper(texte):
+    """Échappement des valeurs TEXT (RFC 5545, 3.3.11)"""
+    return (str(texte).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _plier_lignes(lignes):
+    """Lignes terminées par CRLF, pliées à 75 octets sans couper un caractère UTF-8"""
+    for ligne in lignes:
+        morceaux, courant, taille = [], "", 0
+        for caractere in ligne:
+            octets = len(caractere.encode("utf-8"))
+            # Les lignes de continuation commencent par une espace (1 octet)
+            limite = LONGUEUR_LIGNE if not morceaux else LONGUEUR_LIGNE - 1
+            if taille + octets > limite:
+                morceaux.append(courant)
+                courant, taille = "", 0
+            courant += caractere
+            taille += octets
+        morceaux.append(courant)
+        yield "\r\n ".join(morceaux) + "\r\n"
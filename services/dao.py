@@ -2,9 +2,54 @@
 Data Access Object (DAO) Layer
 Sépare la logique d'accès aux données de la logique métier
 """
-from database import get_connection
+import hashlib
+import re
+
+from database import get_connection, get_read_connection
 from models.employe import Employe
+from models.types_conge import CongeFactory
 from models.utilisateurs import Utilisateur
+from services.resultats import (
+    RESULTAT_OK, RESULTAT_CONFLIT, RESULTAT_SOLDE_INSUFFISANT, RESULTAT_LIMITE_SERVICE,
+    RESULTAT_INTROUVABLE, RESULTAT_INVALIDE
+)
+from utils.planning import pic_absences
+
+
+# Colonnes communes à demandes_conge et demandes_conge_archive
+COLONNES_DEMANDE = ("id, employe_id, date_debut, date_fin, type_conge, statut, commentaire, version, motif, "
+                    "nb_jours, jours_deductibles")
+
+
+def empreinte_demande(employe_id, date_debut, date_fin, type_conge):
+    """Empreinte du contenu d'une demande: deux soumissions identiques ont la même"""
+    contenu = f"{employe_id}|{date_debut}|{date_fin}|{type_conge.strip().lower()}"
+    return hashlib.sha256(contenu.encode()).hexdigest()
+
+
+def durees_demande(type_conge, date_debut, date_fin):
+    """
+    (nb_jours, jours_deductibles) calculés par la classe du type de congé
+    jours_deductibles: jours retirés du solde à la validation (0 si le type ne déduit pas)
+    """
+    conge = CongeFactory.creer_conge(type_conge, None, None, date_debut, date_fin, "En attente")
+    return conge.calculer_jours(), conge.calculer_jours_deductibles() if conge.deduit_du_solde() else 0
+
+
+def _lire(requete, parametres, cur=None):
+    """
+    Exécute une lecture sur le curseur fourni (transaction ou connexion
+    dédiée de l'appelant), sinon sur une connexion en lecture du pool
+    """
+    if cur is not None:
+        cur.execute(requete, parametres)
+        return cur.fetchall()
+
+    conn = get_read_connection()
+    try:
+        return conn.execute(requete, parametres).fetchall()
+    finally:
+        conn.close()
 
 
 class EmployeDAO:
@@ -14,15 +59,15 @@ class EmployeDAO:
     """
 
     @staticmethod
-    def creer(matricule, nom, prenom, service, solde_conges):
-        """Insère un nouvel employé dans la base"""
+    def creer(matricule, nom, prenom, service, solde_conges, manager_id=None):
+        """Insère un nouvel employé dans la base (la hiérarchie suit par trigger)"""
         conn = get_connection()
         cur = conn.cursor()
         try:
             cur.execute("""
-                        INSERT INTO employes (matricule, nom, prenom, service, solde_conges)
-                        VALUES (?, ?, ?, ?, ?)
-                        """, (matricule, nom, prenom, service, solde_conges))
+                        INSERT INTO employes (matricule, nom, prenom, service, solde_conges, manager_id)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        """, (matricule, nom, prenom, service, solde_conges, manager_id))
             conn.commit()
             return cur.lastrowid
         finally:
@@ -31,7 +76,7 @@ class EmployeDAO:
     @staticmethod
     def trouver_par_id(employe_id):
         """Récupère un employé par son ID"""
-        conn = get_connection()
+        conn = get_read_connection()
         cur = conn.cursor()
         try:
             cur.execute("SELECT * FROM employes WHERE id = ?", (employe_id,))
@@ -43,7 +88,7 @@ class EmployeDAO:
     @staticmethod
     def trouver_par_matricule(matricule):
         """Récupère un employé par son matricule"""
-        conn = get_connection()
+        conn = get_read_connection()
         cur = conn.cursor()
         try:
             cur.execute("SELECT * FROM employes WHERE matricule = ?", (matricule,))
@@ -55,7 +100,7 @@ class EmployeDAO:
     @staticmethod
     def lister_tous():
         """Liste tous les employés"""
-        conn = get_connection()
+        conn = get_read_connection()
         cur = conn.cursor()
         try:
             cur.execute("SELECT * FROM employes ORDER BY nom, prenom")
@@ -64,6 +109,71 @@ class EmployeDAO:
         finally:
             conn.close()
 
+    @staticmethod
+    def lister_soldes(cur=None):
+        """(id, service, solde_conges) de tous les employés, par ID"""
+        return _lire("SELECT id, service, solde_conges FROM employes ORDER BY id", (), cur)
+
+    @staticmethod
+    def ids_par_matricule():
+        """Retourne {matricule: id} pour tous les employés (résolution en masse)"""
+        conn = get_read_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT matricule, id FROM employes")
+            return {row['matricule']: row['id'] for row in cur.fetchall()}
+        finally:
+            conn.close()
+
+    @staticmethod
+    def rechercher(terme, limite=20, decalage=0):
+        """
+        Recherche plein texte (FTS5) par matricule, nom, prénom ou service
+        Chaque mot saisi est un préfixe ("mar inf" trouve Martin, Informatique);
+        les résultats sont classés par pertinence (bm25, le matricule et le nom
+        pèsent plus que le service)
+        """
+        requete = EmployeDAO._requete_fts(terme)
+        if not requete:
+            return []
+
+        conn = get_read_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                        SELECT e.*
+                        FROM employes_fts f
+                                 JOIN employes e ON e.id = f.rowid
+                        WHERE employes_fts MATCH ?
+                        ORDER BY bm25(employes_fts, 10.0, 5.0, 3.0, 1.0), e.nom, e.prenom
+                        LIMIT ? OFFSET ?
+                        """, (requete, limite, decalage))
+            rows = cur.fetchall()
+            return [Employe(**row) for row in rows]
+        finally:
+            conn.close()
+
+    @staticmethod
+    def compter_recherche(terme):
+        """Nombre total de résultats d'une recherche (pour la pagination)"""
+        requete = EmployeDAO._requete_fts(terme)
+        if not requete:
+            return 0
+
+        conn = get_read_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT COUNT(*) FROM employes_fts WHERE employes_fts MATCH ?", (requete,))
+            return cur.fetchone()[0]
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _requete_fts(terme):
+        """Transforme une saisie libre en requête FTS5 (mots entre guillemets + préfixe)"""
+        mots = re.findall(r"\w+", terme or "")
+        return " ".join(f'"{mot}"*' for mot in mots)
+
     @staticmethod
     def mettre_a_jour_solde(employe_id, nouveau_solde):
         """Met à jour le solde de congés d'un employé"""
@@ -94,6 +204,81 @@ class EmployeDAO:
         finally:
             conn.close()
 
+    @staticmethod
+    def deplacer(employe_id, manager_id):
+        """
+        Rattache un employé, avec tout son sous-arbre, à un nouveau manager
+        (None: sommet de la hiérarchie). Table de fermeture mise à jour en
+        trois requêtes ensemblistes, quelle que soit la taille du sous-arbre.
+        Retourne RESULTAT_OK, RESULTAT_INTROUVABLE, ou RESULTAT_INVALIDE si le
+        manager fait partie du sous-arbre (cycle)
+        """
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT COUNT(*) FROM employes WHERE id IN (?, ?)", (employe_id, manager_id))
+            if cur.fetchone()[0] != (1 if manager_id is None or manager_id == employe_id else 2):
+                return RESULTAT_INTROUVABLE
+            cur.execute("""
+                        SELECT 1 FROM hierarchie_employes WHERE ancetre_id = ? AND descendant_id = ?
+                        """, (employe_id, manager_id))
+            if cur.fetchone() is not None:
+                return RESULTAT_INVALIDE
+
+            # Liens entre les ancêtres actuels et le sous-arbre
+            cur.execute("""
+                        DELETE FROM hierarchie_employes
+                        WHERE descendant_id IN (SELECT descendant_id FROM hierarchie_employes
+                                                WHERE ancetre_id = :employe)
+                          AND ancetre_id IN (SELECT ancetre_id FROM hierarchie_employes
+                                             WHERE descendant_id = :employe AND ancetre_id != :employe)
+                        """, {"employe": employe_id})
+            # Ancêtres du nouveau manager (lui compris) x sous-arbre
+            cur.execute("""
+                        INSERT INTO hierarchie_employes (ancetre_id, descendant_id, profondeur)
+                        SELECT haut.ancetre_id, bas.descendant_id, haut.profondeur + bas.profondeur + 1
+                        FROM hierarchie_employes haut
+                                 JOIN hierarchie_employes bas ON bas.ancetre_id = :employe
+                        WHERE haut.descendant_id = :manager
+                        """, {"employe": employe_id, "manager": manager_id})
+            cur.execute("UPDATE employes SET manager_id = ? WHERE id = ?", (manager_id, employe_id))
+            conn.commit()
+            return RESULTAT_OK
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def a_des_subordonnes(employe_id):
+        """Indique si l'employé manage au moins une personne"""
+        return bool(_lire("""
+                          SELECT EXISTS(SELECT 1 FROM hierarchie_employes
+                                        WHERE ancetre_id = ? AND profondeur > 0)
+                          """, (employe_id,))[0][0])
+
+    @staticmethod
+    def est_subordonne(employe_id, responsable_id):
+        """Indique si l'employé est sous le responsable, à toute profondeur"""
+        return bool(_lire("""
+                          SELECT EXISTS(SELECT 1 FROM hierarchie_employes
+                                        WHERE ancetre_id = ? AND descendant_id = ? AND profondeur > 0)
+                          """, (responsable_id, employe_id))[0][0])
+
+    @staticmethod
+    def lister_subordonnes(employe_id):
+        """Subordonnés à toute profondeur: [(Employe, profondeur)] par profondeur puis nom"""
+        rows = _lire("""
+                     SELECT e.*, h.profondeur
+                     FROM hierarchie_employes h
+                              JOIN employes e ON e.id = h.descendant_id
+                     WHERE h.ancetre_id = ? AND h.profondeur > 0
+                     ORDER BY h.profondeur, e.nom, e.prenom
+                     """, (employe_id,))
+        return [(Employe(**{key: row[key] for key in row.keys() if key != "profondeur"}), row['profondeur'])
+                for row in rows]
+
     @staticmethod
     def supprimer(employe_id):
         """Supprime un employé"""
@@ -113,25 +298,56 @@ class DemandeDAO:
     Responsabilité: Toutes les opérations CRUD sur la table demandes_conge
     """
 
+    # Regroupements autorisés pour compter_par (colonne SQL, jointure employés nécessaire)
+    REGROUPEMENTS = {
+        "statut": ("d.statut", False),
+        "type_conge": ("d.type_conge", False),
+        "service": ("e.service", True),
+    }
+
     @staticmethod
-    def creer(employe_id, date_debut, date_fin, type_conge, statut, commentaire=""):
-        """Insère une nouvelle demande de congé"""
+    def creer(employe_id, date_debut, date_fin, type_conge, statut, commentaire="", motif=None,
+              cle_idempotence=None):
+        """
+        Insère une nouvelle demande de congé (motif: uniquement pour les congés exceptionnels)
+        Les durées (nb_jours, jours_deductibles) sont calculées ici, une fois
+        Lève sqlite3.IntegrityError si la clé d'idempotence ou l'empreinte du
+        contenu existe déjà (voir trouver_doublon)
+        """
+        nb_jours, jours_deductibles = durees_demande(type_conge, date_debut, date_fin)
         conn = get_connection()
         cur = conn.cursor()
         try:
             cur.execute("""
-                        INSERT INTO demandes_conge (employe_id, date_debut, date_fin, type_conge, statut, commentaire)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                        """, (employe_id, date_debut, date_fin, type_conge, statut, commentaire))
+                        INSERT INTO demandes_conge (employe_id, date_debut, date_fin, type_conge, statut, commentaire,
+                                                    motif, cle_idempotence, empreinte, nb_jours, jours_deductibles)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        """, (employe_id, date_debut, date_fin, type_conge, statut, commentaire, motif,
+                              cle_idempotence, empreinte_demande(employe_id, date_debut, date_fin, type_conge),
+                              nb_jours, jours_deductibles))
             conn.commit()
             return cur.lastrowid
         finally:
             conn.close()
 
+    @staticmethod
+    def trouver_doublon(employe_id, date_debut, date_fin, type_conge, cle_idempotence=None):
+        """
+        ID d'une demande déjà enregistrée avec la même clé d'idempotence, ou
+        le même contenu et non refusée (lecture des deux index uniques), sinon None
+        """
+        rows = _lire("""
+                     SELECT id FROM demandes_conge
+                     WHERE cle_idempotence = ?
+                        OR (empreinte = ? AND statut != 'Refusée')
+                     LIMIT 1
+                     """, (cle_idempotence, empreinte_demande(employe_id, date_debut, date_fin, type_conge)))
+        return rows[0]['id'] if rows else None
+
     @staticmethod
     def trouver_par_id(demande_id):
         """Récupère une demande avec les infos de l'employé"""
-        conn = get_connection()
+        conn = get_read_connection()
         cur = conn.cursor()
         try:
             cur.execute("""
@@ -145,35 +361,237 @@ class DemandeDAO:
             conn.close()
 
     @staticmethod
-    def lister_par_employe(employe_id):
-        """Liste toutes les demandes d'un employé"""
-        conn = get_connection()
+    def lister_par_employe(employe_id, avec_historique=False):
+        """
+        Liste toutes les demandes d'un employé
+        avec_historique: inclut les demandes archivées (UNION ALL avec l'archive)
+        """
+        if avec_historique:
+            source = f"""
+                     (SELECT {COLONNES_DEMANDE} FROM demandes_conge WHERE employe_id = :employe_id
+                      UNION ALL
+                      SELECT {COLONNES_DEMANDE} FROM demandes_conge_archive WHERE employe_id = :employe_id)
+                     """
+        else:
+            source = "demandes_conge"
+
+        conn = get_read_connection()
         cur = conn.cursor()
         try:
-            cur.execute("""
+            cur.execute(f"""
                         SELECT d.*, e.nom, e.prenom, e.matricule, e.solde_conges, e.service
-                        FROM demandes_conge d
+                        FROM {source} d
                                  JOIN employes e ON d.employe_id = e.id
-                        WHERE d.employe_id = ?
+                        WHERE d.employe_id = :employe_id
                         ORDER BY d.date_debut DESC
-                        """, (employe_id,))
+                        """, {"employe_id": employe_id})
             return cur.fetchall()
         finally:
             conn.close()
 
     @staticmethod
-    def lister_par_statut(statut):
+    def lister_par_statut(statut, cur=None):
         """Liste toutes les demandes avec un statut donné"""
-        conn = get_connection()
+        return _lire("""
+                     SELECT d.*, e.nom, e.prenom, e.matricule, e.solde_conges, e.service
+                     FROM demandes_conge d
+                              JOIN employes e ON d.employe_id = e.id
+                     WHERE d.statut = ?
+                     ORDER BY d.date_debut
+                     """, (statut,), cur)
+
+    @staticmethod
+    def lister_sous_arbre(responsable_id, statut=None, cur=None):
+        """
+        Demandes des subordonnés d'un responsable, à toute profondeur (sans les
+        siennes): une jointure sur la table de fermeture, sans requête récursive
+        statut: filtre facultatif (ex: 'En attente')
+        """
+        return _lire("""
+                     SELECT d.*, e.nom, e.prenom, e.matricule, e.solde_conges, e.service
+                     FROM hierarchie_employes h
+                              JOIN demandes_conge d ON d.employe_id = h.descendant_id
+                              JOIN employes e ON d.employe_id = e.id
+                     WHERE h.ancetre_id = :responsable AND h.profondeur > 0
+                       AND (:statut IS NULL OR d.statut = :statut)
+                     ORDER BY d.date_debut, d.id
+                     """, {"responsable": responsable_id, "statut": statut}, cur)
+
+    @staticmethod
+    def lister_modifiees_depuis(seq_modif, cur=None):
+        """
+        Demandes (tous statuts) modifiées après un numéro du compteur de modifications
+        Sert au rafraîchissement incrémental des vues en cache
+        """
+        return _lire("""
+                     SELECT d.*, e.nom, e.prenom, e.matricule, e.solde_conges, e.service
+                     FROM demandes_conge d
+                              JOIN employes e ON d.employe_id = e.id
+                     WHERE d.seq_modif > ?
+                     """, (seq_modif,), cur)
+
+    @staticmethod
+    def lire_compteur_modifications(cur=None):
+        """Valeur courante du compteur de modifications (demandes et employés)"""
+        return _lire("SELECT valeur FROM compteur_modifications WHERE id = 1", (), cur)[0][0]
+
+    @staticmethod
+    def dernier_id(cur=None):
+        """Plus grand ID de demande attribué (0 si aucune)"""
+        return _lire("SELECT COALESCE(MAX(id), 0) FROM demandes_conge", (), cur)[0][0]
+
+    @staticmethod
+    def lister_absences_depuis(date_min, cur=None):
+        """
+        Demandes (archive comprise) qui se terminent à partir de date_min:
+        (employe_id, date_debut, date_fin, type_conge, statut)
+        """
+        return _lire("""
+                     SELECT employe_id, date_debut, date_fin, type_conge, statut
+                     FROM demandes_conge WHERE date_fin >= :date_min
+                     UNION ALL
+                     SELECT employe_id, date_debut, date_fin, type_conge, statut
+                     FROM demandes_conge_archive WHERE date_fin >= :date_min
+                     """, {"date_min": date_min}, cur)
+
+    @staticmethod
+    def compter_par_statut(statut, cur=None):
+        """Nombre de demandes ayant un statut donné (table compteurs_statut, tenue par triggers)"""
+        rows = _lire("SELECT nombre FROM compteurs_statut WHERE statut = ?", (statut,), cur)
+        return rows[0][0] if rows else 0
+
+    @staticmethod
+    def compter_par_statuts(cur=None):
+        """Nombre de demandes par statut: {statut: nombre} (statuts sans demande omis)"""
+        rows = _lire("SELECT statut, nombre FROM compteurs_statut WHERE nombre > 0 ORDER BY statut", (), cur)
+        return {row['statut']: row['nombre'] for row in rows}
+
+    @staticmethod
+    def compter_par(cle, statut=None, cur=None):
+        """
+        Nombre de demandes par statut, type de congé ou service (GROUP BY en SQL)
+        statut: filtre facultatif; retourne {valeur: nombre}
+        """
+        colonne, jointure = DemandeDAO.REGROUPEMENTS[cle]
+        rows = _lire(f"""
+                     SELECT {colonne} AS valeur, COUNT(*) AS nombre
+                     FROM demandes_conge d
+                     {"JOIN employes e ON d.employe_id = e.id" if jointure else ""}
+                     WHERE (:statut IS NULL OR d.statut = :statut)
+                     GROUP BY {colonne}
+                     ORDER BY {colonne}
+                     """, {"statut": statut}, cur)
+        return {row['valeur']: row['nombre'] for row in rows}
+
+    @staticmethod
+    def existe_par_statut(statut, responsable_id=None, cur=None):
+        """
+        Indique s'il existe au moins une demande d'un statut, sans les lire
+        responsable_id: limite aux subordonnés de ce responsable (table de fermeture)
+        """
+        if responsable_id is None:
+            return DemandeDAO.compter_par_statut(statut, cur) > 0
+        return bool(_lire("""
+                          SELECT EXISTS (
+                              SELECT 1
+                              FROM hierarchie_employes h
+                                       JOIN demandes_conge d ON d.employe_id = h.descendant_id
+                              WHERE h.ancetre_id = ? AND h.profondeur > 0 AND d.statut = ?)
+                          """, (responsable_id, statut), cur)[0][0])
+
+    @staticmethod
+    def lister_premieres(statut, limite, cur=None):
+        """Les limite premières demandes d'un statut (ordre date_debut, id), sans lire les suivantes"""
+        return DemandeDAO.lister_par_statut_apres(statut, "", 0, limite, cur)
+
+    @staticmethod
+    def top_absences(limite, date_min=None, date_max=None, statut="Validée", cur=None):
+        """
+        Employés ayant le plus de jours d'absence (nb_jours enregistré) sur les
+        demandes commençant entre date_min et date_max (bornes facultatives)
+        Retourne les rows (employe_id, nom, prenom, service, nb_demandes, jours)
+        """
+        return _lire("""
+                     SELECT t.employe_id, e.nom, e.prenom, e.service, t.nb_demandes, t.jours
+                     FROM (SELECT employe_id, COUNT(*) AS nb_demandes, SUM(nb_jours) AS jours
+                           FROM demandes_conge
+                           WHERE statut = :statut
+                             AND (:date_min IS NULL OR date_debut >= :date_min)
+                             AND (:date_max IS NULL OR date_debut <= :date_max)
+                           GROUP BY employe_id
+                           ORDER BY jours DESC, employe_id
+                           LIMIT :limite) t
+                              JOIN employes e ON t.employe_id = e.id
+                     ORDER BY t.jours DESC, t.employe_id
+                     """, {"statut": statut, "date_min": date_min, "date_max": date_max,
+                           "limite": limite}, cur)
+
+    @staticmethod
+    def iterer_par_statut(statut, taille_lot=200, cur=None, responsable_id=None):
+        """
+        Parcourt les demandes d'un statut (même ordre que lister_par_statut)
+        sans tout charger: une requête courte par lot (lister_par_statut_apres),
+        reprise après la dernière ligne lue (pagination par clé)
+        cur: curseur de l'appelant pour lire tous les lots sur un même
+        instantané; sinon une connexion du pool par lot, rendue entre deux lots
+        responsable_id: seulement les demandes de ses subordonnés (toute profondeur)
+        """
+        derniere_date, dernier_id = "", 0
+        while True:
+            rows = DemandeDAO.lister_par_statut_apres(statut, derniere_date, dernier_id, taille_lot, cur,
+                                                      responsable_id)
+            yield from rows
+            if len(rows) < taille_lot:
+                return
+            derniere_date, dernier_id = rows[-1]['date_debut'], rows[-1]['id']
+
+    @staticmethod
+    def lister_par_statut_apres(statut, derniere_date, dernier_id, limite, cur=None, responsable_id=None):
+        """
+        Lot suivant des demandes d'un statut, ordre (date_debut, id), après la
+        clé (derniere_date, dernier_id): parcours paginé sur idx_demandes_statut_date
+        cur: curseur de l'appelant, pour enchaîner les lots sur un même instantané
+        responsable_id: limite aux subordonnés de ce responsable (table de fermeture)
+        """
+        parametres = {"statut": statut, "date": derniere_date, "id": dernier_id, "limite": limite,
+                      "responsable": responsable_id}
+        if responsable_id is None:
+            return _lire("""
+                         SELECT d.*, e.nom, e.prenom, e.matricule, e.solde_conges, e.service
+                         FROM demandes_conge d
+                                  JOIN employes e ON d.employe_id = e.id
+                         WHERE d.statut = :statut AND (d.date_debut, d.id) > (:date, :id)
+                         ORDER BY d.date_debut, d.id
+                         LIMIT :limite
+                         """, parametres, cur)
+        return _lire("""
+                     SELECT d.*, e.nom, e.prenom, e.matricule, e.solde_conges, e.service
+                     FROM demandes_conge d
+                              JOIN employes e ON d.employe_id = e.id
+                     WHERE d.statut = :statut AND (d.date_debut, d.id) > (:date, :id)
+                       AND d.employe_id IN (SELECT descendant_id FROM hierarchie_employes
+                                            WHERE ancetre_id = :responsable AND profondeur > 0)
+                     ORDER BY d.date_debut, d.id
+                     LIMIT :limite
+                     """, parametres, cur)
+
+    @staticmethod
+    def lister_en_attente_apres(dernier_id, limite):
+        """
+        Liste les demandes en attente d'ID supérieur à dernier_id (ordre d'insertion)
+        Permet de parcourir les nouvelles demandes par lots sans tout relire
+        """
+        conn = get_read_connection()
         cur = conn.cursor()
         try:
             cur.execute("""
                         SELECT d.*, e.nom, e.prenom, e.matricule, e.solde_conges, e.service
                         FROM demandes_conge d
                                  JOIN employes e ON d.employe_id = e.id
-                        WHERE d.statut = ?
-                        ORDER BY d.date_debut
-                        """, (statut,))
+                        WHERE d.statut = 'En attente' AND d.id > ?
+                        ORDER BY d.id
+                        LIMIT ?
+                        """, (dernier_id, limite))
             return cur.fetchall()
         finally:
             conn.close()
@@ -181,7 +599,7 @@ class DemandeDAO:
     @staticmethod
     def lister_toutes():
         """Liste toutes les demandes"""
-        conn = get_connection()
+        conn = get_read_connection()
         cur = conn.cursor()
         try:
             cur.execute("""
@@ -194,6 +612,30 @@ class DemandeDAO:
         finally:
             conn.close()
 
+    @staticmethod
+    def iterer_pour_instantane(cur, taille_lot=10000):
+        """
+        Parcourt toutes les demandes, archive comprise, jointes au service et
+        au solde de l'employé, par lots de tuples
+        (id, employe_id, date_debut, date_fin, type_conge, statut, service, solde_conges, archivee)
+        cur: curseur de l'appelant, dans une transaction de lecture (instantané cohérent)
+        """
+        cur.execute("""
+                    SELECT d.id, d.employe_id, d.date_debut, d.date_fin, d.type_conge, d.statut,
+                           e.service, e.solde_conges, d.archivee
+                    FROM (SELECT id, employe_id, date_debut, date_fin, type_conge, statut, 0 AS archivee
+                          FROM demandes_conge
+                          UNION ALL
+                          SELECT id, employe_id, date_debut, date_fin, type_conge, statut, 1
+                          FROM demandes_conge_archive) d
+                             JOIN employes e ON d.employe_id = e.id
+                    """)
+        while True:
+            lot = cur.fetchmany(taille_lot)
+            if not lot:
+                return
+            yield [tuple(row) for row in lot]
+
     @staticmethod
     def mettre_a_jour_statut(demande_id, nouveau_statut):
         """Met à jour le statut d'une demande"""
@@ -201,7 +643,7 @@ class DemandeDAO:
         cur = conn.cursor()
         try:
             cur.execute(
-                "UPDATE demandes_conge SET statut = ? WHERE id = ?",
+                "UPDATE demandes_conge SET statut = ?, version = version + 1 WHERE id = ?",
                 (nouveau_statut, demande_id)
             )
             conn.commit()
@@ -209,6 +651,166 @@ class DemandeDAO:
         finally:
             conn.close()
 
+    @staticmethod
+    def valider_si_en_attente(demande_id, version, employe_id, jours_a_deduire=0, limite_service=None):
+        """
+        Valide une demande avec verrouillage optimiste
+        La mise à jour n'a lieu que si la demande est toujours 'En attente' et
+        n'a pas changé de version depuis sa lecture. La déduction du solde est
+        gardée (jamais de solde négatif) et faite dans la même transaction.
+        limite_service: (service, max_absents, date_debut, date_fin) - le pic
+        d'absents est vérifié après la mise à jour, donc sous le verrou d'écriture
+        Retourne RESULTAT_OK, RESULTAT_CONFLIT, RESULTAT_SOLDE_INSUFFISANT
+        ou RESULTAT_LIMITE_SERVICE
+        """
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                        UPDATE demandes_conge
+                        SET statut = 'Validée', version = version + 1
+                        WHERE id = ? AND statut = 'En attente' AND version = ?
+                          AND (? = 0 OR (SELECT solde_conges FROM employes WHERE id = ?) >= ?)
+                        """, (demande_id, version, jours_a_deduire, employe_id, jours_a_deduire))
+
+            if cur.rowcount == 0:
+                # Rien n'a été modifié: soit un autre opérateur est passé avant,
+                # soit le solde ne couvre plus la demande
+                cur.execute(
+                    "SELECT 1 FROM demandes_conge WHERE id = ? AND statut = 'En attente' AND version = ?",
+                    (demande_id, version)
+                )
+                if cur.fetchone():
+                    return RESULTAT_SOLDE_INSUFFISANT
+                return RESULTAT_CONFLIT
+
+            if limite_service:
+                service, max_absents, date_debut, date_fin = limite_service
+                absences = DemandeDAO.absences_service(service, date_debut, date_fin, cur)
+                pic, _ = pic_absences(absences, date_debut, date_fin)
+                if pic > max_absents:
+                    conn.rollback()
+                    return RESULTAT_LIMITE_SERVICE
+
+            if jours_a_deduire:
+                cur.execute("""
+                            UPDATE employes
+                            SET solde_conges = solde_conges - ?
+                            WHERE id = ? AND solde_conges >= ?
+                            """, (jours_a_deduire, employe_id, jours_a_deduire))
+                if cur.rowcount == 0:
+                    conn.rollback()
+                    return RESULTAT_SOLDE_INSUFFISANT
+
+            conn.commit()
+            return RESULTAT_OK
+        finally:
+            conn.close()
+
+    @staticmethod
+    def absences_service(service, date_debut, date_fin, cur=None):
+        """
+        Absences validées d'un service qui chevauchent [date_debut, date_fin]
+        Retourne des tuples (employe_id, date_debut, date_fin)
+        cur: curseur d'une transaction en cours (sinon une connexion est ouverte)
+        """
+        requete = """
+                  SELECT d.employe_id, d.date_debut, d.date_fin
+                  FROM demandes_conge d
+                           JOIN employes e ON d.employe_id = e.id
+                  WHERE d.statut = 'Validée'
+                    AND d.date_fin >= ?
+                    AND d.date_debut <= ?
+                    AND e.service = ?
+                  """
+        return [tuple(row) for row in _lire(requete, (date_debut, date_fin, service), cur)]
+
+    @staticmethod
+    def refuser_si_en_attente(demande_id, version):
+        """
+        Refuse une demande avec verrouillage optimiste
+        Retourne RESULTAT_OK ou RESULTAT_CONFLIT
+        """
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                        UPDATE demandes_conge
+                        SET statut = 'Refusée', version = version + 1
+                        WHERE id = ? AND statut = 'En attente' AND version = ?
+                        """, (demande_id, version))
+            conn.commit()
+            return RESULTAT_OK if cur.rowcount > 0 else RESULTAT_CONFLIT
+        finally:
+            conn.close()
+
+    @staticmethod
+    def lister_durees_a_calculer(apres_id, limite, archive=False, toutes=False):
+        """
+        Lot suivant (par ID) des demandes sans durées enregistrées, ou de
+        toutes les demandes si toutes=True: (id, type_conge, date_debut, date_fin)
+        archive: parcourt demandes_conge_archive
+        """
+        table = "demandes_conge_archive" if archive else "demandes_conge"
+        return _lire(f"""
+                     SELECT id, type_conge, date_debut, date_fin FROM {table}
+                     WHERE id > ? AND (? OR nb_jours IS NULL)
+                     ORDER BY id
+                     LIMIT ?
+                     """, (apres_id, toutes, limite))
+
+    @staticmethod
+    def enregistrer_durees(durees, archive=False):
+        """
+        Enregistre un lot de durées (nb_jours, jours_deductibles, id) en une transaction
+        Les lignes déjà à jour ne sont pas réécrites (ni journalisées)
+        """
+        table = "demandes_conge_archive" if archive else "demandes_conge"
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.executemany(f"""
+                            UPDATE {table} SET nb_jours = :nb_jours, jours_deductibles = :deductibles
+                            WHERE id = :id AND (nb_jours IS NOT :nb_jours OR jours_deductibles IS NOT :deductibles)
+                            """, ({"nb_jours": nb_jours, "deductibles": deductibles, "id": demande_id}
+                                  for nb_jours, deductibles, demande_id in durees))
+            conn.commit()
+            return len(durees)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def archiver_lot(date_limite, taille_lot):
+        """
+        Déplace au plus taille_lot demandes traitées (Validée/Refusée) terminées
+        avant date_limite vers demandes_conge_archive, en une transaction
+        Retourne le nombre de demandes archivées (0: plus rien à archiver)
+        """
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                        SELECT id FROM demandes_conge
+                        WHERE statut IN ('Validée', 'Refusée') AND date_fin < ?
+                        LIMIT ?
+                        """, (date_limite, taille_lot))
+            ids = [row['id'] for row in cur.fetchall()]
+            if not ids:
+                return 0
+
+            marqueurs = ", ".join("?" * len(ids))
+            cur.execute(f"""
+                        INSERT INTO demandes_conge_archive ({COLONNES_DEMANDE}, date_archivage)
+                        SELECT {COLONNES_DEMANDE}, datetime('now')
+                        FROM demandes_conge
+                        WHERE id IN ({marqueurs})
+                        """, ids)
+            cur.execute(f"DELETE FROM demandes_conge WHERE id IN ({marqueurs})", ids)
+            conn.commit()
+            return len(ids)
+        finally:
+            conn.close()
+
     @staticmethod
     def supprimer(demande_id):
         """Supprime une demande"""
@@ -222,55 +824,211 @@ class DemandeDAO:
             conn.close()
 
 
-class UtilisateurDAO:
-    """Couche d'accès aux données pour les utilisateurs"""
+class LimiteServiceDAO:
+    """Couche d'accès aux données pour les limites d'absences par service"""
 
     @staticmethod
-    def creer(login, mot_de_passe, role):
-        """Insère un nouvel utilisateur"""
+    def definir(service, max_absents):
+        """Crée ou remplace la limite d'un service"""
         conn = get_connection()
         cur = conn.cursor()
         try:
             cur.execute("""
-                        INSERT INTO utilisateurs (login, mot_de_passe, role)
-                        VALUES (?, ?, ?)
-                        """, (login, mot_de_passe, role))
+                        INSERT INTO limites_absences_service (service, max_absents)
+                        VALUES (?, ?)
+                        ON CONFLICT(service) DO UPDATE SET max_absents = excluded.max_absents
+                        """, (service, max_absents))
             conn.commit()
-            return cur.lastrowid
+            return True
         finally:
             conn.close()
 
     @staticmethod
-    def trouver_par_login(login):
-        """Récupère un utilisateur par son login"""
+    def trouver(service):
+        """Retourne la limite d'un service, ou None s'il n'y en a pas"""
+        conn = get_read_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT max_absents FROM limites_absences_service WHERE service = ?", (service,))
+            row = cur.fetchone()
+            return row['max_absents'] if row else None
+        finally:
+            conn.close()
+
+    @staticmethod
+    def supprimer(service):
+        """Supprime la limite d'un service"""
         conn = get_connection()
         cur = conn.cursor()
         try:
-            cur.execute("SELECT * FROM utilisateurs WHERE login = ?", (login,))
+            cur.execute("DELETE FROM limites_absences_service WHERE service = ?", (service,))
+            conn.commit()
+            return cur.rowcount > 0
+        finally:
+            conn.close()
+
+
+class ImportHistoriqueDAO:
+    """Couche d'accès aux données pour l'import de l'historique des demandes"""
+
+    @staticmethod
+    def lignes_traitees(source):
+        """Retourne le nombre de lignes de la source déjà enregistrées (0 si aucune)"""
+        conn = get_read_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT lignes_traitees FROM reprises_import WHERE source = ?", (source,))
             row = cur.fetchone()
-            return Utilisateur(**row) if row else None
+            return row['lignes_traitees'] if row else 0
         finally:
             conn.close()
 
     @staticmethod
-    def authentifier(login, mot_de_passe):
-        """Authentifie un utilisateur"""
+    def enregistrer_bloc(source, lignes_traitees, demandes, rejetees):
+        """
+        Insère un bloc de demandes (executemany) et avance le point de reprise
+        dans la même transaction: un bloc est enregistré entièrement ou pas du tout
+        demandes: tuples (employe_id, date_debut, date_fin, type_conge, statut, commentaire, motif,
+        nb_jours, jours_deductibles, empreinte)
+        Une demande dont l'empreinte existe déjà (index unique des demandes non
+        refusées) est ignorée. Retourne le nombre de demandes insérées.
+        """
         conn = get_connection()
         cur = conn.cursor()
         try:
-            cur.execute(
-                "SELECT * FROM utilisateurs WHERE login = ? AND mot_de_passe = ?",
-                (login, mot_de_passe)
-            )
+            cur.executemany("""
+                            INSERT INTO demandes_conge (employe_id, date_debut, date_fin, type_conge, statut,
+                                                        commentaire, motif, nb_jours, jours_deductibles, empreinte)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                            ON CONFLICT DO NOTHING
+                            """, demandes)
+            # executemany cumule les lignes insérées (sans celles des triggers)
+            inserees = cur.rowcount
+            cur.execute("""
+                        INSERT INTO reprises_import (source, lignes_traitees, importees, rejetees, date_maj)
+                        VALUES (?, ?, ?, ?, datetime('now'))
+                        ON CONFLICT(source) DO UPDATE SET lignes_traitees = excluded.lignes_traitees,
+                                                          importees = importees + excluded.importees,
+                                                          rejetees = rejetees + excluded.rejetees,
+                                                          date_maj = excluded.date_maj
+                        """, (source, lignes_traitees, inserees, rejetees))
+            conn.commit()
+            return inserees
+        finally:
+            conn.close()
+
+
+class JournalModificationsDAO:
+    """Couche d'accès aux données pour le flux de modifications (journal_modifications)"""
+
+    # Colonnes renvoyées aux clients pour chaque table suivie
+    COLONNES = {
+        "employes": "id, matricule, nom, prenom, service, solde_conges",
+        "demandes_conge": COLONNES_DEMANDE,
+    }
+
+    @staticmethod
+    def lister_depuis(curseur, limite, cur=None):
+        """Entrées du journal de seq > curseur, par seq croissant: (seq, table_nom, ligne_id, operation)"""
+        return _lire("""
+                     SELECT seq, table_nom, ligne_id, operation
+                     FROM journal_modifications
+                     WHERE seq > ?
+                     ORDER BY seq
+                     LIMIT ?
+                     """, (curseur, limite), cur)
+
+    @staticmethod
+    def dernier_seq(cur=None):
+        """Curseur le plus récent (0 si le journal est vide)"""
+        return _lire("SELECT COALESCE(MAX(seq), 0) FROM journal_modifications", (), cur)[0][0]
+
+    @staticmethod
+    def lire_lignes(table_nom, ids, cur=None):
+        """État courant des lignes d'une table suivie, {id: row}"""
+        if not ids:
+            return {}
+        marqueurs = ", ".join("?" * len(ids))
+        rows = _lire(f"SELECT {JournalModificationsDAO.COLONNES[table_nom]} FROM {table_nom} "
+                     f"WHERE id IN ({marqueurs})", tuple(ids), cur)
+        return {row['id']: row for row in rows}
+
+
+class UtilisateurDAO:
+    """Couche d'accès aux données pour les utilisateurs"""
+
+    @staticmethod
+    def creer(login, mot_de_passe, role, employe_id=None):
+        """Insère un nouvel utilisateur (employe_id: fiche employé liée au compte)"""
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                        INSERT INTO utilisateurs (login, mot_de_passe, role, employe_id)
+                        VALUES (?, ?, ?, ?)
+                        """, (login, mot_de_passe, role, employe_id))
+            conn.commit()
+            return cur.lastrowid
+        finally:
+            conn.close()
+
+    @staticmethod
+    def trouver_par_login(login):
+        """Récupère un utilisateur par son login, avec sa fiche employé liée (une requête)"""
+        conn = get_read_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                        SELECT u.id, u.login, u.mot_de_passe, u.role,
+                               e.id AS employe_id, e.matricule, e.nom, e.prenom, e.service, e.solde_conges
+                        FROM utilisateurs u
+                                 LEFT JOIN employes e ON e.id = u.employe_id
+                        WHERE u.login = ?
+                        """, (login,))
             row = cur.fetchone()
-            return Utilisateur(**row) if row else None
         finally:
             conn.close()
 
+        if not row:
+            return None
+
+        employe = None
+        if row['employe_id'] is not None:
+            employe = Employe(row['employe_id'], row['matricule'], row['nom'], row['prenom'],
+                              row['service'], row['solde_conges'])
+
+        return Utilisateur(row['id'], row['login'], row['mot_de_passe'], row['role'],
+                           row['employe_id'], employe)
+
+    @staticmethod
+    def trouver_employe_du_login(login):
+        """
+        ID de l'employé dont le matricule est le login, sinon de l'unique
+        employé dont prenom.nom est le login (homonymes: None)
+        """
+        return _lire("""
+                     SELECT COALESCE(
+                         (SELECT id FROM employes WHERE matricule = :login),
+                         (SELECT MIN(id) FROM employes
+                          WHERE lower(prenom || '.' || nom) = lower(:login)
+                          GROUP BY lower(prenom || '.' || nom) HAVING COUNT(*) = 1))
+                     """, {"login": login})[0][0]
+
+    @staticmethod
+    def authentifier(login, mot_de_passe):
+        """
+        Authentifie un utilisateur (vérification de l'empreinte dans le thread appelant;
+        ServiceAuthentification passe par le pool de vérification)
+        """
+        utilisateur = UtilisateurDAO.trouver_par_login(login)
+        if utilisateur and utilisateur.verifier_mot_de_passe(mot_de_passe):
+            return utilisateur
+        return None
+
     @staticmethod
     def trouver_par_id(user_id):
         """Récupère un utilisateur par son ID"""
-        conn = get_connection()
+        conn = get_read_connection()
         cur = conn.cursor()
         try:
             cur.execute("SELECT * FROM utilisateurs WHERE id = ?", (user_id,))
@@ -282,7 +1040,7 @@ class UtilisateurDAO:
     @staticmethod
     def lister_tous():
         """Liste tous les utilisateurs"""
-        conn = get_connection()
+        conn = get_read_connection()
         cur = conn.cursor()
         try:
             cur.execute("SELECT * FROM utilisateurs ORDER BY login")
@@ -318,6 +1076,49 @@ class UtilisateurDAO:
         finally:
             conn.close()
 
+    @staticmethod
+    def lier_employe_si_libre(user_id, employe_id):
+        """Rattache un compte à une fiche employé s'il n'est encore lié à aucune"""
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("UPDATE utilisateurs SET employe_id = ? WHERE id = ? AND employe_id IS NULL",
+                        (employe_id, user_id))
+            conn.commit()
+            return cur.rowcount > 0
+        finally:
+            conn.close()
+
+    @staticmethod
+    def lier_employe(user_id, employe_id):
+        """Rattache un compte utilisateur à une fiche employé"""
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("UPDATE utilisateurs SET employe_id = ? WHERE id = ?", (employe_id, user_id))
+            conn.commit()
+            return cur.rowcount > 0
+        finally:
+            conn.close()
+
+    @staticmethod
+    def remplacer_mot_de_passe_si_inchange(user_id, ancien, nouveau):
+        """
+        Remplace la valeur stockée seulement si elle vaut encore ancien
+        (migration vers une empreinte sans écraser un changement concurrent)
+        """
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "UPDATE utilisateurs SET mot_de_passe = ? WHERE id = ? AND mot_de_passe = ?",
+                (nouveau, user_id, ancien)
+            )
+            conn.commit()
+            return cur.rowcount > 0
+        finally:
+            conn.close()
+
     @staticmethod
     def modifier_mot_de_passe(user_id, nouveau_mdp):
         """Modifie le mot de passe d'un utilisateur"""
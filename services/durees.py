@@ -0,0 +1,44 @@
+"""
+Service de calcul des durées enregistrées
+Responsabilité: remplir nb_jours et jours_deductibles des demandes qui n'en
+ont pas, archive comprise, avec les règles des classes de congé
+
+Les nouvelles demandes reçoivent leurs durées à l'insertion (DemandeDAO.creer,
+import de l'historique), et un trigger les recalcule quand les dates ou le
+type changent; ce traitement ne relit que les lignes restées sans durées.
+Après un changement de règle de calcul (ex: calendrier des jours ouvrés),
+toutes=True recalcule l'ensemble.
+"""
+from services.dao import DemandeDAO, durees_demande
+
+# Demandes mises à jour par transaction (verrou d'écriture rendu entre deux lots)
+TAILLE_LOT_DEFAUT = 1000
+
+
+def recalculer_durees(taille_lot=TAILLE_LOT_DEFAUT, toutes=False):
+    """
+    Calcule et enregistre les durées par lots, table courante puis archive
+    Retourne {"calculees": n, "ignorees": n, "lots": n}; une demande dont
+    le type ou les dates ne s'analysent pas est ignorée (durées laissées vides)
+    """
+    resume = {"calculees": 0, "ignorees": 0, "lots": 0}
+    for archive in (False, True):
+        dernier_id = 0
+        while True:
+            rows = DemandeDAO.lister_durees_a_calculer(dernier_id, taille_lot, archive, toutes)
+            if not rows:
+                break
+
+            durees = []
+            for row in rows:
+                try:
+                    durees.append((*durees_demande(row['type_conge'], row['date_debut'], row['date_fin']),
+                                   row['id']))
+                except (ValueError, TypeError):
+                    resume["ignorees"] += 1
+
+            resume["calculees"] += DemandeDAO.enregistrer_durees(durees, archive)
+            resume["lots"] += 1
+            dernier_id = rows[-1]['id']
+
+    return resume
@@ -2,11 +2,22 @@
 Service de gestion des congés
 Responsabilité: Logique métier et orchestration des opérations
 """
-from models.types_conge import CongeFactory
-from utils.validators import valider_periode
-from services.dao import EmployeDAO, DemandeDAO
-
+import sqlite3
 
+from database import portee_locataire
+from models.types_conge import CongeFactory
+from utils.validators import valider_periode, lire_date
+from utils.planning import pic_absences
+from services.dao import EmployeDAO, DemandeDAO, LimiteServiceDAO
+from services.cache_demandes import FileAttenteEnCache
+from services.resultats import (
+    RESULTAT_OK, RESULTAT_INTROUVABLE, RESULTAT_DEJA_TRAITEE, RESULTAT_INVALIDE,
+    RESULTAT_SOLDE_INSUFFISANT, RESULTAT_LIMITE_SERVICE, RESULTAT_CONFLIT, RESULTAT_NON_AUTORISE,
+    RESULTAT_ERREUR
+)
+
+
+@portee_locataire
 class GestionConges:
     """
     Classe de gestion centrale - Service applicatif
@@ -14,27 +25,89 @@ class GestionConges:
     - Orchestrer les opérations métier
     - Valider les règles métier
     - Coordonner l'accès aux données via les DAO
+    locataire: société dont la base est utilisée (None = base du contexte courant)
     """
 
     SOLDE_INITIAL_ANNUEL = 22
 
-    def add_employe(self, matricule, nom, prenom, service, solde=None):
+    def __init__(self, locataire=None):
+        self.locataire = locataire
+        # File d'attente en cache, partagée par les appels successifs (menu RH 3, 4, 5)
+        self._file_attente = FileAttenteEnCache(self._convertir_rows_en_conges)
+
+    def add_employe(self, matricule, nom, prenom, service, solde=None, manager_id=None):
         """
         Ajoute un employé
         Cette méthode appartient à GestionConges car elle orchestre une opération métier,
         pas à Employe qui est un objet de données
+        manager_id: manager direct (None: sommet de la hiérarchie)
+        Retourne l'ID de l'employé, ou False
         """
         if solde is None:
             solde = self.SOLDE_INITIAL_ANNUEL
 
         try:
-            employe_id = EmployeDAO.creer(matricule, nom, prenom, service, solde)
+            employe_id = EmployeDAO.creer(matricule, nom, prenom, service, solde, manager_id)
             print(f"✅ Employé ajouté avec un solde de {solde} jours (ID: {employe_id})")
-            return True
+            return employe_id
         except Exception as e:
             print(f"❌ Erreur lors de l'ajout: {e}")
             return False
 
+    def definir_manager(self, employe_id, manager_id):
+        """Rattache un employé (et ses subordonnés) à un manager, None pour le détacher"""
+        resultat, message = self.tenter_rattachement(employe_id, manager_id)
+        print(f"✅ {message}" if resultat == RESULTAT_OK else f"❌ {message}")
+        return resultat == RESULTAT_OK
+
+    def tenter_rattachement(self, employe_id, manager_id):
+        """
+        Rattache un employé sans rien afficher
+        Retourne (code résultat, message) - voir services.resultats
+        """
+        try:
+            resultat = EmployeDAO.deplacer(employe_id, manager_id)
+        except Exception as e:
+            return RESULTAT_ERREUR, f"Erreur: {e}"
+
+        if resultat == RESULTAT_INTROUVABLE:
+            return resultat, "Employé ou manager introuvable"
+        if resultat == RESULTAT_INVALIDE:
+            return resultat, "Le manager fait partie des subordonnés de l'employé"
+        if manager_id is None:
+            return RESULTAT_OK, f"Employé {employe_id} placé au sommet de la hiérarchie"
+        return RESULTAT_OK, f"Employé {employe_id} rattaché au manager {manager_id}"
+
+    def perimetre_validation(self, utilisateur):
+        """
+        Responsable dont les subordonnés délimitent les demandes à traiter:
+        l'employé lié au compte RH s'il manage quelqu'un, sinon None (toute la file)
+        """
+        try:
+            return self._perimetre(utilisateur)
+        except Exception as e:
+            print(f"❌ Erreur: {e}")
+            return None
+
+    def _perimetre(self, utilisateur):
+        if utilisateur.employe_id is None:
+            return None
+        return utilisateur.employe_id if EmployeDAO.a_des_subordonnes(utilisateur.employe_id) else None
+
+    def _refus_hors_perimetre(self, utilisateur, row):
+        """
+        Motif pour lequel utilisateur ne peut pas traiter la demande row, sinon None
+        (utilisateur None: traitement système, sans restriction)
+        """
+        if utilisateur is None:
+            return None
+        if not utilisateur.est_rh():
+            return "Seul un compte RH peut traiter les demandes"
+        responsable_id = self._perimetre(utilisateur)
+        if responsable_id is not None and not EmployeDAO.est_subordonne(row['employe_id'], responsable_id):
+            return "Demande hors de votre périmètre"
+        return None
+
     def list_employes(self):
         """Liste tous les employés via le DAO"""
         try:
@@ -43,28 +116,91 @@ class GestionConges:
             print(f"❌ Erreur lors de la récupération: {e}")
             return []
 
-    def ajouter_demande(self, employe_id, date_debut, date_fin, type_conge, commentaire="", **kwargs):
+    def definir_limite_absences(self, service, max_absents):
+        """
+        Fixe le nombre maximal d'employés d'un service absents le même jour
+        max_absents=None supprime la limite
+        """
+        try:
+            if max_absents is None:
+                LimiteServiceDAO.supprimer(service)
+                print(f"✅ Limite supprimée pour le service {service}")
+            else:
+                if max_absents < 0:
+                    print("❌ La limite ne peut pas être négative")
+                    return False
+                LimiteServiceDAO.definir(service, max_absents)
+                print(f"✅ Service {service}: au plus {max_absents} absent(s) par jour")
+            return True
+        except Exception as e:
+            print(f"❌ Erreur: {e}")
+            return False
+
+    def rechercher_employes(self, terme, page=1, taille_page=20):
+        """
+        Recherche des employés par nom, prénom, service ou matricule (partiels)
+        Retourne (employés de la page, nombre total de résultats)
+        """
+        try:
+            decalage = (max(page, 1) - 1) * taille_page
+            employes = EmployeDAO.rechercher(terme, taille_page, decalage)
+            total = EmployeDAO.compter_recherche(terme)
+            return employes, total
+        except Exception as e:
+            print(f"❌ Erreur lors de la recherche: {e}")
+            return [], 0
+
+    def ajouter_demande(self, employe_id, date_debut, date_fin, type_conge, commentaire="",
+                        cle_idempotence=None, **kwargs):
         """
         Ajoute une demande de congé avec validation métier
         Cette méthode ne devrait PAS être dans Employe car elle nécessite
         l'accès à la base de données et l'orchestration de plusieurs opérations
+        Retourne l'ID de la demande créée (ou déjà enregistrée), ou False en cas d'échec
         """
-        # 1. Valider les dates
-        valide, message = valider_periode(date_debut, date_fin)
-        if not valide:
+        resultat, message, demande_id = self.tenter_ajout_demande(
+            employe_id, date_debut, date_fin, type_conge, commentaire, cle_idempotence, **kwargs
+        )
+
+        if resultat != RESULTAT_OK:
             print(f"❌ {message}")
             return False
 
+        print(f"✅ {message}")
+        return demande_id
+
+    def tenter_ajout_demande(self, employe_id, date_debut, date_fin, type_conge, commentaire="",
+                             cle_idempotence=None, **kwargs):
+        """
+        Ajoute une demande sans rien afficher
+        Retourne (code résultat, message, ID de la demande ou None)
+        Idempotente: une soumission rejouée (même cle_idempotence) ou identique
+        à une demande non refusée (même employé, dates et type) retourne l'ID
+        existant, sans revalider ni insérer
+        """
+        # 1. Valider les dates, enregistrées au format ISO (2026-06-01, pas 2026-6-1):
+        # les comparaisons et tris SQL sur le texte restent justes
+        valide, message = valider_periode(date_debut, date_fin)
+        if not valide:
+            return RESULTAT_INVALIDE, message, None
+        date_debut, date_fin = lire_date(date_debut).isoformat(), lire_date(date_fin).isoformat()
+
+        # Soumission déjà enregistrée: réponse directe depuis les index uniques
+        try:
+            existante = DemandeDAO.trouver_doublon(employe_id, date_debut, date_fin, type_conge, cle_idempotence)
+        except Exception as e:
+            return RESULTAT_ERREUR, f"Erreur d'accès aux données: {e}", None
+        if existante is not None:
+            return RESULTAT_OK, f"Demande déjà enregistrée - ID: {existante}", existante
+
         # 2. Récupérer l'employé via DAO
         try:
             employe = EmployeDAO.trouver_par_id(employe_id)
         except Exception as e:
-            print(f"❌ Erreur d'accès aux données: {e}")
-            return False
+            return RESULTAT_ERREUR, f"Erreur d'accès aux données: {e}", None
 
         if not employe:
-            print("❌ Employé non trouvé")
-            return False
+            return RESULTAT_INTROUVABLE, "Employé non trouvé", None
 
         # 3. Créer l'objet Conge avec le Factory Pattern (polymorphisme)
         try:
@@ -79,15 +215,13 @@ class GestionConges:
                 **kwargs
             )
         except ValueError as e:
-            print(f"❌ {e}")
-            return False
+            return RESULTAT_INVALIDE, str(e), None
 
         # 4. Valider la demande selon les règles métier (polymorphisme)
         valide, message = conge.valider_demande(employe.solde_conges)
 
         if not valide:
-            print(f"❌ {message}")
-            return False
+            return RESULTAT_INVALIDE, message, None
 
         # 5. Enregistrer via DAO
         try:
@@ -97,30 +231,60 @@ class GestionConges:
                 date_fin,
                 conge.get_type(),
                 "En attente",
-                commentaire
+                commentaire,
+                getattr(conge, 'motif', None),
+                cle_idempotence
             )
-            jours = conge.calculer_jours()
-            print(f"✅ Demande de {jours} jours ajoutée ({conge.get_type()}) - ID: {demande_id}")
-            return True
+        except sqlite3.IntegrityError as e:
+            # Soumission identique enregistrée entre la vérification et l'insertion
+            existante = DemandeDAO.trouver_doublon(employe_id, date_debut, date_fin, type_conge, cle_idempotence)
+            if existante is None:
+                return RESULTAT_ERREUR, f"Erreur lors de l'enregistrement: {e}", None
+            return RESULTAT_OK, f"Demande déjà enregistrée - ID: {existante}", existante
         except Exception as e:
-            print(f"❌ Erreur lors de l'enregistrement: {e}")
-            return False
+            return RESULTAT_ERREUR, f"Erreur lors de l'enregistrement: {e}", None
+
+        jours = conge.calculer_jours()
+        return (RESULTAT_OK,
+                f"Demande de {jours} jours ajoutée ({conge.get_type()}) - ID: {demande_id}",
+                demande_id)
 
-    def valider_demande(self, demande_id):
+    def valider_demande(self, demande_id, utilisateur=None):
         """
         Valide une demande - Exemple d'orchestration de plusieurs opérations
+        Plusieurs opérateurs RH peuvent valider en parallèle: un conflit est
+        signalé au lieu de traiter (et déduire) deux fois la même demande
+        utilisateur: compte qui valide (voir tenter_validation)
+        """
+        resultat, message = self.tenter_validation(demande_id, utilisateur)
+
+        if resultat == RESULTAT_OK:
+            print(f"✅ {message}")
+        else:
+            print(f"❌ {message}")
+
+        return resultat == RESULTAT_OK
+
+    def tenter_validation(self, demande_id, utilisateur=None):
+        """
+        Valide une demande sans rien afficher
+        utilisateur: compte qui valide, limité aux demandes de ses subordonnés
+        s'il en a (perimetre_validation); None pour un traitement système
+        Retourne (code résultat, message) - voir services.resultats
         """
         try:
             # 1. Récupérer la demande via DAO
             row = DemandeDAO.trouver_par_id(demande_id)
 
             if not row:
-                print("❌ Demande introuvable")
-                return False
+                return RESULTAT_INTROUVABLE, "Demande introuvable"
+
+            refus = self._refus_hors_perimetre(utilisateur, row)
+            if refus:
+                return RESULTAT_NON_AUTORISE, refus
 
             if row['statut'] != 'En attente':
-                print(f"❌ Cette demande a déjà été {row['statut']}")
-                return False
+                return RESULTAT_DEJA_TRAITEE, f"Cette demande a déjà été {row['statut']}"
 
             # 2. Créer l'objet Conge (polymorphisme)
             conge = CongeFactory.creer_conge(
@@ -130,69 +294,219 @@ class GestionConges:
                 row['date_debut'],
                 row['date_fin'],
                 row['statut'],
-                row['commentaire']
+                row['commentaire'],
+                motif=row['motif'] or ''
             )
 
             # 3. Valider selon les règles métier (polymorphisme)
             valide, message = conge.valider_demande(row['solde_conges'])
 
             if not valide:
-                print(f"❌ VALIDATION IMPOSSIBLE!")
-                print(f"   Employé: {row['nom']} {row['prenom']}")
-                print(f"   {message}")
-                return False
-
-            # 4. Mettre à jour le statut via DAO
-            DemandeDAO.mettre_a_jour_statut(demande_id, 'Validée')
-
-            # 5. Déduire du solde si nécessaire (polymorphisme)
-            if conge.deduit_du_solde():
-                jours_a_deduire = conge.calculer_jours_deductibles()
-                EmployeDAO.deduire_jours(row['employe_id'], jours_a_deduire)
-                print(f"✅ Demande validée - {jours_a_deduire} jours déduits")
-            else:
-                print(f"✅ Demande validée ({conge.get_type()} - pas de déduction)")
+                return RESULTAT_INVALIDE, (f"VALIDATION IMPOSSIBLE!\n"
+                                           f"   Employé: {row['nom']} {row['prenom']}\n"
+                                           f"   {message}")
+
+            # 4. Limite d'absents simultanés du service (vérifiée dans la transaction)
+            limite_service = None
+            max_absents = LimiteServiceDAO.trouver(row['service']) if row['service'] else None
+            if max_absents is not None:
+                limite_service = (row['service'], max_absents, row['date_debut'], row['date_fin'])
+
+            # 5. Mettre à jour le statut et le solde de façon conditionnelle (polymorphisme)
+            jours_a_deduire = conge.calculer_jours_deductibles() if conge.deduit_du_solde() else 0
+            resultat = DemandeDAO.valider_si_en_attente(
+                demande_id, row['version'], row['employe_id'], jours_a_deduire, limite_service
+            )
 
-            return True
+            if resultat == RESULTAT_CONFLIT:
+                return resultat, "Conflit: la demande a été traitée par un autre opérateur entre-temps"
+            if resultat == RESULTAT_LIMITE_SERVICE:
+                absences = DemandeDAO.absences_service(row['service'], row['date_debut'], row['date_fin'])
+                absences.append((row['employe_id'], row['date_debut'], row['date_fin']))
+                pic, jour = pic_absences(absences, row['date_debut'], row['date_fin'])
+                return resultat, (f"Limite d'absences du service {row['service']} dépassée: "
+                                  f"{pic} absents le {jour} (maximum {max_absents})")
+            if resultat == RESULTAT_SOLDE_INSUFFISANT:
+                return resultat, (f"Solde insuffisant au moment de la validation "
+                                  f"({jours_a_deduire} jours demandés)")
+
+            if jours_a_deduire:
+                return RESULTAT_OK, f"Demande validée - {jours_a_deduire} jours déduits"
+            return RESULTAT_OK, f"Demande validée ({conge.get_type()} - pas de déduction)"
 
         except Exception as e:
-            print(f"❌ Erreur lors de la validation: {e}")
-            return False
+            return RESULTAT_ERREUR, f"Erreur lors de la validation: {e}"
+
+    def refuser_demande(self, demande_id, utilisateur=None):
+        """Refuse une demande (utilisateur: compte qui refuse, voir tenter_refus)"""
+        resultat, message = self.tenter_refus(demande_id, utilisateur)
+
+        if resultat == RESULTAT_OK:
+            print(f"✅ {message}")
+        else:
+            print(f"❌ {message}")
+
+        return resultat == RESULTAT_OK
 
-    def refuser_demande(self, demande_id):
-        """Refuse une demande"""
+    def tenter_refus(self, demande_id, utilisateur=None):
+        """
+        Refuse une demande sans rien afficher
+        utilisateur: compte qui refuse, même périmètre que tenter_validation
+        Retourne (code résultat, message) - voir services.resultats
+        """
         try:
             row = DemandeDAO.trouver_par_id(demande_id)
 
             if not row:
-                print("❌ Demande introuvable")
-                return False
+                return RESULTAT_INTROUVABLE, "Demande introuvable"
+
+            refus = self._refus_hors_perimetre(utilisateur, row)
+            if refus:
+                return RESULTAT_NON_AUTORISE, refus
 
             if row['statut'] != 'En attente':
-                print(f"❌ Cette demande a déjà été {row['statut']}")
-                return False
+                return RESULTAT_DEJA_TRAITEE, f"Cette demande a déjà été {row['statut']}"
 
-            DemandeDAO.mettre_a_jour_statut(demande_id, 'Refusée')
-            print("✅ Demande refusée")
-            return True
+            resultat = DemandeDAO.refuser_si_en_attente(demande_id, row['version'])
+
+            if resultat == RESULTAT_CONFLIT:
+                return resultat, "Conflit: la demande a été traitée par un autre opérateur entre-temps"
+            return RESULTAT_OK, "Demande refusée"
 
+        except Exception as e:
+            return RESULTAT_ERREUR, f"Erreur: {e}"
+
+    def lister_demandes_en_attente(self, responsable_id=None):
+        """
+        Liste les demandes en attente avec objets polymorphiques
+        Servie depuis le cache, rafraîchi seulement si les données ont changé
+        responsable_id: seulement les demandes de ses subordonnés (toute profondeur)
+        """
+        try:
+            if responsable_id is not None:
+                return self._convertir_rows_en_conges(DemandeDAO.lister_sous_arbre(responsable_id, 'En attente'))
+            return self._file_attente.demandes()
+        except Exception as e:
+            print(f"❌ Erreur: {e}")
+            return []
+
+    def a_des_demandes_en_attente(self, responsable_id=None):
+        """
+        Indique s'il reste des demandes en attente, sans les charger
+        responsable_id: seulement parmi ses subordonnés (toute profondeur)
+        """
+        try:
+            return DemandeDAO.existe_par_statut('En attente', responsable_id)
         except Exception as e:
             print(f"❌ Erreur: {e}")
             return False
 
-    def lister_demandes_en_attente(self):
-        """Liste les demandes en attente avec objets polymorphiques"""
+    def compter_demandes_par_statut(self):
+        """Nombre de demandes par statut ({statut: nombre}), lu dans la table des compteurs"""
+        try:
+            return DemandeDAO.compter_par_statuts()
+        except Exception as e:
+            print(f"❌ Erreur: {e}")
+            return {}
+
+    def compter_demandes(self, par="statut", statut=None):
+        """
+        Nombre de demandes regroupées par 'statut', 'type_conge' ou 'service'
+        statut: filtre facultatif (ex: les demandes en attente par service)
+        """
+        if par not in DemandeDAO.REGROUPEMENTS:
+            print(f"❌ Regroupement inconnu: {par} ({', '.join(DemandeDAO.REGROUPEMENTS)})")
+            return {}
+        try:
+            return DemandeDAO.compter_par(par, statut)
+        except Exception as e:
+            print(f"❌ Erreur: {e}")
+            return {}
+
+    def premieres_demandes_en_attente(self, limite=10):
+        """Les limite plus anciennes demandes en attente (par date de début), objets polymorphiques"""
+        try:
+            return self._convertir_rows_en_conges(DemandeDAO.lister_premieres('En attente', limite))
+        except Exception as e:
+            print(f"❌ Erreur: {e}")
+            return []
+
+    def top_absences(self, limite=10, date_min=None, date_max=None):
+        """
+        Employés ayant le plus de jours d'absence validés sur la période
+        Retourne [{"employe_id", "nom", "prenom", "service", "nb_demandes", "jours"}]
+        """
+        try:
+            return [dict(row) for row in DemandeDAO.top_absences(limite, date_min, date_max)]
+        except Exception as e:
+            print(f"❌ Erreur: {e}")
+            return []
+
+    def attendre_nouvelles_demandes(self, apres_id=None, timeout=30.0):
+        """
+        Attend l'arrivée de demandes en attente (attente longue, au plus timeout secondes)
+        apres_id: valeur retournée par l'appel précédent (None: à partir de maintenant)
+        Retourne (dernier_id, nouvelles demandes en objets polymorphiques);
+        nouvelles vaut None si la surveillance a été arrêtée (base fermée
+        après inactivité): un nouvel appel la redémarre
+        Tous les appelants partagent un seul thread de surveillance par base
+        """
+        from services.notifications import NotificateurDemandes
+
+        try:
+            notificateur = NotificateurDemandes.partage()
+            if apres_id is None:
+                apres_id = notificateur.dernier_id()
+            dernier_id, rows = notificateur.attendre(apres_id, timeout)
+            if rows is None:
+                return dernier_id, None
+            return dernier_id, self._convertir_rows_en_conges(rows)
+        except Exception as e:
+            print(f"❌ Erreur: {e}")
+            return apres_id, []
+
+    def iterer_demandes_en_attente(self, taille_lot=200, responsable_id=None):
+        """
+        Itérateur paresseux sur les demandes en attente (objets polymorphiques)
+        Pour l'affichage page par page de longues files d'attente
+        responsable_id: seulement les demandes de ses subordonnés (toute profondeur)
+        """
+        rows = DemandeDAO.iterer_par_statut('En attente', taille_lot, responsable_id=responsable_id)
+
+        lot_rows = []
+        for row in rows:
+            lot_rows.append(row)
+            if len(lot_rows) >= taille_lot:
+                yield from self._convertir_rows_en_conges(lot_rows)
+                lot_rows = []
+        yield from self._convertir_rows_en_conges(lot_rows)
+
+    def reverifier_demandes_en_attente(self):
+        """
+        Re-vérifie toutes les demandes en attente (ex: après un changement de
+        règles) avec le moteur vectorisé
+        Retourne la liste des (id, message) des demandes devenues invalides
+        """
+        # Import local: NumPy n'est chargé que pour les traitements par lot
+        from models.validation_lot import valider_rows
+
         try:
             rows = DemandeDAO.lister_par_statut('En attente')
-            return self._convertir_rows_en_conges(rows)
+            if not rows:
+                return []
+            ids, resultat = valider_rows(rows)
+            return [(int(ids[i]), resultat.messages[i]) for i in (~resultat.valides).nonzero()[0]]
         except Exception as e:
             print(f"❌ Erreur: {e}")
             return []
 
-    def lister_demandes_par_employe(self, employe_id):
-        """Liste les demandes d'un employé"""
+    def lister_demandes_par_employe(self, employe_id, avec_historique=False):
+        """
+        Liste les demandes d'un employé
+        avec_historique: inclut les demandes archivées
+        """
         try:
-            rows = DemandeDAO.lister_par_employe(employe_id)
+            rows = DemandeDAO.lister_par_employe(employe_id, avec_historique)
             return self._convertir_rows_en_conges(rows)
         except Exception as e:
             print(f"❌ Erreur: {e}")
@@ -231,7 +545,8 @@ class GestionConges:
                     row['date_debut'],
                     row['date_fin'],
                     row['statut'],
-                    row['commentaire']
+                    row['commentaire'],
+                    motif=row['motif'] or ''
                 )
                 # Attacher les infos de l'employé pour l'affichage
                 conge.nom = row['nom']
@@ -239,6 +554,8 @@ class GestionConges:
                 conge.matricule = row['matricule']
                 conge.solde_conges = row['solde_conges']
                 conge.service = row['service']
+                if 'nb_jours' in row.keys():
+                    conge.nb_jours = row['nb_jours']
                 conges.append(conge)
             except ValueError as e:
                 print(f"⚠️  Erreur: {e}")
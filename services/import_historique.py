@@ -0,0 +1,216 @@
+"""
+Service d'import de l'historique des demandes
+Responsabilité: charger en masse des demandes anciennes (plusieurs années,
+millions de lignes) sans passer par ajouter_demande, qui valide et insère
+une ligne à la fois
+
+- le fichier est découpé en blocs d'enregistrements bruts par le processus
+  principal (csv.reader pour un CSV: un champ entre guillemets peut contenir
+  des retours à la ligne)
+- chaque bloc est analysé et validé dans un ProcessPoolExecutor, avec les
+  règles de CongeFactory (type, période, motif, durées maximales)
+- un seul écrivain insère les blocs validés, dans l'ordre, par executemany:
+  une transaction par bloc, qui avance aussi le point de reprise
+- un import interrompu reprend après la dernière ligne enregistrée
+- une demande déjà en base (même empreinte que DemandeDAO.creer: employé,
+  dates, type; hors demandes refusées) n'est pas insérée une seconde fois,
+  même depuis un autre fichier
+
+Les statuts d'origine ('En attente', 'Validée', 'Refusée') sont conservés.
+Les soldes ne sont ni vérifiés ni déduits: l'historique décrit des soldes
+passés qui ne sont plus ceux de la base.
+"""
+import csv
+import itertools
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from models.types_conge import CongeFactory
+from services.dao import EmployeDAO, ImportHistoriqueDAO, empreinte_demande
+from services.resultats import RESULTAT_INVALIDE, RESULTAT_INTROUVABLE
+from utils.validators import valider_periode, lire_date
+
+TAILLE_BLOC_DEFAUT = 10000
+
+STATUTS_HISTORIQUES = ("En attente", "Validée", "Refusée")
+
+
+def importer_historique(chemin, taille_bloc=TAILLE_BLOC_DEFAUT, nb_workers=None, progression=None):
+    """
+    Importe un fichier d'historique (.csv avec en-tête, ou JSONL, un
+    enregistrement par ligne) et retourne le résumé de l'import
+    Colonnes: matricule (ou employe_id), date_debut, date_fin, type_conge,
+    statut, commentaire et motif (facultatifs)
+
+    Args:
+        chemin: fichier source; son chemin absolu identifie le point de reprise
+        taille_bloc: enregistrements par bloc (unité de validation, de transaction et de reprise)
+        nb_workers: processus de validation (défaut: nombre de CPU)
+        progression: fonction appelée après chaque bloc enregistré avec
+            {"bloc", "lignes", "importees", "doublons", "rejetees", "rejets"}
+            (doublons: demandes valides déjà en base, non insérées;
+            rejets: liste de {"ligne", "resultat", "message"})
+    """
+    source = str(Path(chemin).resolve())
+    format_csv = Path(chemin).suffix.lower() == ".csv"
+    nb_workers = nb_workers or os.cpu_count() or 1
+    progression = progression or _afficher_progression
+
+    reprise = ImportHistoriqueDAO.lignes_traitees(source)
+    ids_par_matricule = EmployeDAO.ids_par_matricule()
+    employes = (ids_par_matricule, set(ids_par_matricule.values()))
+    resume = {"source": source, "reprise_apres_ligne": reprise, "blocs": 0,
+              "importees": 0, "doublons": 0, "rejetees": 0}
+
+    with open(chemin, encoding="utf-8", newline="") as flux:
+        if format_csv:
+            lecteur = csv.reader(flux)
+            entete = next(lecteur, [])
+            enregistrements = _enregistrements_csv(lecteur)
+        else:
+            entete = None
+            enregistrements = enumerate(flux, start=1)
+        blocs = _decouper(enregistrements, taille_bloc, reprise)
+
+        with ProcessPoolExecutor(max_workers=nb_workers) as executor:
+            # Au plus deux blocs en attente par processus: la lecture suit l'écriture
+            en_vol = deque()
+            for bloc in blocs:
+                en_vol.append(executor.submit(_preparer_bloc, *bloc, entete))
+                if len(en_vol) >= nb_workers * 2:
+                    _enregistrer(en_vol.popleft().result(), source, employes, resume, progression)
+            while en_vol:
+                _enregistrer(en_vol.popleft().result(), source, employes, resume, progression)
+
+    return resume
+
+
+def _enregistrements_csv(lecteur):
+    """(numéro de la première ligne dans le fichier, valeurs) de chaque enregistrement CSV"""
+    fin_precedent = lecteur.line_num
+    for valeurs in lecteur:
+        yield fin_precedent + 1, valeurs
+        fin_precedent = lecteur.line_num
+
+
+def _decouper(enregistrements, taille_bloc, reprise):
+    """
+    Produit (numéro de bloc, position, enregistrements) après avoir sauté les
+    reprise enregistrements déjà traités
+    enregistrements: (numéro de ligne, valeurs CSV ou ligne JSONL)
+    position: enregistrements qui précèdent le bloc
+    """
+    for _ in itertools.islice(enregistrements, reprise):
+        pass
+
+    numero, position, bloc = 1, reprise, []
+    for enregistrement in enregistrements:
+        bloc.append(enregistrement)
+        if len(bloc) == taille_bloc:
+            yield numero, position, bloc
+            numero, position, bloc = numero + 1, position + taille_bloc, []
+    if bloc:
+        yield numero, position, bloc
+
+
+def _preparer_bloc(numero, position, bloc, entete):
+    """
+    Exécuté dans un processus du pool: analyse et valide un bloc
+    Retourne (numéro, position de fin, enregistrements lus, demandes valides, rejets);
+    les demandes gardent leur matricule, résolu en ID par l'écrivain
+    """
+    demandes, rejets = [], []
+    for ligne, brut in bloc:
+        try:
+            if entete is not None:
+                enregistrement = dict(zip(entete, brut))
+            else:
+                enregistrement = json.loads(brut) if brut.strip() else None
+            if not enregistrement:
+                continue
+            demandes.append((ligne,) + _valider(enregistrement))
+        except json.JSONDecodeError as e:
+            rejets.append({"ligne": ligne, "resultat": RESULTAT_INVALIDE, "message": f"JSON invalide: {e}"})
+        except (ValueError, KeyError, TypeError) as e:
+            message = f"Colonne manquante: {e}" if isinstance(e, KeyError) else str(e)
+            rejets.append({"ligne": ligne, "resultat": RESULTAT_INVALIDE, "message": message})
+
+    return numero, position + len(bloc), len(bloc), demandes, rejets
+
+
+def _valider(enregistrement):
+    date_debut = enregistrement["date_debut"]
+    date_fin = enregistrement["date_fin"]
+    statut = enregistrement["statut"]
+    commentaire = enregistrement.get("commentaire") or ""
+    motif = enregistrement.get("motif") or ""
+
+    if statut not in STATUTS_HISTORIQUES:
+        raise ValueError(f"Statut inconnu: {statut}")
+
+    valide, message = valider_periode(date_debut, date_fin)
+    if not valide:
+        raise ValueError(message)
+    # Format ISO en base, comme GestionConges.tenter_ajout_demande
+    date_debut, date_fin = lire_date(date_debut).isoformat(), lire_date(date_fin).isoformat()
+
+    conge = CongeFactory.creer_conge(enregistrement["type_conge"], None, None, date_debut, date_fin,
+                                     statut, commentaire, motif=motif)
+    # Solde illimité: seules les règles propres au type s'appliquent
+    valide, message = conge.valider_demande(float("inf"))
+    if not valide:
+        raise ValueError(message)
+
+    # Un ID (entier) ou un matricule (texte)
+    if enregistrement.get("employe_id") not in (None, ""):
+        employe = int(enregistrement["employe_id"])
+    else:
+        employe = str(enregistrement["matricule"])
+    # Durées calculées dans le processus de validation, comme DemandeDAO.creer
+    jours_deductibles = conge.calculer_jours_deductibles() if conge.deduit_du_solde() else 0
+    return (employe, date_debut, date_fin, conge.get_type(), statut, commentaire,
+            getattr(conge, "motif", None), conge.calculer_jours(), jours_deductibles)
+
+
+def _enregistrer(resultat_bloc, source, employes, resume, progression):
+    """
+    Écrivain unique: résout les employés, calcule les empreintes (qui portent
+    l'ID de l'employé) puis insère le bloc et son point de reprise
+    """
+    numero, position_fin, nb_lignes, demandes, rejets = resultat_bloc
+
+    lignes_valides = []
+    for ligne, employe, *colonnes in demandes:
+        employe_id = _resoudre_employe(employe, employes)
+        if employe_id is None:
+            rejets.append({"ligne": ligne, "resultat": RESULTAT_INTROUVABLE,
+                           "message": f"Employé inconnu: {employe}"})
+            continue
+        date_debut, date_fin, type_conge = colonnes[:3]
+        lignes_valides.append((employe_id, *colonnes,
+                               empreinte_demande(employe_id, date_debut, date_fin, type_conge)))
+
+    rejets.sort(key=lambda rejet: rejet["ligne"])
+    importees = ImportHistoriqueDAO.enregistrer_bloc(source, position_fin, lignes_valides, len(rejets))
+
+    resume["blocs"] += 1
+    doublons = len(lignes_valides) - importees
+    resume["importees"] += importees
+    resume["doublons"] += doublons
+    resume["rejetees"] += len(rejets)
+    progression({"bloc": numero, "lignes": nb_lignes, "importees": importees, "doublons": doublons,
+                 "rejetees": len(rejets), "rejets": rejets})
+
+
+def _resoudre_employe(employe, employes):
+    ids_par_matricule, ids_connus = employes
+    if isinstance(employe, int):
+        return employe if employe in ids_connus else None
+    return ids_par_matricule.get(employe)
+
+
+def _afficher_progression(rapport):
+    print(f"📦 Bloc {rapport['bloc']}: {rapport['importees']} importées, {rapport['rejetees']} rejetées")
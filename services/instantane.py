@@ -0,0 +1,227 @@
+"""
+Instantané analytique de l'historique des congés
+Responsabilité: copier les demandes (archive comprise) jointes aux employés
+dans un format en colonnes sur disque, pour que les analyses ad hoc
+(absences par mois, type, service...) ne lisent plus la base de production
+
+Format: un répertoire avec un fichier .npy par colonne (chargeable en
+mémoire projetée, np.load(..., mmap_mode="r")) et meta.json. Les colonnes
+texte type_conge, statut et service sont encodées par dictionnaire: le
+fichier contient des codes entiers, meta.json la liste des libellés.
+"""
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from database import ouvrir_connexion_dediee
+from models.validation_lot import parser_dates
+from services.dao import DemandeDAO
+from utils.validators import lire_date
+
+VERSION_FORMAT = 1
+
+# Colonnes encodées par dictionnaire (code -> libellé dans meta.json)
+COLONNES_DICTIONNAIRE = {"type_conge": np.uint8, "statut": np.uint8, "service": np.uint16}
+
+# Clés de regroupement disponibles en plus des colonnes encodées
+CLES_DERIVEES = ("mois", "annee", "employe_id", "archivee")
+
+MESURES = ("nombre", "jours", "jours_moyens")
+
+
+def exporter_instantane(repertoire, taille_lot=10000):
+    """
+    Écrit l'instantané dans repertoire (remplacé en bloc, jamais à moitié écrit)
+    La lecture se fait sur une connexion dédiée en lecture seule, dans une
+    seule transaction: les colonnes décrivent un même état de la base.
+    Retourne meta (nombre de lignes, date, compteur de modifications)
+    """
+    repertoire = Path(repertoire)
+    temporaire = repertoire.with_name(repertoire.name + ".partiel")
+    shutil.rmtree(temporaire, ignore_errors=True)
+    temporaire.mkdir(parents=True)
+
+    dictionnaires = {nom: {} for nom in COLONNES_DICTIONNAIRE}
+    morceaux = {nom: [] for nom in ("id", "employe_id", "date_debut", "date_fin", "solde_conges",
+                                    "archivee", *COLONNES_DICTIONNAIRE)}
+
+    conn = ouvrir_connexion_dediee()
+    cur = conn.cursor()
+    try:
+        cur.execute("BEGIN")
+        compteur = DemandeDAO.lire_compteur_modifications(cur)
+        for lot in DemandeDAO.iterer_pour_instantane(cur, taille_lot):
+            (ids, employes, debuts, fins, types, statuts, services,
+             soldes, archivees) = zip(*lot)
+            morceaux["id"].append(np.array(ids, dtype=np.int64))
+            morceaux["employe_id"].append(np.array(employes, dtype=np.int64))
+            # Même analyse que la saisie (strptime): 2026-6-1 est une date valide
+            morceaux["date_debut"].append(parser_dates(debuts)[0])
+            morceaux["date_fin"].append(parser_dates(fins)[0])
+            morceaux["solde_conges"].append(np.array(soldes, dtype=np.int32))
+            morceaux["archivee"].append(np.array(archivees, dtype=bool))
+            for nom, valeurs in (("type_conge", types), ("statut", statuts), ("service", services)):
+                morceaux[nom].append(_encoder(valeurs, dictionnaires[nom], COLONNES_DICTIONNAIRE[nom]))
+        cur.execute("COMMIT")
+    finally:
+        cur.close()
+        conn.close()
+
+    colonnes = {nom: _concatener(parts, nom) for nom, parts in morceaux.items()}
+    colonnes["jours"] = ((colonnes["date_fin"] - colonnes["date_debut"]).astype(np.int32) + 1)
+    for nom, valeurs in colonnes.items():
+        np.save(temporaire / f"{nom}.npy", valeurs)
+
+    meta = {
+        "version_format": VERSION_FORMAT,
+        "date_export": datetime.now().isoformat(timespec="seconds"),
+        "compteur_modifications": compteur,
+        "lignes": int(len(colonnes["id"])),
+        "dictionnaires": {nom: list(valeurs) for nom, valeurs in dictionnaires.items()},
+    }
+    (temporaire / "meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    ancien = repertoire.with_name(repertoire.name + ".ancien")
+    if repertoire.exists():
+        repertoire.rename(ancien)
+    temporaire.rename(repertoire)
+    shutil.rmtree(ancien, ignore_errors=True)
+    return meta
+
+
+def _encoder(valeurs, dictionnaire, dtype):
+    """Codes entiers des valeurs; les nouvelles valeurs sont ajoutées au dictionnaire"""
+    return np.fromiter((dictionnaire.setdefault(valeur, len(dictionnaire)) for valeur in valeurs),
+                       dtype=dtype, count=len(valeurs))
+
+
+def _concatener(parts, nom):
+    if parts:
+        return np.concatenate(parts)
+    if nom in ("date_debut", "date_fin"):
+        return np.zeros(0, dtype="datetime64[D]")
+    return np.zeros(0, dtype=COLONNES_DICTIONNAIRE.get(nom, np.int64))
+
+
+class Instantane:
+    """
+    Lecture et requêtes vectorisées sur un instantané exporté
+    Aucune connexion à la base: tout vient des fichiers .npy (mémoire projetée)
+
+    Exemple:
+        inst = Instantane("instantane")
+        inst.agreger(par=("service", "mois"), mesure="jours", statut="Validée")
+    """
+
+    def __init__(self, repertoire, memoire_projetee=True):
+        self.repertoire = Path(repertoire)
+        self.meta = json.loads((self.repertoire / "meta.json").read_text(encoding="utf-8"))
+        if self.meta["version_format"] != VERSION_FORMAT:
+            raise ValueError(f"Format d'instantané non pris en charge: {self.meta['version_format']}")
+        self._mode = "r" if memoire_projetee else None
+        self._colonnes = {}
+
+    def __len__(self):
+        return self.meta["lignes"]
+
+    def colonne(self, nom):
+        """Tableau NumPy d'une colonne (codes pour les colonnes encodées)"""
+        if nom not in self._colonnes:
+            self._colonnes[nom] = np.load(self.repertoire / f"{nom}.npy", mmap_mode=self._mode)
+        return self._colonnes[nom]
+
+    def libelles(self, nom):
+        """Libellés d'une colonne encodée, indexés par code"""
+        return self.meta["dictionnaires"][nom]
+
+    def masque(self, periode=None, **criteres):
+        """
+        Masque booléen des lignes retenues
+        criteres: colonne=valeur ou colonne=[valeurs] (type_conge, statut,
+        service, employe_id, archivee)
+        periode: (debut, fin) YYYY-MM-DD, demandes qui chevauchent la période
+        """
+        masque = np.ones(len(self), dtype=bool)
+        for nom, valeurs in criteres.items():
+            if not isinstance(valeurs, (list, tuple, set)):
+                valeurs = [valeurs]
+            if nom in COLONNES_DICTIONNAIRE:
+                libelles = self.libelles(nom)
+                valeurs = [libelles.index(v) for v in valeurs if v in libelles]
+            masque &= np.isin(self.colonne(nom), list(valeurs))
+
+        if periode is not None:
+            debut, fin = np.datetime64(lire_date(periode[0]), "D"), np.datetime64(lire_date(periode[1]), "D")
+            masque &= (self.colonne("date_debut") <= fin) & (self.colonne("date_fin") >= debut)
+        return masque
+
+    def agreger(self, par=(), mesure="nombre", periode=None, **criteres):
+        """
+        Regroupe les lignes filtrées et calcule une mesure par groupe
+        par: clés parmi type_conge, statut, service, mois, annee, employe_id, archivee
+             (mois/annee: de la date de début)
+        mesure: nombre (de demandes), jours (somme des durées), jours_moyens
+        Retourne une liste de dicts {clé: libellé, ..., mesure: valeur}, un par
+        groupe non vide, dans l'ordre des clés (ordre des codes pour les colonnes encodées)
+        """
+        if mesure not in MESURES:
+            raise ValueError(f"Mesure inconnue: {mesure}. Mesures: {', '.join(MESURES)}")
+        par = (par,) if isinstance(par, str) else tuple(par)
+
+        masque = self.masque(periode, **criteres)
+        jours = self.colonne("jours")[masque].astype(np.int64)
+
+        libelles, indices = [], []
+        for cle in par:
+            valeurs_cle, inverse = np.unique(self._valeurs_cle(cle, masque), return_inverse=True)
+            libelles.append(self._decoder(cle, valeurs_cle))
+            indices.append(inverse.reshape(-1))
+
+        # Groupes = combinaisons présentes (et non produit cartésien des clés, qui
+        # déborde vite avec employe_id): tri lexicographique, donc ordre des clés
+        if indices:
+            combinaisons, groupes = np.unique(np.column_stack(indices), axis=0, return_inverse=True)
+            groupes = groupes.reshape(-1)
+        else:
+            combinaisons = np.zeros((1, 0), dtype=np.int64)
+            groupes = np.zeros(len(jours), dtype=np.int64)
+        nb_groupes = len(combinaisons)
+
+        nombres = np.bincount(groupes, minlength=nb_groupes)
+        sommes = np.bincount(groupes, weights=jours, minlength=nb_groupes)
+
+        resultats = []
+        for groupe in np.flatnonzero(nombres):
+            ligne = {}
+            for cle, position, valeurs_cle in zip(par, combinaisons[groupe], libelles):
+                ligne[cle] = valeurs_cle[position]
+            if mesure == "nombre":
+                ligne[mesure] = int(nombres[groupe])
+            elif mesure == "jours":
+                ligne[mesure] = int(sommes[groupe])
+            else:
+                ligne[mesure] = round(float(sommes[groupe] / nombres[groupe]), 2)
+            resultats.append(ligne)
+        return resultats
+
+    def _valeurs_cle(self, cle, masque):
+        if cle == "mois":
+            return self.colonne("date_debut")[masque].astype("datetime64[M]")
+        if cle == "annee":
+            return self.colonne("date_debut")[masque].astype("datetime64[Y]")
+        if cle in COLONNES_DICTIONNAIRE or cle in CLES_DERIVEES:
+            return self.colonne(cle)[masque]
+        raise ValueError(f"Clé de regroupement inconnue: {cle}")
+
+    def _decoder(self, cle, valeurs):
+        if cle in COLONNES_DICTIONNAIRE:
+            libelles = self.libelles(cle)
+            return [libelles[code] for code in valeurs]
+        if cle == "annee":
+            return [int(str(v)) for v in valeurs]
+        if cle == "mois":
+            return [str(v) for v in valeurs]
+        return [v.item() for v in valeurs]
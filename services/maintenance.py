@@ -0,0 +1,255 @@
+"""
+Service de maintenance de la base
+Responsabilité: sauvegarde à chaud, récupération de l'espace libre et mise à
+jour des statistiques de l'optimiseur, sans arrêter l'application
+"""
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from database import get_connection, ouvrir_connexion_dediee, locataire, lister_locataires
+
+# Pages copiées par étape de sauvegarde: entre deux étapes, aucun verrou n'est
+# gardé côté écrivain (WAL), les validations continuent pendant la copie
+PAGES_PAR_ETAPE = 256
+PAUSE_ENTRE_ETAPES = 0.01
+
+# Pages rendues au système par passe de vacuum incrémental (None: toutes)
+PAGES_VACUUM = None
+
+# Valeur de PRAGMA auto_vacuum en mode incrémental
+MODE_VACUUM_INCREMENTAL = 2
+
+# Intervalles par défaut des tâches planifiées, en secondes
+INTERVALLES_DEFAUT = {
+    "sauvegarde": 24 * 3600,
+    "vacuum": 3600,
+    "optimiser": 3600,
+}
+
+# Locataires traités en même temps par une tâche multi-société
+NB_LOCATAIRES_SIMULTANES = 4
+
+
+def sauvegarder(destination, pages_par_etape=PAGES_PAR_ETAPE, pause=PAUSE_ENTRE_ETAPES):
+    """
+    Copie la base en ligne vers destination avec l'API de sauvegarde de SQLite
+    La copie se fait sur une transaction de lecture (instantané WAL): elle est
+    cohérente et ne redémarre pas quand d'autres connexions écrivent.
+    Le fichier est écrit à côté puis renommé: destination n'est jamais partielle.
+    Retourne le rapport de la tâche
+    """
+    debut = time.perf_counter()
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temporaire = destination.with_name(destination.name + ".partiel")
+    temporaire.unlink(missing_ok=True)
+
+    source = ouvrir_connexion_dediee()
+    cible = sqlite3.connect(temporaire)
+    etapes = 0
+
+    def progression(statut, restantes, total):
+        nonlocal etapes
+        etapes += 1
+
+    try:
+        source.execute("BEGIN")
+        source.execute("SELECT 1 FROM sqlite_master LIMIT 1")
+        source.backup(cible, pages=pages_par_etape, progress=progression, sleep=pause)
+        source.execute("COMMIT")
+        # La copie est autonome: pas de fichier WAL à transporter avec elle
+        cible.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        cible.close()
+        source.close()
+
+    os.replace(temporaire, destination)
+    return _rapport("sauvegarde", debut, destination=str(destination), etapes=etapes,
+                    taille_octets=destination.stat().st_size)
+
+
+def vacuum_incremental(pages=PAGES_VACUUM):
+    """
+    Rend au système les pages libres de la base (PRAGMA incremental_vacuum)
+    Passe par la connexion d'écriture: bref, et sans bloquer les lectures WAL
+    """
+    debut = time.perf_counter()
+    conn = get_connection()
+    try:
+        libres_avant = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        requete = "PRAGMA incremental_vacuum" if pages is None else f"PRAGMA incremental_vacuum({int(pages)})"
+        # executescript exécute le pragma jusqu'au bout (execute() s'arrête
+        # après la première page libérée, le pragma ne renvoyant aucune colonne)
+        conn.executescript(requete + ";")
+        libres_apres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        taille = _taille_base(conn)
+    finally:
+        conn.close()
+
+    return _rapport("vacuum", debut, pages_liberees=libres_avant - libres_apres,
+                    pages_libres=libres_apres, taille_octets=taille)
+
+
+def activer_vacuum_incremental():
+    """
+    Passe une base existante en auto_vacuum = INCREMENTAL (les bases neuves le
+    sont dès init_db): le mode ne s'applique qu'après un VACUUM complet, qui
+    réécrit tout le fichier et bloque les écritures pendant sa durée.
+    À lancer explicitement, hors des heures d'activité
+    """
+    debut = time.perf_counter()
+    conn = get_connection()
+    try:
+        deja_actif = conn.execute("PRAGMA auto_vacuum").fetchone()[0] == MODE_VACUUM_INCREMENTAL
+        if not deja_actif:
+            # VACUUM ne peut pas s'exécuter dans une transaction
+            conn.commit()
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        taille = _taille_base(conn)
+    finally:
+        conn.close()
+
+    return _rapport("activer_vacuum_incremental", debut, deja_actif=deja_actif, taille_octets=taille)
+
+
+def optimiser(complet=False):
+    """
+    Met à jour les statistiques de l'optimiseur
+    complet=False: PRAGMA optimize (n'analyse que les tables qui en ont besoin)
+    complet=True: ANALYZE de toute la base
+    """
+    debut = time.perf_counter()
+    conn = get_connection()
+    try:
+        conn.execute("ANALYZE" if complet else "PRAGMA optimize")
+        conn.commit()
+        taille = _taille_base(conn)
+    finally:
+        conn.close()
+
+    return _rapport("optimiser", debut, complet=complet, taille_octets=taille)
+
+
+def executer_pour_locataires(tache, locataires=None, nb_workers=NB_LOCATAIRES_SIMULTANES):
+    """
+    Exécute tache(locataire_id) pour chaque locataire, en parallèle
+    Chaque appel tourne dans le contexte de la base de son locataire: les
+    bases sont des fichiers distincts, rien ne sérialise les sociétés entre elles.
+    locataires: identifiants (défaut: toutes les bases de REPERTOIRE_LOCATAIRES)
+    Retourne {locataire_id: rapport}; un échec donne {"erreur": message}
+    sans interrompre les autres locataires
+    """
+    locataires = lister_locataires() if locataires is None else list(locataires)
+
+    def executer_une(locataire_id):
+        with locataire(locataire_id):
+            return tache(locataire_id)
+
+    resultats = {}
+    with ThreadPoolExecutor(max_workers=nb_workers, thread_name_prefix="maintenance") as executor:
+        futures = {locataire_id: executor.submit(executer_une, locataire_id) for locataire_id in locataires}
+        for locataire_id, future in futures.items():
+            try:
+                resultats[locataire_id] = future.result()
+            except Exception as e:
+                resultats[locataire_id] = {"erreur": str(e)}
+    return resultats
+
+
+def _taille_base(conn):
+    taille_page = conn.execute("PRAGMA page_size").fetchone()[0]
+    nb_pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    return taille_page * nb_pages
+
+
+def _rapport(tache, debut, **details):
+    rapport = {"tache": tache, "date": datetime.now().isoformat(timespec="seconds"),
+               "duree_s": round(time.perf_counter() - debut, 3)}
+    rapport.update(details)
+    return rapport
+
+
+class PlanificateurMaintenance:
+    """
+    Thread d'arrière-plan qui exécute les tâches de maintenance à intervalle fixe
+    - sauvegarde dans repertoire_sauvegardes (une copie horodatée par passe)
+    - vacuum incrémental
+    - PRAGMA optimize
+    Chaque exécution produit un rapport (durée, taille) conservé dans historique
+    tous_locataires=True: chaque tâche passe sur toutes les bases de locataires
+    en parallèle (sauvegardes <locataire>-<horodatage>.db), son rapport est
+    alors {locataire_id: rapport}
+    """
+
+    def __init__(self, repertoire_sauvegardes="sauvegardes", intervalles=None, granularite=1.0,
+                 tous_locataires=False):
+        self.repertoire_sauvegardes = Path(repertoire_sauvegardes)
+        self.tous_locataires = tous_locataires
+        self.intervalles = dict(INTERVALLES_DEFAUT)
+        if intervalles:
+            self.intervalles.update(intervalles)
+        self.granularite = granularite
+
+        self.historique = []
+        self._prochaines = {}
+        self._arret = threading.Event()
+        self._thread = None
+        self._verrou = threading.Lock()
+
+    def demarrer(self):
+        """Démarre le thread de maintenance (premières exécutions après un intervalle)"""
+        if self._thread is not None:
+            return
+        maintenant = time.monotonic()
+        self._prochaines = {tache: maintenant + intervalle for tache, intervalle in self.intervalles.items()
+                            if intervalle}
+        self._arret.clear()
+        self._thread = threading.Thread(target=self._boucle, name="maintenance", daemon=True)
+        self._thread.start()
+
+    def arreter(self, timeout=None):
+        """Arrêt propre: la tâche en cours se termine avant le retour"""
+        self._arret.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def executer(self, tache):
+        """Exécute immédiatement une tâche ('sauvegarde', 'vacuum', 'optimiser') et retourne son rapport"""
+        if tache not in INTERVALLES_DEFAUT:
+            raise ValueError(f"Tâche de maintenance inconnue: {tache}")
+        horodatage = datetime.now().strftime("%Y%m%d-%H%M%S")
+        if self.tous_locataires:
+            rapport = executer_pour_locataires(
+                lambda locataire_id: self._executer_tache(tache, f"{locataire_id}-{horodatage}"))
+        else:
+            rapport = self._executer_tache(tache, f"conges-{horodatage}")
+
+        with self._verrou:
+            self.historique.append(rapport)
+        return rapport
+
+    def _executer_tache(self, tache, nom_sauvegarde):
+        if tache == "sauvegarde":
+            return sauvegarder(self.repertoire_sauvegardes / f"{nom_sauvegarde}.db")
+        if tache == "vacuum":
+            return vacuum_incremental()
+        return optimiser()
+
+    def _boucle(self):
+        while not self._arret.wait(self.granularite):
+            maintenant = time.monotonic()
+            for tache, prochaine in list(self._prochaines.items()):
+                if maintenant < prochaine:
+                    continue
+                try:
+                    self.executer(tache)
+                except Exception as e:
+                    print(f"⚠️  Maintenance: échec de la tâche {tache}: {e}")
+                self._prochaines[tache] = time.monotonic() + self.intervalles[tache]
@@ -0,0 +1,164 @@
+"""
+Notification des nouvelles demandes en attente
+Responsabilité: laisser les outils RH attendre l'arrivée de demandes
+(attente longue avec délai) au lieu de relancer lister_demandes_en_attente()
+
+Un seul thread par base surveille PRAGMA data_version sur une connexion
+dédiée: une lecture d'entier par intervalle, quel que soit le nombre
+d'abonnés. Quand une autre connexion a écrit, il relit les demandes en
+attente d'ID supérieur au dernier vu et réveille tous les abonnés (Condition).
+Le notificateur d'une base s'arrête quand ses pools sont fermés (base
+inactive évincée): ses abonnés reçoivent None et repassent par partage().
+"""
+import threading
+from collections import deque
+
+from database import ouvrir_connexion_dediee, chemin_base, locataire, locataire_courant, a_la_fermeture
+from services.dao import DemandeDAO
+
+INTERVALLE_SURVEILLANCE = 0.5  # secondes
+DELAI_ATTENTE = 30.0  # secondes
+
+# Nouvelles demandes gardées en mémoire pour les abonnés en retard
+TAILLE_HISTORIQUE = 1000
+TAILLE_LOT = 500
+
+_notificateurs = {}
+_verrou_notificateurs = threading.Lock()
+
+
+class NotificateurDemandes:
+    """
+    Surveillance partagée des nouvelles demandes en attente
+
+    Exemple (tableau de bord):
+        notificateur = NotificateurDemandes.partage()
+        dernier_id = notificateur.dernier_id()
+        while True:
+            dernier_id, nouvelles = notificateur.attendre(dernier_id, timeout=30)
+            if nouvelles is None:  # surveillance arrêtée
+                notificateur = NotificateurDemandes.partage()
+                continue
+            ...  # nouvelles: rows des demandes arrivées (liste vide: délai écoulé)
+    """
+
+    def __init__(self, intervalle=INTERVALLE_SURVEILLANCE):
+        self.intervalle = intervalle
+        # Le thread de surveillance n'hérite pas du contexte: il reprend le locataire courant
+        self._locataire = locataire_courant()
+        self._condition = threading.Condition()
+        self._recentes = deque(maxlen=TAILLE_HISTORIQUE)
+        # _recentes contient toutes les nouvelles demandes d'ID > _historique_depuis
+        self._historique_depuis = None
+        self._dernier_id = None
+        self._arret = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def partage(cls):
+        """Notificateur unique de la base courante (démarré au premier appel)"""
+        with _verrou_notificateurs:
+            notificateur = _notificateurs.get(chemin_base())
+            if notificateur is None:
+                notificateur = cls()
+                _notificateurs[chemin_base()] = notificateur
+        # Hors du verrou: la lecture initiale peut fermer une autre base (et son notificateur)
+        notificateur.demarrer()
+        return notificateur
+
+    def demarrer(self):
+        """Démarre le thread de surveillance (les demandes déjà en base ne sont pas notifiées)"""
+        with self._condition:
+            if self._thread is not None:
+                return
+            with locataire(self._locataire):
+                self._dernier_id = DemandeDAO.dernier_id()
+            self._historique_depuis = self._dernier_id
+            self._arret.clear()
+            self._thread = threading.Thread(target=self._boucle, name="notifications", daemon=True)
+            self._thread.start()
+
+    def arreter(self, timeout=None):
+        """Arrête la surveillance et réveille les abonnés en attente (ils reçoivent None)"""
+        self._arret.set()
+        with self._condition:
+            self._condition.notify_all()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def dernier_id(self):
+        """Plus grand ID de demande vu: point de départ d'un nouvel abonné"""
+        with self._condition:
+            return self._dernier_id
+
+    def attendre(self, apres_id, timeout=DELAI_ATTENTE):
+        """
+        Bloque jusqu'à l'arrivée de demandes en attente d'ID > apres_id, au plus timeout secondes
+        Retourne (dernier_id, nouvelles demandes): dernier_id est à repasser
+        à l'appel suivant; la liste est vide si le délai est écoulé, None si
+        la surveillance est arrêtée (reprendre avec partage())
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._dernier_id > apres_id or self._arret.is_set(), timeout)
+            dernier_id = self._dernier_id
+            if dernier_id <= apres_id:
+                return apres_id, None if self._arret.is_set() else []
+            if apres_id >= self._historique_depuis:
+                return dernier_id, [row for row in self._recentes if row['id'] > apres_id]
+
+        # Abonné plus ancien que l'historique: les demandes manquantes sont relues
+        with locataire(self._locataire):
+            return dernier_id, self._lire_apres(apres_id, dernier_id)
+
+    def _boucle(self):
+        with locataire(self._locataire):
+            conn = ouvrir_connexion_dediee()
+            try:
+                data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+                while not self._arret.wait(self.intervalle):
+                    courante = conn.execute("PRAGMA data_version").fetchone()[0]
+                    if courante == data_version:
+                        continue
+                    data_version = courante
+                    try:
+                        self._verifier()
+                    except Exception as e:
+                        print(f"⚠️  Notifications: échec de la vérification: {e}")
+            finally:
+                conn.close()
+
+    def _verifier(self):
+        # Les IDs ne font que croître (écritures sérialisées): une demande déjà
+        # validée ou refusée à la vérification suivante n'est pas notifiée
+        nouvelles = self._lire_apres(self._dernier_id)
+        if not nouvelles:
+            return
+        with self._condition:
+            debordement = len(self._recentes) + len(nouvelles) - TAILLE_HISTORIQUE
+            if debordement > 0:
+                self._historique_depuis = (list(self._recentes) + nouvelles)[debordement - 1]['id']
+            self._recentes.extend(nouvelles)
+            self._dernier_id = nouvelles[-1]['id']
+            self._condition.notify_all()
+
+    @staticmethod
+    def _lire_apres(apres_id, jusqu_a=None):
+        rows = []
+        while True:
+            lot = DemandeDAO.lister_en_attente_apres(apres_id, TAILLE_LOT)
+            rows.extend(row for row in lot if jusqu_a is None or row['id'] <= jusqu_a)
+            if len(lot) < TAILLE_LOT:
+                return rows
+            apres_id = lot[-1]['id']
+
+
+def _arreter_notificateur(chemin):
+    """Base fermée (éviction, fin de programme): thread et connexion dédiée s'arrêtent avec elle"""
+    with _verrou_notificateurs:
+        notificateur = _notificateurs.pop(chemin, None)
+    if notificateur is not None:
+        notificateur.arreter(timeout=INTERVALLE_SURVEILLANCE * 4)
+
+
+a_la_fermeture(_arreter_notificateur)
@@ -0,0 +1,246 @@
+"""
+Prévisions d'absences et de soldes sur douze mois glissants
+Responsabilité: projeter, pour toute l'entreprise en une passe vectorisée,
+la charge d'absences attendue par service et le solde de chaque employé
+
+Grille: une ligne par employé, une colonne par jour de l'horizon
+- absences déjà validées à venir: poids 1 (déjà déduites du solde)
+- demandes en attente: poids = taux historique d'acceptation de leur type
+- le reste de chaque jour: saisonnalité historique du service (part des
+  effectifs absents ce jour de l'année, sur les années précédentes)
+Les soldes projetés retranchent les jours attendus des types qui déduisent
+du solde (aucune acquisition de congés n'est modélisée).
+"""
+import threading
+from datetime import date
+
+import numpy as np
+
+from database import ouvrir_connexion_dediee, chemin_base
+from models.types_conge import CongeFactory
+from models.validation_lot import parser_dates
+from services.dao import DemandeDAO, EmployeDAO
+
+HORIZON_JOURS = 365
+ANNEES_HISTORIQUE = 3
+
+# Types dont les jours sont retirés du solde (get_type(), ex: {"Annuel"})
+TYPES_DEDUITS = {classe(None, None, "", "", None).get_type()
+                 for classe in CongeFactory.TYPES.values()
+                 if classe(None, None, "", "", None).deduit_du_solde()}
+
+
+class Prevision:
+    """
+    Résultat d'une projection
+    - jours: dates de l'horizon (datetime64[D])
+    - services / charge: absents attendus par service et par jour (n_services, n_jours)
+    - employe_ids / absences: probabilité d'absence par employé et par jour
+    - mois / soldes_fin_de_mois: solde projeté de chaque employé à la fin de chaque mois
+    """
+
+    def __init__(self, jours, services, charge, employe_ids, absences, mois, soldes_fin_de_mois):
+        self.jours = jours
+        self.services = services
+        self.charge = charge
+        self.employe_ids = employe_ids
+        self.absences = absences
+        self.mois = mois
+        self.soldes_fin_de_mois = soldes_fin_de_mois
+
+    def charge_mensuelle(self):
+        """[{service, mois, absents_moyens, absents_max}] pour chaque service et mois de l'horizon"""
+        mois_des_jours = self.jours.astype("datetime64[M]")
+        resultats = []
+        for i, service in enumerate(self.services):
+            for mois in self.mois:
+                charge = self.charge[i, mois_des_jours == mois]
+                resultats.append({"service": service, "mois": str(mois),
+                                  "absents_moyens": round(float(charge.mean()), 2),
+                                  "absents_max": round(float(charge.max()), 2)})
+        return resultats
+
+    def soldes_projetes(self, employe_id):
+        """{mois: solde projeté} d'un employé"""
+        ligne = int(np.searchsorted(self.employe_ids, employe_id))
+        if ligne >= len(self.employe_ids) or self.employe_ids[ligne] != employe_id:
+            raise KeyError(employe_id)
+        return {str(mois): round(float(solde), 1)
+                for mois, solde in zip(self.mois, self.soldes_fin_de_mois[ligne])}
+
+
+class Previsionniste:
+    """
+    Calcule les prévisions et les garde en cache tant que la base n'a pas changé
+    La clé du cache est le compteur de modifications (triggers sur demandes et
+    employés) et le jour de départ: une lecture d'entier suffit à le réutiliser.
+    Une entrée par base (chemin_base()): chaque locataire a ses prévisions.
+    """
+
+    def __init__(self, horizon_jours=HORIZON_JOURS, annees_historique=ANNEES_HISTORIQUE):
+        self.horizon_jours = horizon_jours
+        self.annees_historique = annees_historique
+        self._verrou = threading.Lock()
+        # chemin de la base -> (clé, prévision)
+        self._caches = {}
+
+    def prevoir(self, aujourd_hui=None):
+        aujourd_hui = aujourd_hui or date.today()
+        with self._verrou:
+            chemin = chemin_base()
+            cle_connue, prevision = self._caches.get(chemin, (None, None))
+            conn = ouvrir_connexion_dediee()
+            cur = conn.cursor()
+            try:
+                # Compteur et données lus sur le même instantané
+                cur.execute("BEGIN")
+                cle = (DemandeDAO.lire_compteur_modifications(cur), aujourd_hui)
+                if cle == cle_connue:
+                    return prevision
+
+                debut_historique = date(aujourd_hui.year - self.annees_historique,
+                                        aujourd_hui.month, 1)
+                employes = EmployeDAO.lister_soldes(cur)
+                demandes = DemandeDAO.lister_absences_depuis(debut_historique.isoformat(), cur)
+                cur.execute("COMMIT")
+            finally:
+                cur.close()
+                conn.close()
+
+            prevision = calculer_prevision(employes, demandes, aujourd_hui, debut_historique,
+                                           self.horizon_jours)
+            self._caches[chemin] = (cle, prevision)
+            return prevision
+
+    def invalider(self):
+        with self._verrou:
+            self._caches.clear()
+
+
+def calculer_prevision(employes, demandes, aujourd_hui, debut_historique, horizon_jours=HORIZON_JOURS):
+    """
+    Projection vectorisée
+    employes: (id, service, solde_conges); demandes: (employe_id, date_debut, date_fin, type_conge, statut)
+    """
+    debut = np.datetime64(aujourd_hui, "D")
+    jours = debut + np.arange(horizon_jours)
+    mois = np.unique(jours.astype("datetime64[M]"))
+
+    employe_ids = np.array([e[0] for e in employes], dtype=np.int64)
+    services, service_par_employe = np.unique(np.array([e[1] or "" for e in employes], dtype=str),
+                                              return_inverse=True)
+    service_par_employe = service_par_employe.reshape(-1)
+    soldes = np.array([e[2] for e in employes], dtype=np.float64)
+    effectifs = np.bincount(service_par_employe, minlength=len(services))
+
+    if demandes:
+        d_employes, d_debuts, d_fins, d_types, d_statuts = (np.array(c) for c in zip(*demandes))
+        d_debuts = parser_dates(d_debuts)[0]
+        d_fins = parser_dates(d_fins)[0]
+    else:
+        d_employes = np.zeros(0, dtype=np.int64)
+        d_debuts = d_fins = np.zeros(0, dtype="datetime64[D]")
+        d_types = d_statuts = np.zeros(0, dtype=str)
+
+    # Demandes d'employés encore présents, rattachées à leur ligne de grille
+    lignes = np.searchsorted(employe_ids, d_employes.astype(np.int64))
+    presents = lignes < len(employe_ids)
+    presents[presents] &= employe_ids[lignes[presents]] == d_employes[presents].astype(np.int64)
+    deduites = np.isin(d_types, list(TYPES_DEDUITS))
+    validees = d_statuts == "Validée"
+    en_attente = d_statuts == "En attente"
+
+    acceptation = _taux_acceptation(d_types, d_statuts)
+
+    # Horizon: validées (poids 1) et en attente (poids = taux d'acceptation du type)
+    poids_attente = np.array([acceptation.get(t, 0.0) for t in d_types], dtype=np.float64)
+    a_venir = presents & (d_fins >= debut)
+    certaines = _grille(len(employe_ids), horizon_jours, debut,
+                        lignes, d_debuts, d_fins, a_venir & validees, np.ones(len(lignes)))
+    attente = _grille(len(employe_ids), horizon_jours, debut,
+                      lignes, d_debuts, d_fins, a_venir & en_attente, poids_attente)
+    attente_deduite = _grille(len(employe_ids), horizon_jours, debut,
+                              lignes, d_debuts, d_fins, a_venir & en_attente & deduites, poids_attente)
+    connues = np.minimum(certaines + attente, 1.0)
+
+    # Saisonnalité par service et jour de l'année (366 positions)
+    historique = presents & validees & (d_debuts < debut)
+    nb_jours_historique = int((debut - np.datetime64(debut_historique, "D")).astype(int))
+    saison = _saisonnalite(historique, lignes, service_par_employe, d_debuts, d_fins,
+                           debut_historique, nb_jours_historique, effectifs)
+    saison_deduite = _saisonnalite(historique & deduites, lignes, service_par_employe, d_debuts, d_fins,
+                                   debut_historique, nb_jours_historique, effectifs)
+
+    jour_annee = _jour_de_l_annee(jours)
+    attendu_saison = saison[service_par_employe[:, None], jour_annee[None, :]]
+    attendu_saison_deduit = saison_deduite[service_par_employe[:, None], jour_annee[None, :]]
+
+    absences = connues + (1.0 - connues) * attendu_saison
+    deductions = attente_deduite + (1.0 - connues) * attendu_saison_deduit
+
+    charge = np.zeros((len(services), horizon_jours))
+    np.add.at(charge, service_par_employe, absences)
+
+    fins_de_mois = np.searchsorted(jours.astype("datetime64[M]"), mois, side="right") - 1
+    soldes_fin_de_mois = soldes[:, None] - np.cumsum(deductions, axis=1)[:, fins_de_mois]
+
+    return Prevision(jours, [str(s) for s in services], charge, employe_ids, absences, mois,
+                     soldes_fin_de_mois)
+
+
+def _grille(nb_lignes, nb_jours, debut, lignes, debuts, fins, masque, poids):
+    """
+    Grille (nb_lignes, nb_jours) des poids des intervalles sélectionnés,
+    construite par différences (+poids au début, -poids le lendemain de la fin)
+    puis somme cumulée: aucune boucle sur les demandes
+    """
+    differences = np.zeros((nb_lignes, nb_jours + 1))
+    if masque.any():
+        d = np.clip((debuts[masque] - debut).astype(np.int64), 0, nb_jours)
+        f = np.clip((fins[masque] - debut).astype(np.int64) + 1, 0, nb_jours)
+        np.add.at(differences, (lignes[masque], d), poids[masque])
+        np.add.at(differences, (lignes[masque], f), -poids[masque])
+    return np.cumsum(differences, axis=1)[:, :nb_jours]
+
+
+def _saisonnalite(masque, lignes, service_par_employe, debuts, fins, debut_historique,
+                  nb_jours, effectifs):
+    """
+    Part des effectifs de chaque service absente, par jour de l'année,
+    moyennée sur la fenêtre historique: tableau (n_services, 366)
+    """
+    nb_services = len(effectifs)
+    if nb_jours <= 0:
+        return np.zeros((nb_services, 366))
+
+    origine = np.datetime64(debut_historique, "D")
+    # Même construction que la grille des employés, une ligne par service
+    lignes_service = service_par_employe[lignes[masque]]
+    tous = np.ones(len(lignes_service), dtype=bool)
+    par_service = _grille(nb_services, nb_jours, origine, lignes_service,
+                          debuts[masque], fins[masque], tous, tous.astype(np.float64))
+
+    jour_annee = _jour_de_l_annee(origine + np.arange(nb_jours))
+    cumul = np.zeros((nb_services, 366))
+    np.add.at(cumul.T, jour_annee, par_service.T)
+    occurrences = np.bincount(jour_annee, minlength=366)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        saison = cumul / (occurrences[None, :] * effectifs[:, None])
+    return np.clip(np.nan_to_num(saison), 0.0, 1.0)
+
+
+def _jour_de_l_annee(jours):
+    """Position 0..365 de chaque date dans son année"""
+    return (jours - jours.astype("datetime64[Y]").astype("datetime64[D]")).astype(np.int64)
+
+
+def _taux_acceptation(types, statuts):
+    """{type: validées / (validées + refusées)} sur les demandes lues (0.5 sans historique)"""
+    taux = {}
+    for type_conge in np.unique(types):
+        masque = types == type_conge
+        validees = int((masque & (statuts == "Validée")).sum())
+        refusees = int((masque & (statuts == "Refusée")).sum())
+        taux[str(type_conge)] = validees / (validees + refusees) if validees + refusees else 0.5
+    return taux
@@ -0,0 +1,15 @@
+"""
+Codes de résultat des opérations de traitement des demandes
+Permettent aux appelants (menu, traitements par lot) de distinguer un conflit
+de concurrence d'un refus métier sans analyser les messages affichés
+"""
+
+RESULTAT_OK = "OK"
+RESULTAT_INTROUVABLE = "INTROUVABLE"
+RESULTAT_DEJA_TRAITEE = "DEJA_TRAITEE"
+RESULTAT_INVALIDE = "INVALIDE"
+RESULTAT_SOLDE_INSUFFISANT = "SOLDE_INSUFFISANT"
+RESULTAT_LIMITE_SERVICE = "LIMITE_SERVICE"
+RESULTAT_CONFLIT = "CONFLIT"
+RESULTAT_NON_AUTORISE = "NON_AUTORISE"
+RESULTAT_ERREUR = "ERREUR"
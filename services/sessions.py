@@ -0,0 +1,60 @@
+"""
+Cache des sessions ouvertes
+Responsabilité: après une authentification réussie, associer un jeton
+aléatoire à l'utilisateur pendant une courte durée, pour que les appels
+suivants présentent le jeton au lieu de refaire la dérivation du mot de passe
+"""
+import secrets
+import threading
+import time
+
+DUREE_SESSION = 15 * 60  # secondes
+
+
+class CacheSessions:
+    """
+    Jetons de session en mémoire, expirés après duree secondes
+    Une modification du compte (mot de passe, rôle, suppression) ferme ses
+    sessions: le jeton ne survit pas à un changement de droits.
+    """
+
+    def __init__(self, duree=DUREE_SESSION, horloge=time.monotonic):
+        self.duree = duree
+        self._horloge = horloge
+        self._verrou = threading.Lock()
+        self._sessions = {}
+
+    def ouvrir(self, utilisateur):
+        """Crée une session pour l'utilisateur et retourne son jeton"""
+        jeton = secrets.token_urlsafe(32)
+        with self._verrou:
+            self._purger()
+            self._sessions[jeton] = (utilisateur, self._horloge() + self.duree)
+        return jeton
+
+    def utilisateur(self, jeton):
+        """Retourne l'utilisateur d'une session valide, None si le jeton est inconnu ou expiré"""
+        with self._verrou:
+            session = self._sessions.get(jeton)
+            if session is None:
+                return None
+            utilisateur, expiration = session
+            if expiration <= self._horloge():
+                del self._sessions[jeton]
+                return None
+            return utilisateur
+
+    def fermer(self, jeton):
+        with self._verrou:
+            self._sessions.pop(jeton, None)
+
+    def fermer_sessions_utilisateur(self, user_id):
+        """Ferme toutes les sessions d'un utilisateur"""
+        with self._verrou:
+            for jeton in [j for j, (u, _) in self._sessions.items() if u.id == user_id]:
+                del self._sessions[jeton]
+
+    def _purger(self):
+        maintenant = self._horloge()
+        for jeton in [j for j, (_, expiration) in self._sessions.items() if expiration <= maintenant]:
+            del self._sessions[jeton]
@@ -0,0 +1,64 @@
+"""
+Flux de modifications pour la synchronisation des clients
+Responsabilité: permettre aux copies des données (tableaux de bord, paie,
+calendriers) de ne relire que ce qui a changé depuis leur dernier passage,
+au lieu de tout recharger avec DemandeDAO.lister_toutes()
+
+Le journal (table journal_modifications, tenue par triggers) garde une
+entrée par employé ou demande, renumérotée à chaque écriture: le coût d'une
+synchronisation suit le nombre de lignes modifiées, pas la taille des tables.
+Opérations: 'I' insertion, 'U' mise à jour, 'D' suppression, 'A' archivage
+(la demande quitte la table courante pour demandes_conge_archive);
+'I' et 'U' portent l'état courant de la ligne, à appliquer tel quel.
+"""
+from database import ouvrir_connexion_dediee
+from services.dao import JournalModificationsDAO
+
+LIMITE_DEFAUT = 500
+LIMITE_MAX = 5000
+
+
+def modifications_depuis(curseur=0, limite=LIMITE_DEFAUT):
+    """
+    Modifications postérieures à curseur (0: toutes les lignes existantes)
+    Retourne {"curseur", "suite", "modifications"}:
+    - curseur: à repasser à l'appel suivant
+    - suite: True si d'autres modifications attendent (page pleine)
+    - modifications: [{"seq", "table", "id", "operation", "donnees"}],
+      donnees = colonnes de la ligne, None pour une suppression ou un archivage
+    """
+    limite = max(1, min(int(limite), LIMITE_MAX))
+
+    conn = ouvrir_connexion_dediee()
+    cur = conn.cursor()
+    try:
+        # Journal et lignes lus sur le même instantané
+        cur.execute("BEGIN")
+        entrees = JournalModificationsDAO.lister_depuis(curseur, limite, cur)
+        ids_par_table = {}
+        for entree in entrees:
+            if entree['operation'] not in ('D', 'A'):
+                ids_par_table.setdefault(entree['table_nom'], []).append(entree['ligne_id'])
+        lignes = {table: JournalModificationsDAO.lire_lignes(table, ids, cur)
+                  for table, ids in ids_par_table.items()}
+        cur.execute("COMMIT")
+    finally:
+        cur.close()
+        conn.close()
+
+    modifications = []
+    for entree in entrees:
+        ligne = lignes.get(entree['table_nom'], {}).get(entree['ligne_id'])
+        modifications.append({
+            "seq": entree['seq'],
+            "table": entree['table_nom'],
+            "id": entree['ligne_id'],
+            "operation": entree['operation'],
+            "donnees": dict(ligne) if ligne is not None else None,
+        })
+
+    return {
+        "curseur": entrees[-1]['seq'] if entrees else curseur,
+        "suite": len(entrees) == limite,
+        "modifications": modifications,
+    }
@@ -0,0 +1,4 @@
+"""
+Tests de comportement (python -m pytest tests, ou python -m unittest discover tests)
+Chaque test travaille sur des bases temporaires: conges.db n'est jamais touchée
+"""
@@ -0,0 +1,43 @@
+"""
+Base commune des tests: une base (et un répertoire de locataires) neuve par
+test, dans un répertoire temporaire
+"""
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import database
+from services.dao import DemandeDAO, EmployeDAO
+
+
+class TestBase(unittest.TestCase):
+    """
+    Exécute chaque test dans un répertoire temporaire et y oriente database
+    Chemins absolus: les bases déjà migrées sont mémorisées par chemin
+    """
+
+    def setUp(self):
+        self._repertoire = tempfile.TemporaryDirectory()
+        repertoire = Path(self._repertoire.name)
+        self._cwd = os.getcwd()
+        self._configuration = (database.DB_PATH, database.REPERTOIRE_LOCATAIRES)
+        # Les pools gardent la connexion de la base précédente: on les ferme
+        database.fermer_connexions()
+        os.chdir(repertoire)
+        database.DB_PATH = str(repertoire / "conges.db")
+        database.REPERTOIRE_LOCATAIRES = str(repertoire / "locataires")
+        database.init_db()
+
+    def tearDown(self):
+        database.fermer_connexions()
+        database.DB_PATH, database.REPERTOIRE_LOCATAIRES = self._configuration
+        os.chdir(self._cwd)
+        self._repertoire.cleanup()
+
+    def creer_employe(self, matricule, solde=22, service="IT", manager_id=None):
+        return EmployeDAO.creer(matricule, f"Nom{matricule}", f"Prenom{matricule}", service, solde, manager_id)
+
+    def creer_demande(self, employe_id, date_debut, date_fin, type_conge="Annuel", statut="En attente",
+                      motif=None):
+        return DemandeDAO.creer(employe_id, date_debut, date_fin, type_conge, statut, motif=motif)
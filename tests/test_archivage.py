@@ -0,0 +1,46 @@
+"""
+Archivage des demandes traitées et historique (UNION avec l'archive)
+"""
+import unittest
+from datetime import date
+
+from services.archivage import archiver_demandes
+from services.gestion_conges import GestionConges
+from tests.base import TestBase
+
+
+class TestArchivage(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.employe_id = self.creer_employe("E1")
+        self.anciennes = [self.creer_demande(self.employe_id, f"2024-0{mois}-02", f"2024-0{mois}-03", statut=statut)
+                          for mois, statut in ((1, 'Validée'), (2, 'Refusée'), (3, 'Validée'))]
+        # Ancienne mais jamais traitée, et traitée mais récente: restent en place
+        self.en_attente = self.creer_demande(self.employe_id, "2024-04-01", "2024-04-02")
+        self.recente = self.creer_demande(self.employe_id, "2026-01-05", "2026-01-06", statut='Validée')
+
+    def ids(self, avec_historique=False):
+        conges = GestionConges().lister_demandes_par_employe(self.employe_id, avec_historique)
+        return {conge.id for conge in conges}
+
+    def test_archivage_par_lots(self):
+        resume = archiver_demandes(horizon_jours=365, taille_lot=2, aujourd_hui=date(2026, 3, 1))
+        self.assertEqual(resume, {"date_limite": "2025-03-01", "archivees": 3, "lots": 2})
+        self.assertEqual(self.ids(), {self.en_attente, self.recente})
+
+        # Rien de plus au second passage
+        self.assertEqual(archiver_demandes(aujourd_hui=date(2026, 3, 1))["archivees"], 0)
+
+    def test_historique_inclut_l_archive(self):
+        archiver_demandes(aujourd_hui=date(2026, 3, 1))
+        historique = GestionConges().lister_demandes_par_employe(self.employe_id, avec_historique=True)
+        self.assertEqual({conge.id for conge in historique},
+                         set(self.anciennes) | {self.en_attente, self.recente})
+        # Toujours triée par date de début décroissante, archive comprise
+        debuts = [conge.date_debut for conge in historique]
+        self.assertEqual(debuts, sorted(debuts, reverse=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Authentification: empreintes de mots de passe, ré-empreinte des comptes en clair, sessions
+"""
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from services.authentification import ServiceAuthentification
+from services.dao import UtilisateurDAO
+from services.sessions import CacheSessions
+from tests.base import TestBase
+from utils.mots_de_passe import est_hache, verifier
+
+
+class TestAuthentification(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.service = ServiceAuthentification()
+        self.sortie = StringIO()
+
+    def executer(self, fonction, *args):
+        with redirect_stdout(self.sortie):
+            return fonction(*args)
+
+    def stocke(self, login):
+        return UtilisateurDAO.trouver_par_login(login).empreinte_mot_de_passe
+
+    def test_mot_de_passe_stocke_en_empreinte(self):
+        self.assertTrue(self.executer(self.service.creer_utilisateur, "alice", "secret"))
+        stocke = self.stocke("alice")
+        self.assertTrue(est_hache(stocke))
+        self.assertNotIn("secret", stocke)
+        self.assertTrue(verifier("secret", stocke))
+
+        self.assertIsNotNone(self.executer(self.service.authentifier, "alice", "secret"))
+        self.assertIsNone(self.executer(self.service.authentifier, "alice", "Secret"))
+
+    def test_mot_de_passe_en_clair_rehache_a_la_connexion(self):
+        # Compte hérité d'une version qui stockait le mot de passe en clair
+        UtilisateurDAO.creer("bob", "ancien", "RH")
+        self.assertIsNone(self.executer(self.service.authentifier, "bob", "autre"))
+        self.assertEqual(self.stocke("bob"), "ancien")
+
+        utilisateur = self.executer(self.service.authentifier, "bob", "ancien")
+        self.assertEqual(utilisateur.role, "RH")
+        self.assertTrue(est_hache(self.stocke("bob")))
+        self.assertIsNotNone(self.executer(self.service.authentifier, "bob", "ancien"))
+
+    def test_sessions_fermees_au_changement_de_mot_de_passe(self):
+        self.executer(self.service.creer_utilisateur, "alice", "secret")
+        jeton = self.executer(self.service.ouvrir_session, "alice", "secret")
+        utilisateur = self.service.utilisateur_de_session(jeton)
+        self.assertEqual(utilisateur.login, "alice")
+
+        self.assertTrue(self.executer(self.service.changer_mot_de_passe, utilisateur.id, "secret", "nouveau"))
+        self.assertIsNone(self.service.utilisateur_de_session(jeton))
+
+    def test_session_expiree(self):
+        maintenant = [0.0]
+        sessions = CacheSessions(duree=10, horloge=lambda: maintenant[0])
+        self.executer(self.service.creer_utilisateur, "alice", "secret")
+        jeton = sessions.ouvrir(UtilisateurDAO.trouver_par_login("alice"))
+        maintenant[0] = 9.5
+        self.assertIsNotNone(sessions.utilisateur(jeton))
+        maintenant[0] = 10
+        self.assertIsNone(sessions.utilisateur(jeton))
+
+
+if __name__ == "__main__":
+    unittest.main()
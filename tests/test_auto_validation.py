@@ -0,0 +1,112 @@
+"""
+Validation automatique: règles par type de congé
+"""
+import unittest
+from unittest import mock
+
+import database
+from models.types_conge import CongeExceptionnel, CongeFactory
+from services import auto_validation
+from services.auto_validation import ValidateurAutomatique, regle_exceptionnel_autorise
+from services.dao import DemandeDAO, LimiteServiceDAO
+from services.gestion_conges import GestionConges
+from tests.base import TestBase
+
+
+class TestAutoValidation(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.employe_id = self.creer_employe("E1", solde=30)
+
+    def statut(self, demande_id):
+        return DemandeDAO.trouver_par_id(demande_id)['statut']
+
+    def test_regles_par_type(self):
+        maladie_courte = self.creer_demande(self.employe_id, "2026-03-02", "2026-03-03", "Maladie")
+        maladie_longue = self.creer_demande(self.employe_id, "2026-03-09", "2026-03-13", "Maladie")
+        annuel = self.creer_demande(self.employe_id, "2026-04-06", "2026-04-07", "Annuel")
+
+        metriques = ValidateurAutomatique(gestion=GestionConges()).executer_une_passe()
+
+        self.assertEqual(self.statut(maladie_courte), 'Validée')
+        # Justificatif requis: décision humaine
+        self.assertEqual(self.statut(maladie_longue), 'En attente')
+        # Type sans règle: jamais validé automatiquement
+        self.assertEqual(self.statut(annuel), 'En attente')
+        self.assertEqual((metriques["examinees"], metriques["validees"]), (3, 1))
+
+    def test_conge_exceptionnel_par_motif(self):
+        # Durée dans la limite du motif (mariage: 4 jours, déménagement: 1 jour)
+        mariage = self.creer_demande(self.employe_id, "2026-05-04", "2026-05-07", "Exceptionnel", motif="mariage")
+        demenagement = self.creer_demande(self.employe_id, "2026-05-11", "2026-05-11", "Exceptionnel",
+                                          motif="demenagement")
+        naissance = self.creer_demande(self.employe_id, "2026-05-18", "2026-05-20", "Exceptionnel",
+                                       motif="naissance")
+        mariage_long = self.creer_demande(self.employe_id, "2026-06-01", "2026-06-06", "Exceptionnel",
+                                          motif="mariage")
+        motif_inconnu = self.creer_demande(self.employe_id, "2026-06-15", "2026-06-15", "Exceptionnel",
+                                           motif="vacances")
+
+        ValidateurAutomatique(gestion=GestionConges()).executer_une_passe()
+
+        for demande_id in (mariage, demenagement, naissance):
+            self.assertEqual(self.statut(demande_id), 'Validée')
+        for demande_id in (mariage_long, motif_inconnu):
+            self.assertEqual(self.statut(demande_id), 'En attente')
+
+    def test_regle_exceptionnel(self):
+        self.assertEqual(auto_validation.MOTIFS_EXCEPTIONNELS_AUTOMATIQUES, set(CongeExceptionnel.DUREES_AUTORISEES))
+        for motif, fin, attendu in (("mariage", "2026-05-07", True), ("mariage", "2026-05-08", False),
+                                    ("demenagement", "2026-05-04", True), ("vacances", "2026-05-04", False)):
+            conge = CongeFactory.creer_conge("Exceptionnel", None, None, "2026-05-04", fin, "En attente",
+                                             motif=motif)
+            with self.subTest(motif=motif, fin=fin):
+                self.assertEqual(regle_exceptionnel_autorise(conge), attendu)
+
+    def test_motifs_retenus_configurables(self):
+        mariage = self.creer_demande(self.employe_id, "2026-05-04", "2026-05-07", "Exceptionnel", motif="mariage")
+        naissance = self.creer_demande(self.employe_id, "2026-05-18", "2026-05-20", "Exceptionnel",
+                                       motif="naissance")
+
+        with mock.patch.object(auto_validation, "MOTIFS_EXCEPTIONNELS_AUTOMATIQUES", frozenset({"naissance"})):
+            ValidateurAutomatique(gestion=GestionConges()).executer_une_passe()
+
+        self.assertEqual(self.statut(mariage), 'En attente')
+        self.assertEqual(self.statut(naissance), 'Validée')
+
+    def test_un_lot_une_transaction(self):
+        ids = [self.creer_demande(self.employe_id, f"2026-03-0{jour}", f"2026-03-0{jour}", "Maladie")
+               for jour in range(2, 7)]
+        # Deux absents au plus dans le service: la troisième validation est annulée seule
+        collegue = self.creer_employe("E2")
+        ids.append(self.creer_demande(collegue, "2026-03-02", "2026-03-02", "Maladie"))
+        autre = self.creer_employe("E3")
+        ids.append(self.creer_demande(autre, "2026-03-02", "2026-03-02", "Maladie"))
+        LimiteServiceDAO.definir("IT", 2)
+
+        conn = database.get_connection()
+        instructions = []
+        conn._conn.set_trace_callback(instructions.append)
+        conn.close()
+        try:
+            metriques = ValidateurAutomatique(gestion=GestionConges(), taille_lot=50).executer_une_passe()
+        finally:
+            conn._conn.set_trace_callback(None)
+
+        self.assertEqual([i for i in instructions if i in ("BEGIN", "COMMIT")], ["BEGIN", "COMMIT"])
+        self.assertEqual((metriques["lots"], metriques["validees"], metriques["ignorees"]), (1, 6, 1))
+        self.assertEqual([self.statut(demande_id) for demande_id in ids], ['Validée'] * 6 + ['En attente'])
+
+    def test_demandes_deja_examinees_ignorees(self):
+        validateur = ValidateurAutomatique(gestion=GestionConges())
+        self.creer_demande(self.employe_id, "2026-03-02", "2026-03-03", "Maladie")
+        validateur.executer_une_passe()
+        self.creer_demande(self.employe_id, "2026-03-16", "2026-03-16", "Maladie")
+
+        metriques = validateur.executer_une_passe()
+        self.assertEqual((metriques["examinees"], metriques["validees"]), (2, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+File des demandes en attente en cache (data_version + seq_modif)
+"""
+import unittest
+
+from services.dao import DemandeDAO, EmployeDAO
+from services.gestion_conges import GestionConges
+from tests.base import TestBase
+
+
+class TestFileAttenteEnCache(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.gc = GestionConges()
+        self.employe_id = self.creer_employe("E1", solde=20)
+        self.ids = [self.creer_demande(self.employe_id, f"2026-03-0{jour}", f"2026-03-0{jour}")
+                    for jour in (4, 2, 3)]
+
+    def tearDown(self):
+        self.gc._file_attente.fermer()
+        super().tearDown()
+
+    def ids_en_attente(self):
+        return [conge.id for conge in self.gc.lister_demandes_en_attente()]
+
+    def test_sans_modification_les_objets_sont_reutilises(self):
+        premiere = self.gc.lister_demandes_en_attente()
+        # Triée par date de début
+        self.assertEqual([c.id for c in premiere], [self.ids[1], self.ids[2], self.ids[0]])
+        seconde = self.gc.lister_demandes_en_attente()
+        self.assertEqual([id(c) for c in seconde], [id(c) for c in premiere])
+
+    def test_modifications_appliquees(self):
+        self.ids_en_attente()
+        DemandeDAO.mettre_a_jour_statut(self.ids[1], 'Validée')
+        nouvelle = self.creer_demande(self.employe_id, "2026-03-01", "2026-03-01")
+        self.assertEqual(self.ids_en_attente(), [nouvelle, self.ids[2], self.ids[0]])
+
+        # Mise à jour d'un employé: ses demandes en attente sont relues
+        EmployeDAO.mettre_a_jour_solde(self.employe_id, 7)
+        self.assertEqual({c.solde_conges for c in self.gc.lister_demandes_en_attente()}, {7})
+
+    def test_suppression_force_une_reconstruction(self):
+        self.ids_en_attente()
+        DemandeDAO.supprimer(self.ids[2])
+        self.assertEqual(self.ids_en_attente(), [self.ids[1], self.ids[0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
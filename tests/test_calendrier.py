@@ -0,0 +1,92 @@
+"""
+Flux iCalendar des absences validées: contenu, filtres, ETag
+"""
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from services.calendrier import CalendrierAbsences
+from services.dao import DemandeDAO, EmployeDAO
+from tests.base import TestBase
+
+
+def evenements(lignes):
+    """[{propriété: valeur}] des VEVENT d'un flux (lignes dépliées)"""
+    texte = "".join(lignes).replace("\r\n ", "")
+    resultat = []
+    for bloc in texte.split("BEGIN:VEVENT\r\n")[1:]:
+        proprietes = dict(ligne.split(":", 1) for ligne in bloc.split("\r\n") if ":" in ligne)
+        resultat.append(proprietes)
+    return resultat
+
+
+class TestCalendrier(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.calendrier = CalendrierAbsences()
+        self.it = self.creer_employe("E1")
+        self.rh = self.creer_employe("E2", service="RH")
+        self.validee = self.creer_demande(self.it, "2026-03-02", "2026-03-04", statut='Validée')
+        self.creer_demande(self.rh, "2026-03-01", "2026-03-01", statut='Validée')
+        self.creer_demande(self.it, "2026-04-01", "2026-04-01")
+
+    def tearDown(self):
+        self.calendrier.fermer()
+        super().tearDown()
+
+    def test_contenu_et_filtres(self):
+        _, _, lignes = self.calendrier.exporter()
+        tout = evenements(lignes)
+        # Validées seulement, par date de début; DTEND: lendemain du dernier jour
+        self.assertEqual([e["DTSTART;VALUE=DATE"] for e in tout], ["20260301", "20260302"])
+        self.assertEqual(tout[1]["DTEND;VALUE=DATE"], "20260305")
+        self.assertEqual(tout[1]["UID"], f"demande-{self.validee}@gestion-conges")
+        self.assertEqual(tout[1]["SUMMARY"], "PrenomE1 NomE1 - Annuel")
+
+        self.assertEqual(len(evenements(self.calendrier.exporter(service="RH")[2])), 1)
+        self.assertEqual(len(evenements(self.calendrier.exporter(employe_id=self.it)[2])), 1)
+        self.assertEqual(evenements(self.calendrier.exporter(service="Ventes")[2]), [])
+
+    def test_lignes_pliees(self):
+        # Nom long et accentué: lignes de plus de 75 octets, pliées sans couper un caractère
+        nom = "É" * 60
+        employe_id = EmployeDAO.creer("E3", nom, "Prenom", "IT", 22)
+        self.creer_demande(employe_id, "2026-05-04", "2026-05-04", statut='Validée')
+
+        lignes = list(self.calendrier.exporter(employe_id=employe_id)[2])
+        for ligne in "".join(lignes).split("\r\n"):
+            self.assertLessEqual(len(ligne.encode("utf-8")), 75)
+        self.assertEqual(evenements(lignes)[0]["SUMMARY"], f"Prenom {nom} - Annuel")
+
+    def test_etag(self):
+        etag, modification, _ = self.calendrier.exporter(service="IT")
+        self.assertIsNone(self.calendrier.exporter(service="IT", etag=etag)[2])
+        self.assertIsNone(self.calendrier.exporter(service="IT", modifie_depuis=modification)[2])
+
+        # Une validation dans un autre service ne change pas l'ETag du flux IT
+        self.creer_demande(self.rh, "2026-06-01", "2026-06-01", statut='Validée')
+        self.assertIsNone(self.calendrier.exporter(service="IT", etag=etag)[2])
+
+        DemandeDAO.supprimer(self.validee)
+        nouvel_etag, _, lignes = self.calendrier.exporter(service="IT", etag=etag)
+        self.assertNotEqual(nouvel_etag, etag)
+        self.assertEqual(evenements(lignes), [])
+        plus_tard = datetime.now(timezone.utc) + timedelta(hours=1)
+        self.assertIsNone(self.calendrier.exporter(service="IT", modifie_depuis=plus_tard)[2])
+
+    def test_modifie_depuis_sans_fuseau(self):
+        # Date HTTP analysée sans fuseau: lue comme UTC
+        _, modification, _ = self.calendrier.exporter()
+        naive = modification.replace(tzinfo=None)
+        self.assertIsNone(self.calendrier.exporter(modifie_depuis=naive)[2])
+        self.assertIsNotNone(self.calendrier.exporter(modifie_depuis=naive - timedelta(seconds=1))[2])
+
+    def test_dates_enregistrees_sans_zeros(self):
+        # Lignes antérieures à la normalisation des dates saisies
+        self.creer_demande(self.rh, "2026-7-1", "2026-7-3", statut='Validée')
+        evenement = evenements(self.calendrier.exporter(service="RH")[2])[-1]
+        self.assertEqual((evenement["DTSTART;VALUE=DATE"], evenement["DTEND;VALUE=DATE"]), ("20260701", "20260704"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Mode commande (JSONL): une transaction par lot, un point de sauvegarde par élément
+"""
+import io
+import json
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from commandes import executer, SORTIE_OK, SORTIE_ECHECS
+from services.dao import DemandeDAO, EmployeDAO, UtilisateurDAO
+from services.resultats import (RESULTAT_OK, RESULTAT_ERREUR, RESULTAT_INVALIDE, RESULTAT_INTROUVABLE,
+                                RESULTAT_NON_AUTORISE)
+from tests.base import TestBase
+
+
+def executer_commande(*arguments):
+    """Retourne (code de sortie, objets JSON écrits sur stdout)"""
+    sortie = io.StringIO()
+    with redirect_stdout(sortie), redirect_stderr(io.StringIO()):
+        code = executer(list(arguments))
+    return code, [json.loads(ligne) for ligne in sortie.getvalue().splitlines()]
+
+
+def ecrire_jsonl(chemin, objets):
+    with open(chemin, "w", encoding="utf-8") as fichier:
+        for objet in objets:
+            fichier.write(json.dumps(objet) + "\n")
+    return chemin
+
+
+class TestCommandes(TestBase):
+
+    def test_import_echec_isole_dans_son_lot(self):
+        ecrire_jsonl("employes.jsonl", [
+            {"matricule": "E1", "nom": "Martin", "prenom": "Marie", "service": "IT"},
+            {"matricule": "E1", "nom": "Doublon", "prenom": "Paul", "service": "IT"},
+            {"matricule": "E2", "nom": "Durand", "prenom": "Marc", "service": "RH", "solde": 10},
+        ])
+        code, resultats = executer_commande("importer-employes", "--fichier", "employes.jsonl", "--taille-lot", "3")
+
+        self.assertEqual(code, SORTIE_ECHECS)
+        self.assertEqual([r["resultat"] for r in resultats], [RESULTAT_OK, RESULTAT_ERREUR, RESULTAT_OK])
+        self.assertEqual([r["ligne"] for r in resultats], [1, 2, 3])
+        self.assertEqual(sorted(e.matricule for e in EmployeDAO.lister_tous()), ["E1", "E2"])
+        self.assertEqual(EmployeDAO.trouver_par_matricule("E2").solde_conges, 10)
+
+    def test_soumettre_puis_valider(self):
+        self.creer_employe("E1", solde=10)
+        ecrire_jsonl("demandes.jsonl", [
+            {"matricule": "E1", "date_debut": "2026-03-02", "date_fin": "2026-03-04", "type_conge": "Annuel"},
+            {"matricule": "E1", "date_debut": "2026-03-10", "date_fin": "2026-03-01", "type_conge": "Annuel"},
+            {"matricule": "X9", "date_debut": "2026-03-02", "date_fin": "2026-03-04", "type_conge": "Annuel"},
+        ])
+        code, resultats = executer_commande("soumettre", "--fichier", "demandes.jsonl")
+        self.assertEqual(code, SORTIE_ECHECS)
+        self.assertEqual([r["resultat"] for r in resultats],
+                         [RESULTAT_OK, RESULTAT_INVALIDE, RESULTAT_INTROUVABLE])
+
+        demande_id = resultats[0]["id"]
+        code, resultats = executer_commande("valider", str(demande_id))
+        self.assertEqual((code, resultats[0]["resultat"]), (SORTIE_OK, RESULTAT_OK))
+        self.assertEqual(DemandeDAO.trouver_par_id(demande_id)['solde_conges'], 7)
+
+        code, lignes = executer_commande("lister", "--statut", "Validée")
+        self.assertEqual([ligne["id"] for ligne in lignes], [demande_id])
+
+    def test_valider_au_nom_d_un_responsable(self):
+        chef = self.creer_employe("C1")
+        equipe = self.creer_demande(self.creer_employe("E1", manager_id=chef), "2026-03-02", "2026-03-03")
+        externe = self.creer_demande(self.creer_employe("X1"), "2026-03-02", "2026-03-03")
+        UtilisateurDAO.creer("chef.it", "secret", "RH", chef)
+
+        code, resultats = executer_commande("valider", "--utilisateur", "chef.it", str(equipe), str(externe))
+        self.assertEqual(code, SORTIE_ECHECS)
+        self.assertEqual([r["resultat"] for r in resultats], [RESULTAT_OK, RESULTAT_NON_AUTORISE])
+        self.assertEqual(DemandeDAO.trouver_par_id(externe)['statut'], 'En attente')
+
+        code, resultats = executer_commande("refuser", "--utilisateur", "inconnu", str(externe))
+        self.assertEqual((code, resultats), (SORTIE_ECHECS, []))
+        self.assertEqual(executer_commande("refuser", str(externe))[0], SORTIE_OK)
+
+    def test_ligne_illisible_signalee(self):
+        with open("employes.jsonl", "w", encoding="utf-8") as fichier:
+            fichier.write('{"matricule": "E1", "nom": "Martin", "prenom": "Marie", "service": "IT"}\n')
+            fichier.write('{"matricule": "E2", "nom": \n')
+            fichier.write('[1, 2]\n')
+            fichier.write('{"matricule": "E3", "nom": "Durand", "prenom": "Marc", "service": "RH"}\n')
+        code, resultats = executer_commande("importer-employes", "--fichier", "employes.jsonl")
+
+        self.assertEqual(code, SORTIE_ECHECS)
+        self.assertEqual([(r["ligne"], r["resultat"]) for r in resultats],
+                         [(1, RESULTAT_OK), (2, RESULTAT_INVALIDE), (3, RESULTAT_INVALIDE), (4, RESULTAT_OK)])
+        self.assertEqual(sorted(e.matricule for e in EmployeDAO.lister_tous()), ["E1", "E3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
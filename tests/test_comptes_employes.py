@@ -0,0 +1,77 @@
+"""
+Lien entre comptes utilisateurs et fiches employés
+"""
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from database import get_read_connection
+from services.authentification import ServiceAuthentification
+from services.dao import EmployeDAO
+from tests.base import TestBase
+
+
+def lien_enregistre(login):
+    conn = get_read_connection()
+    try:
+        return conn.execute("SELECT employe_id FROM utilisateurs WHERE login = ?", (login,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+class TestComptesEmployes(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.service = ServiceAuthentification()
+        self.sortie = StringIO()
+
+    def executer(self, fonction, *args, **kwargs):
+        with redirect_stdout(self.sortie):
+            return fonction(*args, **kwargs)
+
+    def test_compte_cree_avec_sa_fiche(self):
+        employe_id = self.creer_employe("E1", solde=12)
+        self.executer(self.service.creer_utilisateur, "alice", "secret", employe_id=employe_id)
+
+        utilisateur = self.executer(self.service.authentifier, "alice", "secret")
+        self.assertEqual(utilisateur.employe_id, employe_id)
+        self.assertEqual((utilisateur.employe.matricule, utilisateur.employe.solde_conges), ("E1", 12))
+
+    def test_compte_rattache_par_login(self):
+        # Comptes créés avant leur fiche: rattachés à la connexion
+        self.executer(self.service.creer_utilisateur, "E1", "secret")
+        self.executer(self.service.creer_utilisateur, "prenome2.nome2", "secret")
+        self.executer(self.service.creer_utilisateur, "inconnu", "secret")
+        premier = self.creer_employe("E1")
+        second = self.creer_employe("E2")
+
+        self.assertEqual(self.executer(self.service.authentifier, "E1", "secret").employe_id, premier)
+        self.assertEqual(self.executer(self.service.authentifier, "prenome2.nome2", "secret").employe_id, second)
+        self.assertIsNone(self.executer(self.service.authentifier, "inconnu", "secret").employe)
+        self.assertEqual((lien_enregistre("E1"), lien_enregistre("prenome2.nome2")), (premier, second))
+
+    def test_rattachement_manuel(self):
+        user_id = self.executer(self.service.creer_utilisateur, "alice", "secret")
+        employe_id = self.creer_employe("E1")
+        self.assertTrue(self.executer(self.service.lier_employe, user_id, employe_id))
+        self.assertEqual(self.executer(self.service.authentifier, "alice", "secret").employe.matricule, "E1")
+
+    def test_homonymes_non_rattaches(self):
+        EmployeDAO.creer("A1", "Martin", "Paul", "IT", 22)
+        EmployeDAO.creer("A2", "Martin", "Paul", "RH", 22)
+        self.executer(self.service.creer_utilisateur, "paul.martin", "secret")
+
+        self.assertIsNone(self.executer(self.service.authentifier, "paul.martin", "secret").employe)
+        self.assertIsNone(lien_enregistre("paul.martin"))
+
+    def test_compte_rh_jamais_rattache_par_login(self):
+        # Le lien d'un compte RH fixe son périmètre de validation: rattachement manuel seulement
+        self.creer_employe("E1")
+        self.executer(self.service.creer_utilisateur, "E1", "secret", role="RH")
+        self.assertIsNone(self.executer(self.service.authentifier, "E1", "secret").employe)
+        self.assertIsNone(lien_enregistre("E1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Compteurs par statut (table compteurs_statut, tenue par triggers) face au GROUP BY
+"""
+import unittest
+
+from services.dao import DemandeDAO
+from tests.base import TestBase
+
+
+class TestCompteursStatut(TestBase):
+
+    def verifier(self):
+        attendu = DemandeDAO.compter_par("statut")
+        self.assertEqual(DemandeDAO.compter_par_statuts(), attendu)
+        for statut in ("En attente", "Validée", "Refusée"):
+            self.assertEqual(DemandeDAO.compter_par_statut(statut), attendu.get(statut, 0))
+            self.assertEqual(DemandeDAO.existe_par_statut(statut), statut in attendu)
+
+    def test_insertions_mises_a_jour_suppressions(self):
+        employe_id = self.creer_employe("E1")
+        ids = [self.creer_demande(employe_id, f"2025-01-{jour:02d}", f"2025-01-{jour:02d}")
+               for jour in range(1, 21)]
+        self.verifier()
+
+        for demande_id in ids[:8]:
+            DemandeDAO.mettre_a_jour_statut(demande_id, 'Validée')
+        for demande_id in ids[8:12]:
+            DemandeDAO.mettre_a_jour_statut(demande_id, 'Refusée')
+        # Mise à jour sans changement de statut
+        DemandeDAO.mettre_a_jour_statut(ids[0], 'Validée')
+        self.verifier()
+
+        DemandeDAO.supprimer(ids[15])
+        DemandeDAO.supprimer(ids[0])
+        self.verifier()
+
+        # Archivage: les demandes quittent la table courante
+        self.assertGreater(DemandeDAO.archiver_lot("2026-01-01", 5), 0)
+        self.verifier()
+
+        autre = self.creer_employe("E2")
+        self.creer_demande(autre, "2025-02-02", "2025-02-03")
+        self.verifier()
+
+    def test_statut_sans_demande(self):
+        self.verifier()
+        self.assertEqual(DemandeDAO.compter_par_statuts(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
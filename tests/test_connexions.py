@@ -0,0 +1,45 @@
+"""
+Connexions: écrivain unique réentrant et pool de lecture seule
+"""
+import sqlite3
+import threading
+import unittest
+
+import database
+from services.dao import EmployeDAO
+from tests.base import TestBase
+
+
+class TestConnexions(TestBase):
+
+    def test_lecture_seule(self):
+        self.creer_employe("E1")
+        conn = database.get_read_connection()
+        try:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM employes").fetchone()[0], 1)
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM employes")
+        finally:
+            conn.close()
+
+    def test_ecrivain_reentrant_et_exclusif(self):
+        conn = database.get_connection()
+        try:
+            # Le même thread peut réemprunter l'écrivain (appels DAO imbriqués)
+            interne = database.get_connection()
+            interne.close()
+
+            # Un autre thread attend que l'écrivain soit rendu
+            ecrit = threading.Event()
+            fil = threading.Thread(target=lambda: (self.creer_employe("E2"), ecrit.set()))
+            fil.start()
+            self.assertFalse(ecrit.wait(0.2))
+        finally:
+            conn.close()
+        fil.join(5)
+        self.assertTrue(ecrit.is_set())
+        self.assertIsNotNone(EmployeDAO.trouver_par_matricule("E2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Durées enregistrées (nb_jours, jours_deductibles) et leur recalcul
+"""
+import unittest
+
+import database
+from database import get_connection, get_read_connection
+from services.archivage import archiver_demandes
+from services.durees import recalculer_durees
+from services.dao import DemandeDAO
+from services.import_historique import importer_historique
+from services.synchronisation import modifications_depuis
+from tests.base import TestBase
+
+
+def durees(table="demandes_conge"):
+    conn = get_read_connection()
+    try:
+        rows = conn.execute(f"SELECT id, nb_jours, jours_deductibles FROM {table}").fetchall()
+        return {row['id']: (row['nb_jours'], row['jours_deductibles']) for row in rows}
+    finally:
+        conn.close()
+
+
+def executer(requete, parametres=()):
+    conn = get_connection()
+    try:
+        conn.execute(requete, parametres)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class TestDurees(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.employe_id = self.creer_employe("E1")
+        self.annuel = self.creer_demande(self.employe_id, "2026-03-02", "2026-03-04")
+        self.maladie = self.creer_demande(self.employe_id, "2026-03-09", "2026-03-10", type_conge="Maladie")
+
+    def test_calculees_a_l_insertion(self):
+        self.assertEqual(durees(), {self.annuel: (3, 3), self.maladie: (2, 0)})
+        row = DemandeDAO.trouver_par_id(self.annuel)
+        self.assertEqual((row['nb_jours'], row['jours_deductibles']), (3, 3))
+
+    def test_modification_des_dates(self):
+        curseur = modifications_depuis(0)["curseur"]
+        executer("UPDATE demandes_conge SET date_fin = '2026-03-06' WHERE id = ?", (self.annuel,))
+        # Recalculées dans la même transaction, et transmises aux copies synchronisées
+        self.assertEqual(durees(), {self.annuel: (5, 5), self.maladie: (2, 0)})
+        modifications = modifications_depuis(curseur)["modifications"]
+        self.assertEqual([(m["id"], m["donnees"]["nb_jours"]) for m in modifications], [(self.annuel, 5)])
+
+        # Rien à recalculer: aucune ligne réécrite ni journalisée
+        self.assertEqual(recalculer_durees()["calculees"], 0)
+        recalculer_durees(toutes=True)
+        self.assertEqual(modifications_depuis(curseur)["modifications"], modifications)
+
+    def test_archive_et_recalcul_complet(self):
+        ancienne = self.creer_demande(self.employe_id, "2024-01-08", "2024-01-09", statut='Validée')
+        archiver_demandes()
+        self.assertEqual(durees("demandes_conge_archive"), {ancienne: (2, 2)})
+
+        # Lignes sans durées (antérieures aux colonnes): complétées, archive comprise
+        executer("UPDATE demandes_conge_archive SET nb_jours = NULL, jours_deductibles = NULL")
+        executer("UPDATE demandes_conge SET nb_jours = 0, jours_deductibles = 0")
+        self.assertEqual(recalculer_durees()["calculees"], 1)
+        self.assertEqual(durees("demandes_conge_archive"), {ancienne: (2, 2)})
+        self.assertEqual(recalculer_durees(toutes=True)["calculees"], 3)
+        self.assertEqual(durees(), {self.annuel: (3, 3), self.maladie: (2, 0)})
+
+    def test_base_existante_mise_a_jour(self):
+        ancienne = self.creer_demande(self.employe_id, "2024-01-08", "2024-01-09", statut='Validée')
+        archiver_demandes()
+        # Base antérieure aux durées, dates saisies sans zéros (illisibles pour julianday)
+        executer("UPDATE demandes_conge SET date_debut = '2026-3-2', date_fin = '2026-3-4' WHERE id = ?",
+                 (self.annuel,))
+        executer("UPDATE demandes_conge_archive SET date_debut = '2024-1-8', nb_jours = NULL, "
+                 "jours_deductibles = NULL")
+        self.assertEqual(durees()[self.annuel], (None, None))
+        executer(f"PRAGMA user_version = {database.MIGRATIONS.index(database._migration_durees_recalculees)}")
+
+        database.init_db()
+        self.assertEqual(durees(), {self.annuel: (3, 3), self.maladie: (2, 0)})
+        self.assertEqual(durees("demandes_conge_archive"), {ancienne: (2, 2)})
+
+    def test_duree_incalculable_arrete_la_mise_a_jour(self):
+        executer("UPDATE demandes_conge SET type_conge = 'Vacances' WHERE id = ?", (self.maladie,))
+        version = database.MIGRATIONS.index(database._migration_durees_completees)
+        executer(f"PRAGMA user_version = {version}")
+
+        with self.assertRaises(ValueError):
+            database.init_db()
+        conn = get_read_connection()
+        try:
+            self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], version)
+        finally:
+            conn.close()
+
+    def test_calculees_a_l_import(self):
+        with open("historique.jsonl", "w", encoding="utf-8") as flux:
+            flux.write('{"matricule": "E1", "date_debut": "2024-05-06", "date_fin": "2024-05-10", '
+                       '"type_conge": "Sans solde", "statut": "Validée"}\n')
+        importer_historique("historique.jsonl", nb_workers=1, progression=lambda rapport: None)
+        self.assertEqual(sorted(durees().values()), [(2, 0), (3, 3), (5, 0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+Hiérarchie des managers: table de fermeture, déplacements et suppressions
+"""
+import unittest
+
+from database import get_read_connection
+from models.utilisateurs import Utilisateur
+from services.dao import DemandeDAO, EmployeDAO
+from services.gestion_conges import GestionConges
+from services.resultats import RESULTAT_OK, RESULTAT_INVALIDE, RESULTAT_INTROUVABLE, RESULTAT_NON_AUTORISE
+from tests.base import TestBase
+
+
+def liens():
+    """{(ancêtre, descendant): profondeur} de la table de fermeture"""
+    conn = get_read_connection()
+    try:
+        rows = conn.execute("SELECT ancetre_id, descendant_id, profondeur FROM hierarchie_employes").fetchall()
+        return {(row['ancetre_id'], row['descendant_id']): row['profondeur'] for row in rows}
+    finally:
+        conn.close()
+
+
+def fermeture_attendue():
+    """Table de fermeture recalculée en remontant manager_id"""
+    managers = {e.id: e.manager_id for e in EmployeDAO.lister_tous()}
+    attendue = {}
+    for employe_id in managers:
+        ancetre, profondeur = employe_id, 0
+        while ancetre is not None:
+            attendue[(ancetre, employe_id)] = profondeur
+            ancetre, profondeur = managers[ancetre], profondeur + 1
+    return attendue
+
+
+class TestHierarchie(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        # direction > chef > (dev1 > stagiaire, dev2)
+        self.direction = self.creer_employe("D")
+        self.chef = self.creer_employe("C", manager_id=self.direction)
+        self.dev1 = self.creer_employe("V1", manager_id=self.chef)
+        self.dev2 = self.creer_employe("V2", manager_id=self.chef)
+        self.stagiaire = self.creer_employe("S", manager_id=self.dev1)
+        self.autre = self.creer_employe("A")
+
+    def subordonnes(self, employe_id):
+        return {e.id: profondeur for e, profondeur in EmployeDAO.lister_subordonnes(employe_id)}
+
+    def test_insertion_herite_des_ancetres(self):
+        self.assertEqual(liens(), fermeture_attendue())
+        self.assertEqual(self.subordonnes(self.direction),
+                         {self.chef: 1, self.dev1: 2, self.dev2: 2, self.stagiaire: 3})
+
+    def test_deplacer_un_sous_arbre(self):
+        self.assertEqual(EmployeDAO.deplacer(self.dev1, self.autre), RESULTAT_OK)
+        self.assertEqual(liens(), fermeture_attendue())
+        self.assertEqual(self.subordonnes(self.autre), {self.dev1: 1, self.stagiaire: 2})
+        self.assertEqual(self.subordonnes(self.direction), {self.chef: 1, self.dev2: 2})
+
+        self.assertEqual(EmployeDAO.deplacer(self.dev1, None), RESULTAT_OK)
+        self.assertEqual(liens(), fermeture_attendue())
+        self.assertFalse(EmployeDAO.a_des_subordonnes(self.autre))
+
+    def test_deplacer_sous_un_descendant_est_refuse(self):
+        avant = liens()
+        self.assertEqual(EmployeDAO.deplacer(self.chef, self.stagiaire), RESULTAT_INVALIDE)
+        self.assertEqual(EmployeDAO.deplacer(self.chef, self.chef), RESULTAT_INVALIDE)
+        self.assertEqual(EmployeDAO.deplacer(self.chef, 999), RESULTAT_INTROUVABLE)
+        self.assertEqual(liens(), avant)
+
+    def test_suppression_rattache_les_subordonnes(self):
+        self.assertTrue(EmployeDAO.supprimer(self.chef))
+
+        self.assertEqual(EmployeDAO.trouver_par_id(self.dev1).manager_id, self.direction)
+        self.assertEqual(EmployeDAO.trouver_par_id(self.dev2).manager_id, self.direction)
+        self.assertEqual(liens(), fermeture_attendue())
+        self.assertEqual(self.subordonnes(self.direction), {self.dev1: 1, self.dev2: 1, self.stagiaire: 2})
+        self.assertNotIn(self.chef, {descendant for _, descendant in liens()})
+
+    def test_file_limitee_au_sous_arbre(self):
+        gc = GestionConges()
+        demandes = {employe_id: self.creer_demande(employe_id, "2026-03-02", "2026-03-03")
+                    for employe_id in (self.chef, self.dev2, self.stagiaire, self.autre)}
+
+        perimetre = gc.perimetre_validation(Utilisateur(1, "chef", "", "RH", self.chef))
+        self.assertEqual(perimetre, self.chef)
+        self.assertEqual({c.id for c in gc.lister_demandes_en_attente(perimetre)},
+                         {demandes[self.dev2], demandes[self.stagiaire]})
+
+        # Compte RH sans subordonnés, ou sans fiche: toute la file
+        self.assertIsNone(gc.perimetre_validation(Utilisateur(2, "autre", "", "RH", self.autre)))
+        self.assertIsNone(gc.perimetre_validation(Utilisateur(3, "rh", "", "RH")))
+        self.assertEqual(len(gc.lister_demandes_en_attente()), 4)
+
+    def test_traitement_limite_au_sous_arbre(self):
+        gc = GestionConges()
+        chef = Utilisateur(1, "chef", "", "RH", self.chef)
+        demandes = {employe_id: self.creer_demande(employe_id, "2026-03-02", "2026-03-03")
+                    for employe_id in (self.chef, self.stagiaire, self.dev2, self.autre)}
+
+        self.assertEqual(gc.tenter_validation(demandes[self.stagiaire], chef)[0], RESULTAT_OK)
+        self.assertEqual(gc.tenter_refus(demandes[self.dev2], chef)[0], RESULTAT_OK)
+        # Hors du sous-arbre, ou sa propre demande: rien n'est modifié
+        for employe_id in (self.autre, self.chef):
+            with self.subTest(employe_id=employe_id):
+                self.assertEqual(gc.tenter_validation(demandes[employe_id], chef),
+                                 (RESULTAT_NON_AUTORISE, "Demande hors de votre périmètre"))
+                self.assertEqual(gc.tenter_refus(demandes[employe_id], chef)[0], RESULTAT_NON_AUTORISE)
+                self.assertEqual(DemandeDAO.trouver_par_id(demandes[employe_id])['statut'], 'En attente')
+
+        # Compte non RH: jamais autorisé; compte RH sans subordonnés: toute la file
+        employe = Utilisateur(2, "autre", "", "Employe", self.autre)
+        self.assertEqual(gc.tenter_validation(demandes[self.chef], employe)[0], RESULTAT_NON_AUTORISE)
+        rh = Utilisateur(3, "rh", "", "RH", self.autre)
+        self.assertEqual(gc.tenter_validation(demandes[self.chef], rh)[0], RESULTAT_OK)
+        self.assertEqual(gc.tenter_validation(demandes[self.autre])[0], RESULTAT_OK)
+
+    def test_iterateur_du_sous_arbre_par_lots(self):
+        gc = GestionConges()
+        attendues = []
+        for jour in range(1, 8):
+            for employe_id in (self.dev1, self.stagiaire, self.autre):
+                demande_id = self.creer_demande(employe_id, f"2026-03-{jour:02d}", f"2026-03-{jour:02d}")
+                if employe_id != self.autre:
+                    attendues.append(demande_id)
+
+        demandes = list(gc.iterer_demandes_en_attente(taille_lot=3, responsable_id=self.chef))
+        # Même ordre (date de début, ID) que la liste complète du sous-arbre
+        self.assertEqual([c.id for c in demandes], attendues)
+        self.assertEqual([c.id for c in demandes], [c.id for c in gc.lister_demandes_en_attente(self.chef)])
+
+
+if __name__ == "__main__":
+    unittest.main()
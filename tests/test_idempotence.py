@@ -0,0 +1,51 @@
+"""
+Soumission idempotente: clé d'idempotence et empreinte du contenu
+"""
+import unittest
+
+from services.dao import DemandeDAO
+from services.gestion_conges import GestionConges
+from services.resultats import RESULTAT_OK
+from tests.base import TestBase
+
+
+class TestIdempotence(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.gc = GestionConges()
+        self.employe_id = self.creer_employe("E1")
+
+    def soumettre(self, date_debut, date_fin, type_conge="Annuel", cle=None):
+        code, _, demande_id = self.gc.tenter_ajout_demande(self.employe_id, date_debut, date_fin, type_conge,
+                                                           cle_idempotence=cle)
+        self.assertEqual(code, RESULTAT_OK)
+        return demande_id
+
+    def nombre_de_demandes(self):
+        return len(DemandeDAO.lister_par_employe(self.employe_id))
+
+    def test_meme_cle_retourne_la_demande_existante(self):
+        premiere = self.soumettre("2026-03-02", "2026-03-03", cle="requete-1")
+        self.assertEqual(self.soumettre("2026-03-02", "2026-03-03", cle="requete-1"), premiere)
+        # Clé rejouée avec un autre contenu (nouvel envoi d'un client): même réponse
+        self.assertEqual(self.soumettre("2026-04-02", "2026-04-03", cle="requete-1"), premiere)
+        self.assertEqual(self.nombre_de_demandes(), 1)
+
+    def test_contenu_identique(self):
+        premiere = self.soumettre("2026-03-02", "2026-03-03")
+        self.assertEqual(self.soumettre("2026-03-02", "2026-03-03", type_conge="annuel"), premiere)
+        self.assertEqual(self.soumettre("2026-03-02", "2026-03-03", cle="autre-cle"), premiere)
+        self.assertNotEqual(self.soumettre("2026-03-02", "2026-03-04"), premiere)
+        self.assertEqual(self.nombre_de_demandes(), 2)
+
+    def test_nouvelle_soumission_apres_refus(self):
+        premiere = self.soumettre("2026-03-02", "2026-03-03")
+        DemandeDAO.mettre_a_jour_statut(premiere, 'Refusée')
+        seconde = self.soumettre("2026-03-02", "2026-03-03")
+        self.assertNotEqual(seconde, premiere)
+        self.assertEqual(self.soumettre("2026-03-02", "2026-03-03"), seconde)
+
+
+if __name__ == "__main__":
+    unittest.main()
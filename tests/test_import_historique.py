@@ -0,0 +1,126 @@
+"""
+Import parallèle de l'historique: validation, rejets et reprise
+"""
+import os
+import unittest
+
+from services.dao import DemandeDAO
+from services.import_historique import importer_historique
+from services.resultats import RESULTAT_INVALIDE, RESULTAT_INTROUVABLE
+from tests.base import TestBase
+
+
+class Interruption(Exception):
+    pass
+
+
+class TestImportHistorique(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.employe_id = self.creer_employe("E1")
+        lignes = ["matricule,date_debut,date_fin,type_conge,statut,commentaire,motif"]
+        for jour in range(1, 11):
+            lignes.append(f"E1,2024-01-{jour:02d},2024-01-{jour:02d},Annuel,Validée,,")
+        lignes.append("E1,2024-02-05,2024-02-01,Annuel,Validée,,")
+        lignes.append("X9,2024-02-06,2024-02-06,Annuel,Refusée,,")
+        lignes.append("E1,2024-02-07,2024-02-07,Exceptionnel,Validée,,mariage")
+        with open("historique.csv", "w", encoding="utf-8") as flux:
+            flux.write("\n".join(lignes) + "\n")
+
+    def importer(self, progression=None):
+        rapports = []
+
+        def suivre(rapport):
+            rapports.append(rapport)
+            if progression:
+                progression(rapport)
+
+        return importer_historique("historique.csv", taille_bloc=4, nb_workers=2, progression=suivre), rapports
+
+    def demandes(self):
+        return DemandeDAO.lister_par_employe(self.employe_id)
+
+    def test_import_et_rejets(self):
+        resume, rapports = self.importer()
+        self.assertEqual((resume["blocs"], resume["importees"], resume["rejetees"]), (4, 11, 2))
+        rejets = [rejet for rapport in rapports for rejet in rapport["rejets"]]
+        self.assertEqual([(r["ligne"], r["resultat"]) for r in rejets],
+                         [(12, RESULTAT_INVALIDE), (13, RESULTAT_INTROUVABLE)])
+        self.assertEqual(len(self.demandes()), 11)
+        self.assertEqual({row['statut'] for row in self.demandes()}, {'Validée'})
+
+        # Fichier déjà importé: rien n'est relu
+        resume, _ = self.importer()
+        self.assertEqual((resume["reprise_apres_ligne"], resume["importees"]), (13, 0))
+        self.assertEqual(len(self.demandes()), 11)
+
+    def test_reprise_apres_interruption(self):
+        def interrompre(rapport):
+            raise Interruption()
+
+        with self.assertRaises(Interruption):
+            self.importer(interrompre)
+        # Le premier bloc est validé avec son point de reprise
+        self.assertEqual(len(self.demandes()), 4)
+
+        resume, rapports = self.importer()
+        self.assertEqual(resume["reprise_apres_ligne"], 4)
+        self.assertEqual((resume["importees"], resume["rejetees"]), (7, 2))
+        self.assertEqual(sorted(row['date_debut'] for row in self.demandes())[:10],
+                         [f"2024-01-{jour:02d}" for jour in range(1, 11)])
+        self.assertEqual(len(self.demandes()), 11)
+
+    def test_demandes_deja_en_base_ignorees(self):
+        existante = self.creer_demande(self.employe_id, "2024-01-03", "2024-01-03")
+        resume, rapports = self.importer()
+        self.assertEqual((resume["importees"], resume["doublons"], resume["rejetees"]), (10, 1, 2))
+        self.assertEqual(sum(rapport["importees"] for rapport in rapports), 10)
+        self.assertEqual(len(self.demandes()), 11)
+        # Demandes importées: reconnues comme doublons d'une nouvelle soumission
+        self.assertEqual(DemandeDAO.trouver_doublon(self.employe_id, "2024-01-03", "2024-01-03", "Annuel"),
+                         existante)
+        self.assertIsNotNone(DemandeDAO.trouver_doublon(self.employe_id, "2024-01-04", "2024-01-04", "annuel"))
+
+        # Même historique sous un autre chemin: pas de point de reprise, aucun doublon inséré
+        os.rename("historique.csv", "copie.csv")
+        resume = importer_historique("copie.csv", taille_bloc=4, nb_workers=2, progression=lambda rapport: None)
+        self.assertEqual((resume["reprise_apres_ligne"], resume["importees"], resume["doublons"]), (0, 0, 11))
+        self.assertEqual(len(self.demandes()), 11)
+
+
+class TestImportHistoriqueEnregistrements(TestBase):
+
+    def test_champ_csv_sur_plusieurs_lignes(self):
+        employe_id = self.creer_employe("E1")
+        with open("historique.csv", "w", encoding="utf-8", newline="") as flux:
+            flux.write("matricule,date_debut,date_fin,type_conge,statut,commentaire\n")
+            flux.write("E1,2024-01-02,2024-01-02,Annuel,Validée,\"premier\nsecond\"\n")
+            flux.write("E1,2024-01-03,2024-01-03,Annuel,Validée,\n")
+            flux.write("E1,2024-01-05,2024-01-04,Annuel,Validée,\n")
+        rejets = []
+        resume = importer_historique("historique.csv", taille_bloc=1, nb_workers=2,
+                                     progression=lambda rapport: rejets.extend(rapport["rejets"]))
+
+        self.assertEqual((resume["importees"], resume["rejetees"]), (2, 1))
+        # Numéro de la première ligne physique de l'enregistrement rejeté
+        self.assertEqual([rejet["ligne"] for rejet in rejets], [5])
+        commentaires = {row['date_debut']: row['commentaire'] for row in DemandeDAO.lister_par_employe(employe_id)}
+        self.assertEqual(commentaires["2024-01-02"], "premier\nsecond")
+
+    def test_ligne_jsonl_illisible_rejetee(self):
+        self.creer_employe("E1")
+        with open("historique.jsonl", "w", encoding="utf-8") as flux:
+            flux.write('{"matricule": "E1", "date_debut": "2024-01-02", "date_fin": "2024-01-02", '
+                       '"type_conge": "Annuel", "statut": "Validée"}\n')
+            flux.write('{"matricule": "E1", \n')
+        rejets = []
+        resume = importer_historique("historique.jsonl", nb_workers=1,
+                                     progression=lambda rapport: rejets.extend(rapport["rejets"]))
+        self.assertEqual((resume["importees"], resume["rejetees"]), (1, 1))
+        self.assertEqual((rejets[0]["ligne"], rejets[0]["resultat"]), (2, RESULTAT_INVALIDE))
+        self.assertTrue(rejets[0]["message"].startswith("JSON invalide"))
+
+
+if __name__ == "__main__":
+    unittest.main()
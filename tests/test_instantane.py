@@ -0,0 +1,96 @@
+"""
+Instantané en colonnes: agrégats NumPy face au GROUP BY SQL
+"""
+import random
+import unittest
+from datetime import date, timedelta
+
+from database import get_read_connection
+from services.archivage import archiver_demandes
+from services.instantane import Instantane, exporter_instantane
+from tests.base import TestBase
+
+HISTORIQUE = """
+             SELECT d.*, e.service FROM (
+                 SELECT employe_id, date_debut, date_fin, type_conge, statut FROM demandes_conge
+                 UNION ALL
+                 SELECT employe_id, date_debut, date_fin, type_conge, statut FROM demandes_conge_archive) d
+             JOIN employes e ON e.id = d.employe_id
+             """
+
+
+def agreger_sql(colonnes, mesure, where="1"):
+    expression = {"nombre": "COUNT(*)",
+                  "jours": "SUM(julianday(date_fin) - julianday(date_debut) + 1)"}[mesure]
+    select = ", ".join(colonnes)
+    conn = get_read_connection()
+    try:
+        rows = conn.execute(f"SELECT {select}, {expression} AS valeur FROM ({HISTORIQUE}) "
+                            f"WHERE {where} GROUP BY {select}").fetchall()
+        return {tuple(row[:-1]): int(row['valeur']) for row in rows}
+    finally:
+        conn.close()
+
+
+class TestInstantane(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        hasard = random.Random(41)
+        employes = [self.creer_employe(f"E{i}", service=hasard.choice(["IT", "RH", "Ventes"])) for i in range(12)]
+        for _ in range(400):
+            debut = date(2024, 1, 1) + timedelta(days=hasard.randrange(800))
+            fin = debut + timedelta(days=hasard.randrange(10))
+            self.creer_demande(hasard.choice(employes), debut.isoformat(), fin.isoformat(),
+                               type_conge=hasard.choice(["Annuel", "Maladie", "Sans solde"]),
+                               statut=hasard.choice(["En attente", "Validée", "Refusée"]))
+        archiver_demandes(aujourd_hui=date(2026, 3, 1))
+        self.meta = exporter_instantane("instantane", taille_lot=64)
+        self.instantane = Instantane("instantane")
+
+    def test_exporte_toutes_les_demandes(self):
+        self.assertEqual(self.meta["lignes"], 400)
+        self.assertGreater(int(self.instantane.colonne("archivee").sum()), 0)
+
+    def test_agregats_comme_en_sql(self):
+        for par, colonnes in ((("type_conge", "statut"), ("type_conge", "statut")),
+                              (("service", "mois"), ("service", "substr(date_debut, 1, 7)"))):
+            for mesure in ("nombre", "jours"):
+                with self.subTest(par=par, mesure=mesure):
+                    resultat = {tuple(ligne[cle] for cle in par): ligne[mesure]
+                                for ligne in self.instantane.agreger(par=par, mesure=mesure)}
+                    self.assertEqual(resultat, agreger_sql(colonnes, mesure))
+
+    def test_regroupement_sur_toutes_les_cles(self):
+        par = ("employe_id", "service", "type_conge", "statut", "annee", "mois", "archivee")
+        resultat = {tuple(ligne[cle] for cle in par): ligne["jours"]
+                    for ligne in self.instantane.agreger(par=par, mesure="jours")}
+        # La source SQL ne distingue pas l'archive: les deux groupes sont additionnés
+        sans_archive = {}
+        for cle, valeur in resultat.items():
+            sans_archive[cle[:-1]] = sans_archive.get(cle[:-1], 0) + valeur
+        attendu = agreger_sql(("employe_id", "service", "type_conge", "statut",
+                               "CAST(substr(date_debut, 1, 4) AS INTEGER)", "substr(date_debut, 1, 7)"), "jours")
+        self.assertEqual(sans_archive, attendu)
+
+    def test_filtres(self):
+        resultat = self.instantane.agreger(par="service", statut="Validée", periode=("2025-01-01", "2025-03-31"))
+        attendu = agreger_sql(("service",), "nombre",
+                              "statut = 'Validée' AND date_debut <= '2025-03-31' AND date_fin >= '2025-01-01'")
+        self.assertEqual({(ligne["service"],): ligne["nombre"] for ligne in resultat}, attendu)
+        self.assertEqual(self.instantane.agreger(type_conge="Inconnu"), [])
+
+
+class TestInstantaneDatesSansZeros(TestBase):
+
+    def test_dates_lues_comme_a_la_saisie(self):
+        employe_id = self.creer_employe("E1")
+        self.creer_demande(employe_id, "2026-6-1", "2026-6-3", statut='Validée')
+        self.creer_demande(employe_id, "2026-06-29", "2026-7-2", statut='Validée')
+        exporter_instantane("instantane")
+        resultat = Instantane("instantane").agreger(par="mois", mesure="jours")
+        self.assertEqual(resultat, [{"mois": "2026-06", "jours": 7}])
+
+
+if __name__ == "__main__":
+    unittest.main()
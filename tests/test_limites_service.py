@@ -0,0 +1,114 @@
+"""
+Limite d'absents simultanés par service (balayage des bornes d'intervalles)
+"""
+import unittest
+
+import database
+from services.dao import DemandeDAO, LimiteServiceDAO
+from services.gestion_conges import GestionConges
+from services.resultats import RESULTAT_OK, RESULTAT_LIMITE_SERVICE
+from tests.base import TestBase
+from utils.planning import pic_absences
+
+
+class TestPicAbsences(unittest.TestCase):
+
+    def test_pic_et_date(self):
+        absences = [(1, "2026-03-02", "2026-03-06"),
+                    (2, "2026-03-04", "2026-03-10"),
+                    (3, "2026-03-06", "2026-03-06")]
+        self.assertEqual(pic_absences(absences, "2026-03-01", "2026-03-31"), (3, "2026-03-06"))
+
+    def test_fin_et_debut_le_meme_jour_se_suivent(self):
+        # Le 4 inclus pour l'un, le 5 pour l'autre: jamais absents ensemble
+        absences = [(1, "2026-03-02", "2026-03-04"), (2, "2026-03-05", "2026-03-06")]
+        self.assertEqual(pic_absences(absences, "2026-03-01", "2026-03-31"), (1, "2026-03-02"))
+
+    def test_un_employe_compte_une_fois(self):
+        absences = [(1, "2026-03-02", "2026-03-06"), (1, "2026-03-04", "2026-03-05")]
+        self.assertEqual(pic_absences(absences, "2026-03-01", "2026-03-31")[0], 1)
+
+    def test_dates_sans_zeros(self):
+        # Format accepté à la saisie (strptime): même résultat qu'en ISO
+        absences = [(1, "2026-3-2", "2026-3-6"), (2, "2026-03-04", "2026-3-10")]
+        self.assertEqual(pic_absences(absences, "2026-3-1", "2026-3-31"), (2, "2026-03-04"))
+
+    def test_hors_periode(self):
+        absences = [(1, "2026-02-02", "2026-02-06")]
+        self.assertEqual(pic_absences(absences, "2026-03-01", "2026-03-31"), (0, None))
+
+
+class TestLimiteService(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.gc = GestionConges()
+        self.employes = [self.creer_employe(f"E{i}", service="IT") for i in range(3)]
+        self.externe = self.creer_employe("X1", service="RH")
+        LimiteServiceDAO.definir("IT", 2)
+
+    def test_validation_refusee_au_dela_de_la_limite(self):
+        premiers = [self.creer_demande(self.employes[0], "2026-03-02", "2026-03-06"),
+                    self.creer_demande(self.employes[1], "2026-03-05", "2026-03-10")]
+        for demande_id in premiers:
+            self.assertEqual(self.gc.tenter_validation(demande_id)[0], RESULTAT_OK)
+        # Un autre service ne compte pas
+        self.assertEqual(self.gc.tenter_validation(
+            self.creer_demande(self.externe, "2026-03-05", "2026-03-05"))[0], RESULTAT_OK)
+
+        troisieme = self.creer_demande(self.employes[2], "2026-03-06", "2026-03-09")
+        resultat, message = self.gc.tenter_validation(troisieme)
+        self.assertEqual(resultat, RESULTAT_LIMITE_SERVICE)
+        self.assertIn("3 absents le 2026-03-06", message)
+        row = DemandeDAO.trouver_par_id(troisieme)
+        self.assertEqual((row['statut'], row['solde_conges']), ('En attente', 22))
+
+        # Sans chevauchement du pic: acceptée
+        apres = self.creer_demande(self.employes[2], "2026-03-11", "2026-03-12")
+        self.assertEqual(self.gc.tenter_validation(apres)[0], RESULTAT_OK)
+
+    def test_limite_supprimee(self):
+        for employe_id in self.employes:
+            demande_id = self.creer_demande(employe_id, "2026-03-02", "2026-03-03")
+            self.gc.tenter_validation(demande_id)
+        self.assertEqual(len(DemandeDAO.lister_par_statut('Validée')), 2)
+
+        LimiteServiceDAO.supprimer("IT")
+        attente = DemandeDAO.lister_par_statut('En attente')
+        self.assertEqual(self.gc.tenter_validation(attente[0]['id'])[0], RESULTAT_OK)
+
+    def test_dates_saisies_sans_zeros_enregistrees_en_iso(self):
+        code, _, demande_id = self.gc.tenter_ajout_demande(self.employes[0], "2026-3-2", "2026-3-6", "Annuel")
+        self.assertEqual(code, RESULTAT_OK)
+        row = DemandeDAO.trouver_par_id(demande_id)
+        self.assertEqual((row['date_debut'], row['date_fin']), ("2026-03-02", "2026-03-06"))
+
+    def test_dates_existantes_reecrites_en_iso(self):
+        # Demandes enregistrées telles que saisies, avant la normalisation
+        ancienne = self.creer_demande(self.employes[0], "2026-3-2", "2026-3-6", statut='Validée')
+        archivee = self.creer_demande(self.employes[1], "2025-1-2", "2025-1-3", statut='Validée')
+        self.assertEqual(DemandeDAO.archiver_lot("2026-01-01", 10), 1)
+        # Comparaison de textes: '2026-3-2' > '2026-03-05'
+        self.assertEqual(DemandeDAO.absences_service("IT", "2026-03-04", "2026-03-05"), [])
+        self.assertEqual(DemandeDAO.archiver_lot("2026-03-07", 10), 0)
+
+        conn = database.get_connection()
+        conn.execute(f"PRAGMA user_version = {database.MIGRATIONS.index(database._migration_dates_iso)}")
+        conn.commit()
+        conn.close()
+        database.init_db()
+
+        self.assertEqual(DemandeDAO.absences_service("IT", "2026-03-04", "2026-03-05"),
+                         [(self.employes[0], "2026-03-02", "2026-03-06")])
+        self.assertEqual({tuple(row)[:3] for row in DemandeDAO.lister_absences_depuis("2025-01-01")},
+                         {(self.employes[0], "2026-03-02", "2026-03-06"),
+                          (self.employes[1], "2025-01-02", "2025-01-03")})
+        self.assertEqual(DemandeDAO.trouver_par_id(ancienne)['nb_jours'], 5)
+        self.assertEqual(DemandeDAO.trouver_doublon(self.employes[0], "2026-03-02", "2026-03-06", "Annuel"),
+                         ancienne)
+        self.assertIsNone(DemandeDAO.trouver_par_id(archivee))
+        self.assertEqual(DemandeDAO.archiver_lot("2026-03-07", 10), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Isolation des locataires (une base par société)
+"""
+import unittest
+
+import database
+from services.auto_validation import ValidateurAutomatique
+from services.cache_demandes import FileAttenteEnCache
+from services.dao import DemandeDAO, EmployeDAO
+from services.gestion_conges import GestionConges
+from tests.base import TestBase
+
+
+class TestLocataires(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.nord = GestionConges(locataire="nord")
+        self.sud = GestionConges(locataire="sud")
+        with database.locataire("nord"):
+            self.employe_nord = self.creer_employe("N1")
+            for jour in range(2, 7):
+                self.creer_demande(self.employe_nord, f"2026-03-0{jour}", f"2026-03-0{jour}")
+        with database.locataire("sud"):
+            self.employe_sud = self.creer_employe("S1")
+            self.creer_demande(self.employe_sud, "2026-04-01", "2026-04-02")
+
+    def test_donnees_separees(self):
+        self.assertEqual([e.matricule for e in self.nord.list_employes()], ["N1"])
+        self.assertEqual([e.matricule for e in self.sud.list_employes()], ["S1"])
+        # Sans locataire: la base par défaut, vide
+        self.assertEqual(EmployeDAO.lister_tous(), [])
+        self.assertEqual(database.lister_locataires(), ["nord", "sud"])
+
+    def test_iterateur_dans_le_locataire_du_service(self):
+        # Une méthode génératrice lit la base du service, même consommée hors contexte
+        demandes = list(self.nord.iterer_demandes_en_attente(taille_lot=2))
+        self.assertEqual(len(demandes), 5)
+        self.assertEqual({conge.employe_id for conge in demandes}, {self.employe_nord})
+
+    def test_iterateur_reste_dans_son_locataire(self):
+        iterateur = self.nord.iterer_demandes_en_attente(taille_lot=2)
+        premiere = next(iterateur)
+        self.assertIsNone(database.locataire_courant())
+
+        # Consommé dans le contexte d'un autre locataire: toujours les demandes du nord
+        with database.locataire("sud"):
+            suite = list(iterateur)
+            self.assertEqual(database.locataire_courant(), "sud")
+            self.assertEqual(len(self.sud.lister_demandes_en_attente()), 1)
+
+        employes = {conge.employe_id for conge in [premiere] + suite}
+        self.assertEqual(len(suite) + 1, 5)
+        self.assertEqual(employes, {self.employe_nord})
+
+    def test_validation_automatique_dans_le_locataire(self):
+        with database.locataire("sud"):
+            maladie = self.creer_demande(self.employe_sud, "2026-05-04", "2026-05-05", type_conge="Maladie")
+        # Créé hors contexte: le validateur suit le locataire de sa gestion
+        ValidateurAutomatique(gestion=self.sud).executer_une_passe()
+        with database.locataire("sud"):
+            self.assertEqual(DemandeDAO.trouver_par_id(maladie)['statut'], 'Validée')
+
+    def test_vue_en_cache_par_base(self):
+        vue = FileAttenteEnCache(self.nord._convertir_rows_en_conges)
+        with database.locataire("nord"):
+            self.assertEqual(len(vue.demandes()), 5)
+        with database.locataire("sud"):
+            self.assertEqual([c.employe_id for c in vue.demandes()], [self.employe_sud])
+            self.creer_demande(self.employe_sud, "2026-05-04", "2026-05-05")
+            self.assertEqual(len(vue.demandes()), 2)
+        with database.locataire("nord"):
+            self.assertEqual(len(vue.demandes()), 5)
+        vue.fermer()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Maintenance: sauvegarde à chaud et vacuum incrémental
+"""
+import os
+import sqlite3
+import unittest
+
+import database
+
+from services import maintenance
+from services.dao import EmployeDAO
+from tests.base import TestBase
+
+
+class TestMaintenance(TestBase):
+
+    def test_sauvegarde_complete(self):
+        employe_id = self.creer_employe("E1")
+        for jour in range(1, 29):
+            self.creer_demande(employe_id, f"2026-02-{jour:02d}", f"2026-02-{jour:02d}")
+
+        rapport = maintenance.sauvegarder("sauvegardes/copie.db", pages_par_etape=1, pause=0)
+        self.assertEqual(rapport["tache"], "sauvegarde")
+        self.assertGreater(rapport["etapes"], 1)
+        self.assertEqual(os.listdir("sauvegardes"), ["copie.db"])
+
+        copie = sqlite3.connect("sauvegardes/copie.db")
+        try:
+            self.assertEqual(copie.execute("SELECT COUNT(*) FROM demandes_conge").fetchone()[0], 28)
+            self.assertEqual(copie.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+        finally:
+            copie.close()
+
+    def test_vacuum_rend_les_pages_libres(self):
+        for i in range(300):
+            EmployeDAO.creer(f"M{i:04d}", "N" * 200, "P" * 200, "IT", 22)
+        for employe in EmployeDAO.lister_tous():
+            EmployeDAO.supprimer(employe.id)
+
+        rapport = maintenance.vacuum_incremental()
+        self.assertGreater(rapport["pages_liberees"], 0)
+        self.assertEqual(rapport["pages_libres"], 0)
+
+
+def mode_auto_vacuum():
+    # Connexion neuve: une connexion déjà ouverte garde le mode lu à son ouverture
+    conn = sqlite3.connect(database.DB_PATH)
+    try:
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class TestVacuumIncremental(TestBase):
+
+    def test_base_neuve(self):
+        self.assertEqual(mode_auto_vacuum(), maintenance.MODE_VACUUM_INCREMENTAL)
+        self.assertTrue(maintenance.activer_vacuum_incremental()["deja_actif"])
+
+    def test_base_existante_activee_a_la_demande(self):
+        # Base créée par une version sans auto_vacuum: init_db ne lance pas de VACUUM
+        database.fermer_connexions()
+        os.remove(database.DB_PATH)
+        ancienne = sqlite3.connect(database.DB_PATH)
+        database._migration_tables_initiales(ancienne.cursor())
+        ancienne.execute("PRAGMA user_version = 1")
+        ancienne.commit()
+        ancienne.close()
+
+        database.init_db()
+        self.creer_employe("E1")
+        self.assertEqual(mode_auto_vacuum(), 0)
+
+        rapport = maintenance.activer_vacuum_incremental()
+        self.assertFalse(rapport["deja_actif"])
+        self.assertEqual(mode_auto_vacuum(), maintenance.MODE_VACUUM_INCREMENTAL)
+        self.assertEqual(len(EmployeDAO.lister_tous()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
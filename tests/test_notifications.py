@@ -0,0 +1,69 @@
+"""
+Attente longue des nouvelles demandes en attente (NotificateurDemandes)
+"""
+import threading
+import unittest
+
+import database
+
+from services.notifications import NotificateurDemandes
+from tests.base import TestBase
+
+
+class TestNotifications(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.employe_id = self.creer_employe("E1")
+        self.ancienne = self.creer_demande(self.employe_id, "2026-03-02", "2026-03-02")
+        self.notificateur = NotificateurDemandes(intervalle=0.02)
+        self.notificateur.demarrer()
+
+    def tearDown(self):
+        self.notificateur.arreter(5)
+        super().tearDown()
+
+    def test_reveil_sur_nouvelle_demande(self):
+        depart = self.notificateur.dernier_id()
+        self.assertEqual(depart, self.ancienne)
+        resultat = []
+        abonne = threading.Thread(target=lambda: resultat.append(self.notificateur.attendre(depart, timeout=5)))
+        abonne.start()
+
+        # Une demande déjà traitée n'est pas notifiée
+        self.creer_demande(self.employe_id, "2026-03-03", "2026-03-03", statut='Validée')
+        nouvelle = self.creer_demande(self.employe_id, "2026-03-04", "2026-03-04")
+        abonne.join(5)
+        dernier_id, rows = resultat[0]
+        self.assertEqual(dernier_id, nouvelle)
+        self.assertEqual([row['id'] for row in rows], [nouvelle])
+
+    def test_delai_ecoule(self):
+        depart = self.notificateur.dernier_id()
+        self.assertEqual(self.notificateur.attendre(depart, timeout=0.1), (depart, []))
+
+    def test_abonne_plus_ancien_que_l_historique(self):
+        nouvelle = self.creer_demande(self.employe_id, "2026-03-04", "2026-03-04")
+        self.notificateur.attendre(self.ancienne, timeout=5)
+        # Demandes antérieures au démarrage: relues en base
+        dernier_id, rows = self.notificateur.attendre(0, timeout=5)
+        self.assertEqual((dernier_id, [row['id'] for row in rows]), (nouvelle, [self.ancienne, nouvelle]))
+
+    def test_arret_signale(self):
+        depart = self.notificateur.dernier_id()
+        self.notificateur.arreter(5)
+        self.assertEqual(self.notificateur.attendre(depart, timeout=5), (depart, None))
+
+    def test_notificateur_partage_arrete_avec_sa_base(self):
+        partage = NotificateurDemandes.partage()
+        self.assertIs(NotificateurDemandes.partage(), partage)
+        database.fermer_connexions()
+        self.assertEqual(partage.attendre(partage.dernier_id(), timeout=5)[1], None)
+
+        nouveau = NotificateurDemandes.partage()
+        self.assertIsNot(nouveau, partage)
+        nouveau.arreter(5)
+
+
+if __name__ == "__main__":
+    unittest.main()
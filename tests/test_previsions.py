@@ -0,0 +1,72 @@
+"""
+Prévisions d'absences et de soldes (grilles par différences)
+"""
+import unittest
+from datetime import date
+
+import numpy as np
+
+from services.previsions import Previsionniste
+from tests.base import TestBase
+
+AUJOURD_HUI = date(2026, 3, 1)
+
+
+class TestPrevisions(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.a = self.creer_employe("A", solde=20)
+        self.c = self.creer_employe("C", solde=10)
+        self.r = self.creer_employe("R", service="RH")
+        # Historique: un congé annuel validé, deux refusés (taux d'acceptation 2/4 avec la validée à venir)
+        self.creer_demande(self.c, "2025-03-20", "2025-03-20", statut='Validée')
+        self.creer_demande(self.a, "2025-06-02", "2025-06-02", statut='Refusée')
+        self.creer_demande(self.a, "2025-06-09", "2025-06-09", statut='Refusée')
+        # Horizon: trois jours validés, deux jours en attente
+        self.creer_demande(self.a, "2026-03-05", "2026-03-07", statut='Validée')
+        self.creer_demande(self.a, "2026-03-10", "2026-03-11")
+        self.previsionniste = Previsionniste(horizon_jours=31, annees_historique=1)
+
+    def absences(self, prevision, employe_id):
+        ligne = int(np.searchsorted(prevision.employe_ids, employe_id))
+        return dict(zip((str(jour) for jour in prevision.jours), prevision.absences[ligne]))
+
+    def test_absences_attendues(self):
+        prevision = self.previsionniste.prevoir(AUJOURD_HUI)
+        absences_a = self.absences(prevision, self.a)
+        self.assertEqual([absences_a[f"2026-03-0{jour}"] for jour in (4, 5, 6, 7, 8)], [0, 1, 1, 1, 0])
+        self.assertEqual((absences_a["2026-03-10"], absences_a["2026-03-11"]), (0.5, 0.5))
+        # Saisonnalité: la moitié du service IT était absente le même jour l'an passé
+        self.assertEqual(self.absences(prevision, self.c)["2026-03-20"], 0.5)
+
+        charge = {service: dict(zip((str(j) for j in prevision.jours), ligne))
+                  for service, ligne in zip(prevision.services, prevision.charge)}
+        self.assertEqual((charge["IT"]["2026-03-05"], charge["IT"]["2026-03-20"]), (1, 1))
+        self.assertEqual(float(prevision.charge[prevision.services.index("RH")].sum()), 0)
+
+    def test_soldes_projetes(self):
+        prevision = self.previsionniste.prevoir(AUJOURD_HUI)
+        # Validées: déjà déduites; en attente: 2 jours x 0,5; saisonnalité: 0,5 jour
+        self.assertEqual(prevision.soldes_projetes(self.a), {"2026-03": 18.5})
+        self.assertEqual(prevision.soldes_projetes(self.c), {"2026-03": 9.5})
+        self.assertEqual(prevision.soldes_projetes(self.r), {"2026-03": 22})
+        with self.assertRaises(KeyError):
+            prevision.soldes_projetes(999)
+
+    def test_cache_tant_que_rien_ne_change(self):
+        prevision = self.previsionniste.prevoir(AUJOURD_HUI)
+        self.assertIs(self.previsionniste.prevoir(AUJOURD_HUI), prevision)
+        self.creer_demande(self.r, "2026-03-16", "2026-03-16", statut='Validée')
+        nouvelle = self.previsionniste.prevoir(AUJOURD_HUI)
+        self.assertIsNot(nouvelle, prevision)
+        self.assertEqual(self.absences(nouvelle, self.r)["2026-03-16"], 1)
+
+    def test_dates_enregistrees_sans_zeros(self):
+        self.creer_demande(self.r, "2026-3-16", "2026-3-17", statut='Validée')
+        absences = self.absences(self.previsionniste.prevoir(AUJOURD_HUI), self.r)
+        self.assertEqual([absences[f"2026-03-{jour}"] for jour in (15, 16, 17, 18)], [0, 1, 1, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Recherche plein texte des employés (FTS5 tenue par triggers)
+"""
+import sqlite3
+import unittest
+
+from database import init_db
+from services.dao import EmployeDAO
+from tests.base import TestBase
+
+
+def matricules(terme):
+    return sorted(e.matricule for e in EmployeDAO.rechercher(terme))
+
+
+class TestRechercheEmployes(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        EmployeDAO.creer("M001", "Martin", "Marie", "Informatique", 22)
+        EmployeDAO.creer("M002", "Marchand", "Paul", "Comptabilité", 22)
+        self.durand = EmployeDAO.creer("D003", "Durand", "Marc", "Informatique", 22)
+
+    def test_prefixes_sur_toutes_les_colonnes(self):
+        self.assertEqual(matricules("mar"), ["D003", "M001", "M002"])
+        self.assertEqual(matricules("mar inf"), ["D003", "M001"])
+        self.assertEqual(matricules("m002"), ["M002"])
+        self.assertEqual(EmployeDAO.compter_recherche("inform"), 2)
+        self.assertEqual(matricules("  "), [])
+
+    def test_pagination(self):
+        pages = [e.matricule for e in EmployeDAO.rechercher("mar", limite=2)]
+        pages += [e.matricule for e in EmployeDAO.rechercher("mar", limite=2, decalage=2)]
+        self.assertEqual(sorted(pages), ["D003", "M001", "M002"])
+
+    def test_index_suit_les_modifications(self):
+        conn = sqlite3.connect("conges.db")
+        conn.execute("UPDATE employes SET service = 'Marketing' WHERE id = ?", (self.durand,))
+        conn.commit()
+        conn.close()
+        self.assertEqual(matricules("inf"), ["M001"])
+        self.assertEqual(matricules("marketing"), ["D003"])
+
+        EmployeDAO.supprimer(self.durand)
+        self.assertEqual(matricules("durand"), [])
+
+    def test_employes_existants_indexes_a_la_migration(self):
+        conn = sqlite3.connect("conges.db")
+        conn.executescript("""
+            DROP TRIGGER employes_fts_ai;
+            DROP TRIGGER employes_fts_ad;
+            DROP TRIGGER employes_fts_au;
+            DROP TABLE employes_fts;
+            INSERT INTO employes (matricule, nom, prenom, service, solde_conges)
+            VALUES ('L004', 'Lefebvre', 'Anne', 'RH', 22);
+            PRAGMA user_version = 0;
+        """)
+        conn.close()
+
+        init_db()
+        self.assertEqual(matricules("lefeb"), ["L004"])
+        self.assertEqual(matricules("mar"), ["D003", "M001", "M002"])
+
+
+if __name__ == "__main__":
+    unittest.main()
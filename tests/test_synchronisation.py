@@ -0,0 +1,120 @@
+"""
+Flux de modifications (journal_modifications) pour la synchronisation des clients
+"""
+import unittest
+
+import database
+from database import get_connection, get_read_connection
+from services.dao import DemandeDAO, EmployeDAO
+from services.gestion_conges import GestionConges
+from services.resultats import RESULTAT_OK
+from services.synchronisation import modifications_depuis
+from tests.base import TestBase
+
+
+def synchroniser(copie, curseur, limite=3):
+    """Applique toutes les pages postérieures à curseur sur copie {(table, id): données}"""
+    while True:
+        page = modifications_depuis(curseur, limite)
+        for modification in page["modifications"]:
+            cle = (modification["table"], modification["id"])
+            if modification["operation"] in ('D', 'A'):
+                copie.pop(cle, None)
+            else:
+                copie[cle] = modification["donnees"]
+        curseur = page["curseur"]
+        if not page["suite"]:
+            return curseur
+
+
+def etat_source():
+    conn = get_read_connection()
+    try:
+        etat = {}
+        for table in ("employes", "demandes_conge"):
+            for row in conn.execute(f"SELECT id FROM {table}"):
+                etat[(table, row['id'])] = row['id']
+        return etat
+    finally:
+        conn.close()
+
+
+class TestSynchronisation(TestBase):
+
+    def test_copie_suit_la_source(self):
+        gc = GestionConges()
+        employe_id = self.creer_employe("E1", solde=10)
+        demandes = [self.creer_demande(employe_id, f"2026-03-0{jour}", f"2026-03-0{jour}") for jour in (2, 3, 4)]
+
+        copie = {}
+        curseur = synchroniser(copie, 0)
+        self.assertEqual({cle: donnees['id'] for cle, donnees in copie.items()}, etat_source())
+
+        # Validation: la demande et le solde de l'employé changent
+        self.assertEqual(gc.tenter_validation(demandes[0])[0], RESULTAT_OK)
+        DemandeDAO.supprimer(demandes[1])
+        page = modifications_depuis(curseur)
+        self.assertEqual({(m["table"], m["id"], m["operation"]) for m in page["modifications"]},
+                         {("demandes_conge", demandes[0], 'U'), ("employes", employe_id, 'U'),
+                          ("demandes_conge", demandes[1], 'D')})
+        self.assertIsNone(next(m for m in page["modifications"] if m["operation"] == 'D')["donnees"])
+
+        curseur = synchroniser(copie, curseur)
+        self.assertEqual({cle: donnees['id'] for cle, donnees in copie.items()}, etat_source())
+        self.assertEqual(copie[("demandes_conge", demandes[0])]['statut'], 'Validée')
+        self.assertEqual(copie[("employes", employe_id)]['solde_conges'],
+                         EmployeDAO.trouver_par_id(employe_id).solde_conges)
+
+        # Rien de nouveau: page vide, curseur inchangé
+        self.assertEqual(modifications_depuis(curseur), {"curseur": curseur, "suite": False, "modifications": []})
+
+    def test_une_entree_par_ligne(self):
+        employe_id = self.creer_employe("E1")
+        demande_id = self.creer_demande(employe_id, "2026-03-02", "2026-03-03")
+        for statut in ('Validée', 'Refusée', 'Validée'):
+            DemandeDAO.mettre_a_jour_statut(demande_id, statut)
+
+        modifications = modifications_depuis(0)["modifications"]
+        self.assertEqual([(m["table"], m["id"]) for m in modifications],
+                         [("employes", employe_id), ("demandes_conge", demande_id)])
+        self.assertEqual(modifications[-1]["operation"], 'U')
+
+    def test_archivage_distinct_d_une_suppression(self):
+        employe_id = self.creer_employe("E1")
+        ancienne = self.creer_demande(employe_id, "2024-01-08", "2024-01-09", statut='Validée')
+        supprimee = self.creer_demande(employe_id, "2024-02-05", "2024-02-05", statut='Refusée')
+        courante = self.creer_demande(employe_id, "2026-03-02", "2026-03-03")
+        DemandeDAO.supprimer(supprimee)
+        curseur = modifications_depuis(0)["curseur"]
+
+        self.assertEqual(DemandeDAO.archiver_lot("2025-01-01", 10), 1)
+        page = modifications_depuis(curseur)
+        self.assertEqual([(m["id"], m["operation"], m["donnees"]) for m in page["modifications"]],
+                         [(ancienne, 'A', None)])
+
+        copie = {}
+        synchroniser(copie, 0)
+        self.assertEqual(set(copie), {("employes", employe_id), ("demandes_conge", courante)})
+        self.assertEqual({(m["id"], m["operation"]) for m in modifications_depuis(0)["modifications"]
+                          if m["table"] == "demandes_conge"},
+                         {(ancienne, 'A'), (supprimee, 'D'), (courante, 'I')})
+
+    def test_journal_existant_conserve_a_la_migration(self):
+        employe_id = self.creer_employe("E1")
+        self.creer_demande(employe_id, "2026-03-02", "2026-03-03")
+        avant = modifications_depuis(0)
+        conn = get_connection()
+        conn.execute(f"PRAGMA user_version = {database.MIGRATIONS.index(database._migration_journal_archivage)}")
+        conn.commit()
+        conn.close()
+
+        database.init_db()
+        self.assertEqual(modifications_depuis(0), avant)
+        demande_id = self.creer_demande(employe_id, "2026-04-06", "2026-04-07")
+        page = modifications_depuis(avant["curseur"])
+        self.assertEqual([(m["id"], m["operation"]) for m in page["modifications"]], [(demande_id, 'I')])
+        self.assertGreater(page["curseur"], avant["curseur"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Validation et refus conditionnels (verrouillage optimiste sur version)
+"""
+import threading
+import unittest
+
+from services.dao import DemandeDAO, EmployeDAO
+from services.gestion_conges import GestionConges
+from services.resultats import (
+    RESULTAT_OK, RESULTAT_CONFLIT, RESULTAT_DEJA_TRAITEE, RESULTAT_SOLDE_INSUFFISANT
+)
+from tests.base import TestBase
+
+
+class TestValidationConditionnelle(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.gc = GestionConges()
+        self.employe_id = self.creer_employe("E1", solde=10)
+        # Du 2 au 6 mars 2026: 5 jours
+        self.demande_id = self.creer_demande(self.employe_id, "2026-03-02", "2026-03-06")
+
+    def test_validation_deduit_le_solde_une_fois(self):
+        resultat, _ = self.gc.tenter_validation(self.demande_id)
+        self.assertEqual(resultat, RESULTAT_OK)
+        self.assertEqual(DemandeDAO.trouver_par_id(self.demande_id)['statut'], 'Validée')
+        self.assertEqual(EmployeDAO.trouver_par_id(self.employe_id).solde_conges, 5)
+
+        resultat, _ = self.gc.tenter_validation(self.demande_id)
+        self.assertEqual(resultat, RESULTAT_DEJA_TRAITEE)
+        self.assertEqual(EmployeDAO.trouver_par_id(self.employe_id).solde_conges, 5)
+
+    def test_version_perimee_donne_un_conflit(self):
+        version = DemandeDAO.trouver_par_id(self.demande_id)['version']
+        self.assertEqual(DemandeDAO.refuser_si_en_attente(self.demande_id, version), RESULTAT_OK)
+
+        # Un second opérateur qui avait lu la même version
+        self.assertEqual(DemandeDAO.valider_si_en_attente(self.demande_id, version, self.employe_id, 5),
+                         RESULTAT_CONFLIT)
+        self.assertEqual(DemandeDAO.refuser_si_en_attente(self.demande_id, version), RESULTAT_CONFLIT)
+        self.assertEqual(DemandeDAO.trouver_par_id(self.demande_id)['statut'], 'Refusée')
+        self.assertEqual(EmployeDAO.trouver_par_id(self.employe_id).solde_conges, 10)
+
+    def test_solde_insuffisant_laisse_la_demande_en_attente(self):
+        version = DemandeDAO.trouver_par_id(self.demande_id)['version']
+        EmployeDAO.mettre_a_jour_solde(self.employe_id, 3)
+
+        self.assertEqual(DemandeDAO.valider_si_en_attente(self.demande_id, version, self.employe_id, 5),
+                         RESULTAT_SOLDE_INSUFFISANT)
+        row = DemandeDAO.trouver_par_id(self.demande_id)
+        self.assertEqual((row['statut'], row['version']), ('En attente', version))
+        self.assertEqual(row['solde_conges'], 3)
+
+    def test_operateurs_en_parallele(self):
+        nb_operateurs = 8
+        depart = threading.Barrier(nb_operateurs)
+        resultats = []
+
+        def operateur(indice):
+            depart.wait()
+            tenter = self.gc.tenter_validation if indice % 2 == 0 else self.gc.tenter_refus
+            resultats.append(tenter(self.demande_id)[0])
+
+        threads = [threading.Thread(target=operateur, args=(i,)) for i in range(nb_operateurs)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Un seul opérateur l'emporte, les autres voient un conflit ou une demande traitée
+        self.assertEqual(resultats.count(RESULTAT_OK), 1)
+        self.assertTrue(set(resultats) <= {RESULTAT_OK, RESULTAT_CONFLIT, RESULTAT_DEJA_TRAITEE})
+        row = DemandeDAO.trouver_par_id(self.demande_id)
+        attendu = 5 if row['statut'] == 'Validée' else 10
+        self.assertEqual(row['solde_conges'], attendu)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Validation par lot (NumPy) face à la validation objet par objet (Conge.valider_demande)
+"""
+import random
+import unittest
+from datetime import date, timedelta
+
+from models.types_conge import CongeFactory, CongeMaladie
+from models.validation_lot import valider_lot, MESSAGE_DATE_INVALIDE
+
+TYPES = ["Annuel", "Maladie", "Exceptionnel", "Sans solde", "Parental", "annuel", "PARENTAL"]
+MOTIFS = ["mariage", "naissance", "Deces_proche", "demenagement", "vacances", ""]
+
+
+def lot_aleatoire(taille, graine=2026):
+    """Colonnes (types, dates_debut, dates_fin, soldes, motifs) variées, dates non complétées comprises"""
+    hasard = random.Random(graine)
+    types, debuts, fins, soldes, motifs = [], [], [], [], []
+    for _ in range(taille):
+        debut = date(2026, 1, 1) + timedelta(days=hasard.randrange(365))
+        fin = debut + timedelta(days=hasard.randrange(-2, 200))
+        texte_debut = debut.isoformat()
+        if hasard.random() < 0.1:
+            # Même date sans zéros: acceptée par strptime
+            texte_debut = f"{debut.year}-{debut.month}-{debut.day}"
+        types.append(hasard.choice(TYPES))
+        debuts.append(texte_debut)
+        fins.append(fin.isoformat())
+        soldes.append(hasard.randrange(0, 60))
+        motifs.append(hasard.choice(MOTIFS))
+    return types, debuts, fins, soldes, motifs
+
+
+class TestValidationLot(unittest.TestCase):
+
+    def test_memes_verdicts_que_les_objets(self):
+        types, debuts, fins, soldes, motifs = lot_aleatoire(2000)
+        resultat = valider_lot(types, debuts, fins, soldes, motifs)
+        self.assertEqual(len(resultat), len(types))
+
+        for i in range(len(types)):
+            conge = CongeFactory.creer_conge(types[i], None, None, debuts[i], fins[i], "En attente",
+                                             motif=motifs[i])
+            with self.subTest(ligne=i, type=types[i], debut=debuts[i], fin=fins[i], motif=motifs[i]):
+                self.assertEqual(resultat[i], conge.valider_demande(soldes[i]))
+                self.assertEqual(resultat.jours[i], conge.calculer_jours())
+                self.assertEqual(resultat.jours_deductibles[i], conge.calculer_jours_deductibles())
+                self.assertEqual(bool(resultat.deduit[i]), conge.deduit_du_solde())
+                if isinstance(conge, CongeMaladie):
+                    self.assertEqual(bool(resultat.justificatif[i]), conge.necessite_justificatif())
+
+    def test_lignes_illisibles(self):
+        resultat = valider_lot(["Annuel", "Vacances", "Maladie"],
+                               ["2026-02-30", "2026-03-01", "pas une date"],
+                               ["2026-03-02", "2026-03-02", "2026-03-02"],
+                               [10, 10, 10])
+        self.assertEqual(resultat[0], (False, MESSAGE_DATE_INVALIDE))
+        self.assertEqual(resultat[1], (False, "Type de congé inconnu: Vacances"))
+        self.assertEqual(resultat[2], (False, MESSAGE_DATE_INVALIDE))
+        with self.assertRaises(ValueError):
+            CongeFactory.creer_conge("Vacances", None, None, "2026-03-01", "2026-03-02", "En attente")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,61 +1,124 @@
+import itertools
+import sys
+
+STATUT_EMOJIS = {
+    'En attente': '⏳',
+    'Validée': '✅',
+    'Refusée': '❌'
+}
+
+
 def afficher_demande_detaillee(conge, solde_employe=None):
     """
     Affiche une demande de congé avec tous les détails
     Utilise le polymorphisme pour afficher l'emoji et les infos spécifiques
     """
+    print(formater_demande_detaillee(conge, solde_employe), end="")
+
+
+def formater_demande_detaillee(conge, solde_employe=None):
+    """Construit le bloc détaillé d'une demande (texte prêt à écrire en une fois)"""
     jours = conge.calculer_jours()
 
     # Status emoji
-    status_emoji = {
-        'En attente': '⏳',
-        'Validée': '✅',
-        'Refusée': '❌'
-    }
-    emoji_status = status_emoji.get(conge.statut, '❓')
+    emoji_status = STATUT_EMOJIS.get(conge.statut, '❓')
 
     # Type emoji (polymorphisme)
     emoji_type = conge.get_emoji() if hasattr(conge, 'get_emoji') else '📄'
 
-    print(f"\n{'=' * 60}")
-    print(f"ID: {conge.id} | {emoji_status} {conge.statut} | {emoji_type} {conge.get_type()}")
+    lignes = [
+        "",
+        "=" * 60,
+        f"ID: {conge.id} | {emoji_status} {conge.statut} | {emoji_type} {conge.get_type()}",
+    ]
 
     # Employee info (if available)
     if hasattr(conge, 'nom'):
-        print(f"Employé: {conge.nom} {conge.prenom} (Mat: {conge.matricule})")
+        lignes.append(f"Employé: {conge.nom} {conge.prenom} (Mat: {conge.matricule})")
     if hasattr(conge, 'service'):
-        print(f"Service: {conge.service}")
+        lignes.append(f"Service: {conge.service}")
 
-    print(f"Période: {conge.date_debut} → {conge.date_fin} ({jours} jours)")
+    lignes.append(f"Période: {conge.date_debut} → {conge.date_fin} ({jours} jours)")
 
     # Show balance info if relevant
     if conge.deduit_du_solde() and solde_employe is not None:
-        print(f"💰 Solde actuel: {solde_employe} jours")
-        print(f"📉 Sera déduit: {conge.calculer_jours_deductibles()} jours")
+        lignes.append(f"💰 Solde actuel: {solde_employe} jours")
+        lignes.append(f"📉 Sera déduit: {conge.calculer_jours_deductibles()} jours")
     elif not conge.deduit_du_solde():
-        print(f"ℹ️  Ne déduit pas du solde")
+        lignes.append("ℹ️  Ne déduit pas du solde")
 
     # Specific info for CongeExceptionnel
     if isinstance(conge, CongeExceptionnel):
-        print(f"Motif: {conge.motif} (Max: {conge.get_duree_maximale()} jours)")
+        lignes.append(f"Motif: {conge.motif} (Max: {conge.get_duree_maximale()} jours)")
 
     # Specific info for CongeMaladie
     if isinstance(conge, CongeMaladie) and conge.necessite_justificatif():
-        print(f"⚠️  Justificatif médical requis (> 3 jours)")
+        lignes.append(f"⚠️  Justificatif médical requis (> {CongeMaladie.SEUIL_JUSTIFICATIF} jours)")
 
     if conge.commentaire:
-        print(f"Commentaire: {conge.commentaire}")
+        lignes.append(f"Commentaire: {conge.commentaire}")
+
+    lignes.append("=" * 60)
+    return "\n".join(lignes) + "\n"
+
+
+ENTETE_COMPACT = (f"{'ID':>6} | {'ST':<2} | {'TYPE':<12} | {'EMPLOYÉ':<25} | "
+                  f"{'DÉBUT':<10} | {'FIN':<10} | {'JOURS':>5}\n" + "-" * 90 + "\n")
+
+
+def formater_ligne_compacte(conge, solde_employe=None):
+    """Une demande sur une seule ligne (mode tableau compact)"""
+    employe = f"{conge.nom} {conge.prenom}" if hasattr(conge, 'nom') else str(conge.employe_id)
+    return (f"{conge.id:>6} | {STATUT_EMOJIS.get(conge.statut, '❓'):<2} | {conge.get_type():<12} | "
+            f"{employe[:25]:<25} | {conge.date_debut:<10} | {conge.date_fin:<10} | "
+            f"{conge.calculer_jours():>5}\n")
+
+
+def afficher_par_pages(demandes, taille_page=20, compact=False, demander_suite=input):
+    """
+    Affiche des demandes page par page
+    - demandes: itérateur paresseux (seule la page courante est en mémoire)
+    - chaque page est formatée dans un tampon puis écrite en un seul appel
+    - compact: une ligne par demande au lieu du bloc détaillé
+    Retourne le nombre de demandes affichées
+    """
+    formater = formater_ligne_compacte if compact else formater_demande_detaillee
+    iterateur = iter(demandes)
+    suivante = next(iterateur, None)
+    total = 0
+    page = 0
+
+    while suivante is not None:
+        page += 1
+        tampon = [ENTETE_COMPACT] if compact else []
+
+        for conge in itertools.islice(itertools.chain([suivante], iterateur), taille_page):
+            tampon.append(formater(conge, getattr(conge, 'solde_conges', None)))
+            total += 1
+
+        suivante = next(iterateur, None)
+        tampon.append(f"-- Page {page} ({total} demande(s) affichée(s)) --\n")
+        sys.stdout.write("".join(tampon))
+        sys.stdout.flush()
+
+        if suivante is not None and demander_suite("[Entrée] page suivante, q pour arrêter: ").lower() == "q":
+            break
 
-    print(f"{'=' * 60}")
+    return total
 
 
 def afficher_liste_employes(employes):
     """Affiche la liste des employés de manière formatée"""
-    print("\n" + "=" * 80)
-    print(f"{'MATRICULE':<12} | {'NOM':<15} | {'PRÉNOM':<15} | {'SERVICE':<15} | {'SOLDE':<8}")
-    print("=" * 80)
+    tampon = [
+        "\n" + "=" * 80 + "\n",
+        f"{'MATRICULE':<12} | {'NOM':<15} | {'PRÉNOM':<15} | {'SERVICE':<15} | {'SOLDE':<8}\n",
+        "=" * 80 + "\n",
+    ]
     for e in employes:
-        print(f"{e.matricule:<12} | {e.nom:<15} | {e.prenom:<15} | {e.service:<15} | {e.solde_conges:>3} jours")
-    print("=" * 80)
+        tampon.append(f"{e.matricule:<12} | {e.nom:<15} | {e.prenom:<15} | {e.service:<15} | "
+                      f"{e.solde_conges:>3} jours\n")
+    tampon.append("=" * 80 + "\n")
+    sys.stdout.write("".join(tampon))
 
 
 def afficher_menu_types_conge():
@@ -0,0 +1,71 @@
+import hashlib
+import hmac
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Format stocké: algorithme$itérations$sel$empreinte (sel et empreinte en hexadécimal)
+ALGORITHME = "pbkdf2_sha256"
+ITERATIONS = 200_000
+TAILLE_SEL = 16
+
+# Vérifications simultanées au plus: une rafale de connexions ne monopolise
+# pas tous les cœurs (pbkdf2_hmac libère le GIL, les threads suffisent)
+NB_VERIFICATIONS_SIMULTANEES = 4
+
+_pool = None
+_verrou_pool = threading.Lock()
+
+
+def hacher(mot_de_passe):
+    """Retourne l'empreinte à stocker pour un mot de passe (sel aléatoire)"""
+    sel = secrets.token_bytes(TAILLE_SEL)
+    empreinte = _deriver(mot_de_passe, sel, ITERATIONS)
+    return f"{ALGORITHME}${ITERATIONS}${sel.hex()}${empreinte.hex()}"
+
+
+def est_hache(stocke):
+    """Indique si la valeur stockée est une empreinte (et non un mot de passe en clair)"""
+    return stocke.startswith(ALGORITHME + "$")
+
+
+def doit_rehacher(stocke):
+    """Valeur en clair (comptes antérieurs) ou empreinte plus faible que la configuration actuelle"""
+    if not est_hache(stocke):
+        return True
+    return int(stocke.split("$")[1]) < ITERATIONS
+
+
+def verifier(mot_de_passe, stocke):
+    """
+    Compare un mot de passe saisi à la valeur stockée, en temps constant
+    Les valeurs en clair des comptes créés avant le hachage restent acceptées
+    (elles sont remplacées par une empreinte à la connexion suivante)
+    """
+    if not est_hache(stocke):
+        return hmac.compare_digest(mot_de_passe.encode(), stocke.encode())
+
+    _, iterations, sel, empreinte = stocke.split("$")
+    calcule = _deriver(mot_de_passe, bytes.fromhex(sel), int(iterations))
+    return hmac.compare_digest(calcule, bytes.fromhex(empreinte))
+
+
+def executer_derivation(fonction, *args):
+    """
+    Exécute un hachage ou une vérification dans le pool borné et attend le résultat
+    Ex: executer_derivation(verifier, mot_de_passe, stocke)
+    """
+    return _pool_derivation().submit(fonction, *args).result()
+
+
+def _pool_derivation():
+    global _pool
+    with _verrou_pool:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=NB_VERIFICATIONS_SIMULTANEES,
+                                       thread_name_prefix="mots-de-passe")
+        return _pool
+
+
+def _deriver(mot_de_passe, sel, iterations):
+    return hashlib.pbkdf2_hmac("sha256", mot_de_passe.encode(), sel, iterations)
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from utils.validators import lire_date
+
+
+def pic_absences(absences, debut, fin):
+    """
+    Calcule le nombre maximal de personnes absentes simultanément sur [debut, fin]
+    par balayage des bornes d'intervalles (sweep-line), en O(n log n)
+
+    Args:
+        absences: itérable de (employe_id, date_debut, date_fin), dates YYYY-MM-DD incluses
+        debut, fin: période examinée (YYYY-MM-DD)
+
+    Retourne (pic, date du pic ou None)
+    Un employé avec plusieurs absences qui se chevauchent n'est compté qu'une fois.
+    """
+    borne_debut = lire_date(debut)
+    borne_fin = lire_date(fin)
+
+    evenements = []
+    for employe_id, date_debut, date_fin in absences:
+        d = max(lire_date(date_debut), borne_debut)
+        f = min(lire_date(date_fin), borne_fin)
+        if d > f:
+            continue
+        # Fin exclusive le lendemain: à date égale, les départs (-1) passent avant les arrivées (+1)
+        evenements.append((d, 1, employe_id))
+        evenements.append((f + timedelta(days=1), -1, employe_id))
+
+    evenements.sort(key=lambda e: (e[0], e[1]))
+
+    absences_par_employe = {}
+    absents = 0
+    pic, date_pic = 0, None
+
+    for jour, delta, employe_id in evenements:
+        avant = absences_par_employe.get(employe_id, 0)
+        apres = avant + delta
+        absences_par_employe[employe_id] = apres
+
+        if avant == 0 and apres > 0:
+            absents += 1
+            if absents > pic:
+                pic, date_pic = absents, jour
+        elif avant > 0 and apres == 0:
+            absents -= 1
+
+    return pic, date_pic.isoformat() if date_pic else None
@@ -10,6 +10,14 @@ def valider_format_date(date_str):
         return False, "Format de date invalide (utilisez YYYY-MM-DD)"
 
 
+def lire_date(texte):
+    """
+    Date YYYY-MM-DD avec la même analyse que valider_periode (strptime):
+    une date acceptée à la saisie (ex: 2026-6-1) est toujours relue
+    """
+    return datetime.strptime(texte, '%Y-%m-%d').date()
+
+
 def valider_periode(date_debut, date_fin):
     """Valide que date_fin est après date_debut"""
     try: